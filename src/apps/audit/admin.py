@@ -1,8 +1,19 @@
 from django.contrib import admin
-from django.db.models import F, Q
+from django.contrib.admin.views.main import ChangeList
+from django.urls import path, reverse
 from django.utils.html import format_html, format_html_join
 
 from apps.audit.models import ImportLog
+from apps.audit.views import ImportLogRejectedRowsAdminView
+from apps.core.admin import AutocompleteFilter, LargeTableAdminMixin
+from apps.inventory.services.import_errors import ERROR_CODES
+from apps.inventory.services.import_profile import PHASES
+
+STATUS_COLORS = {
+    ImportLog.Status.OK: "#10b981",
+    ImportLog.Status.PARTIAL: "#f59e0b",
+    ImportLog.Status.FAIL: "#ef4444",
+}
 
 
 class ImportStatusFilter(admin.SimpleListFilter):
@@ -10,40 +21,33 @@ class ImportStatusFilter(admin.SimpleListFilter):
     parameter_name = "status"
 
     def lookups(self, request, model_admin):
-        return [
-            ("ok", "OK"),
-            ("partial", "PARTIAL"),
-            ("fail", "FAIL"),
-        ]
+        return ImportLog.Status.choices
 
     def queryset(self, request, qs):
-        value = self.value()
-        if value == "ok":
-            return qs.filter(
-                inserted=F("total"),
-                invalid_rows=0,
-                duplicates_in_file=0,
-                duplicates_in_db=0,
-            )
-        if value == "partial":
-            return qs.filter(
-                inserted__gt=0
-            ).filter(
-                Q(inserted__lt=F("total")) |
-                Q(invalid_rows__gt=0) |
-                Q(duplicates_in_file__gt=0) |
-                Q(duplicates_in_db__gt=0)
-            )
-        if value == "fail":
-            return qs.filter(inserted=0)
+        # status хранится в таблице и индексирован вместе с created_at
+        if self.value() in ImportLog.Status.values:
+            return qs.filter(status=self.value())
         return qs
 
 
+class ImportLogChangeList(ChangeList):
+    # Список показывает только счётчики и статус — большие поля не читаются
+    deferred_fields = ("errors", "error_counts", "profile", "checkpoint", "checkpoint_positions")
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).defer(*self.deferred_fields)
+
+
+class BatchFilter(AutocompleteFilter):
+    title = "партии"
+    field_name = "batch"
+
+
 @admin.register(ImportLog)
-class ImportLogAdmin(admin.ModelAdmin):
+class ImportLogAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("created_at", "batch", "file_name", "status_badge",)
     list_display_links = ("batch", "file_name")
-    list_filter = (ImportStatusFilter, "batch")
+    list_filter = (ImportStatusFilter, BatchFilter)
     search_fields = ("batch__number", "file_name", "file_sha256")
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
@@ -60,7 +64,11 @@ class ImportLogAdmin(admin.ModelAdmin):
         "duplicates_in_db",
         "invalid_rows",
         "duration_sec",
+        "checkpoint_summary",
+        "error_counts_pretty",
+        "rejected_rows_link",
         "errors_pretty",
+        "profile_table",
         "created_at",
         "updated_at",
     )
@@ -77,39 +85,39 @@ class ImportLogAdmin(admin.ModelAdmin):
                 "duplicates_in_db",
                 "invalid_rows",
                 "duration_sec",
+                "checkpoint_summary",
             )
         }),
-        ("Ошибки", {"fields": ("errors_pretty",)}),
+        ("Ошибки", {"fields": ("error_counts_pretty", "rejected_rows_link", "errors_pretty")}),
+        ("Профиль", {"fields": ("profile_table",)}),
         ("Метаданные", {"fields": ("created_at", "updated_at")}),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return ImportLogChangeList
+
+    def get_urls(self):
+        urls = super().get_urls()
+        view = ImportLogRejectedRowsAdminView.as_view(admin_site=self.admin_site)
+        my_urls = [
+            path(
+                "<int:object_id>/rejected-rows/",
+                self.admin_site.admin_view(view),
+                name="audit_importlog_rejected_rows",
+            ),
+        ]
+        return my_urls + urls
+
     def has_add_permission(self, request):
         return False
 
     def has_change_permission(self, request, obj=None):
         return False
 
-    def status_code(self, obj: ImportLog) -> str:
-        if (obj.inserted or 0) == 0:
-            return "fail"
-        if (
-            obj.inserted == obj.total
-            and obj.invalid_rows == 0
-            and obj.duplicates_in_file == 0
-            and obj.duplicates_in_db == 0
-        ):
-            return "ok"
-        return "partial"
-
-    @admin.display(description="Статус")
+    @admin.display(description="Статус", ordering="status")
     def status_badge(self, obj: ImportLog) -> str:
-        code = self.status_code(obj)
-        if code == "ok":
-            text, bg = "OK", "#10b981"
-        elif code == "partial":
-            text, bg = "PARTIAL", "#f59e0b"
-        else:
-            text, bg = "FAIL", "#ef4444"
+        bg = STATUS_COLORS.get(obj.status, STATUS_COLORS[ImportLog.Status.FAIL])
+        text = obj.get_status_display()
         return format_html(
             '<span style="display:inline-block;padding:2px 8px;border-radius:9999px;'
             'font-weight:600;color:#fff;background:{};">{}</span>',
@@ -138,3 +146,59 @@ class ImportLogAdmin(admin.ModelAdmin):
         items = tuple((str(e),) for e in obj.errors[:50])
         return format_html('<ul style="margin:0;padding-left:1.1rem;">{}</ul>',
                            format_html_join("", "<li>{}</li>", items))
+
+    @admin.display(description="Контрольная точка")
+    def checkpoint_summary(self, obj: ImportLog) -> str:
+        if not obj.checkpoint:
+            return "—"
+        return (
+            f"обработано до строки {obj.checkpoint['line']} (байт {obj.checkpoint['offset']}); "
+            f"повторная загрузка файла продолжит импорт"
+        )
+
+    @admin.display(description="Ошибки по видам")
+    def error_counts_pretty(self, obj: ImportLog):
+        if not obj.error_counts:
+            return "—"
+        items = tuple(
+            (ERROR_CODES.get(code, code), count)
+            for code, count in sorted(obj.error_counts.items(), key=lambda kv: -kv[1])
+        )
+        return format_html('<ul style="margin:0;padding-left:1.1rem;">{}</ul>',
+                           format_html_join("", "<li>{}: {}</li>", items))
+
+    @admin.display(description="Отклонённые строки")
+    def rejected_rows_link(self, obj: ImportLog):
+        if not obj.rejected_rows:
+            return "—"
+        url = reverse("admin:audit_importlog_rejected_rows", args=[obj.pk])
+        total = sum(obj.error_counts.values()) if obj.error_counts else 0
+        return format_html('<a href="{}">Скачать CSV ({} строк, gzip)</a>', url, total)
+
+    @admin.display(description="Время по фазам")
+    def profile_table(self, obj: ImportLog):
+        if not obj.profile:
+            return "—"
+        duration = float(obj.duration_sec)
+        phases = obj.profile.get("phases", {})
+
+        def share(seconds: float) -> str:
+            return f"{seconds / duration * 100:.1f}%" if duration > 0 else "—"
+
+        # jsonb не хранит порядок ключей — фазы выводятся в порядке PHASES
+        rows = [
+            (label, f"{phases[name]:.3f}", share(phases[name])) for name, label in PHASES.items() if name in phases
+        ]
+        # Всё, что не попало в фазы: партия, склад, проверка повтора файла, контрольные точки
+        other = max(duration - sum(phases.values()), 0.0)
+        rows.append(("Прочее", f"{other:.3f}", share(other)))
+        peak = obj.profile.get("peak_memory_bytes")
+        return format_html(
+            '<table style="margin:0;"><thead><tr><th>Фаза</th><th>с</th><th>доля</th></tr></thead>'
+            "<tbody>{}</tbody></table>"
+            "<p>SQL: {} запросов, {} с; пик памяти: {}</p>",
+            format_html_join("", "<tr><td>{}</td><td>{}</td><td>{}</td></tr>", rows),
+            obj.profile.get("sql_count", 0),
+            f"{obj.profile.get('sql_sec', 0.0):.3f}",
+            f"{peak / 2**20:.1f} МиБ" if peak is not None else "не замерялся",
+        )
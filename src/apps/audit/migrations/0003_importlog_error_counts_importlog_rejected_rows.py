@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_remove_importlog_uq_importlog_batch_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='error_counts',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Ошибки по видам'),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='rejected_rows',
+            field=models.FileField(blank=True, upload_to='imports/rejected/%Y/%m/%d/', verbose_name='Отклонённые строки'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_importlog_error_counts_importlog_rejected_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='checkpoint',
+            field=models.JSONField(blank=True, null=True, verbose_name='Контрольная точка'),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='checkpoint_positions',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Принятые позиции на контрольной точке'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_importlog_checkpoint_importlog_checkpoint_positions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='importlog',
+            name='audit_impor_batch_i_e8fcde_idx',
+        ),
+        migrations.AddIndex(
+            model_name='importlog',
+            index=models.Index(fields=['batch', 'file_sha256'], name='audit_impor_batch_i_d8e313_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_importlog_batch_file_sha256_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='status',
+            field=models.GeneratedField(choices=[('ok', 'OK'), ('partial', 'PARTIAL'), ('fail', 'FAIL')], db_persist=True, expression=models.Case(models.When(inserted=0, then=models.Value('fail')), models.When(models.Q(('duplicates_in_db', 0), ('duplicates_in_file', 0), ('inserted', models.F('total')), ('invalid_rows', 0)), then=models.Value('ok')), default=models.Value('partial')), output_field=models.CharField(max_length=8), verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='importlog',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='audit_impor_status_cb0008_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importlog',
+            index=models.Index(fields=['-created_at', '-id'], name='audit_impor_created_394236_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0006_importlog_status_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='profile',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Профиль'),
+        ),
+    ]
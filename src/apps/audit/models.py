@@ -1,12 +1,17 @@
 from decimal import Decimal
 
 from django.db import models
-from django.db.models import Q
+from django.db.models import Case, F, Q, Value, When
 
 from apps.core.models import TimeStampedModel
 
 
 class ImportLog(TimeStampedModel):
+    class Status(models.TextChoices):
+        OK = "ok", "OK"
+        PARTIAL = "partial", "PARTIAL"
+        FAIL = "fail", "FAIL"
+
     batch = models.ForeignKey(
         "inventory.Batch",
         on_delete=models.CASCADE,
@@ -54,11 +59,58 @@ class ImportLog(TimeStampedModel):
         default=list,
         blank=True
     )
+    error_counts = models.JSONField(
+        verbose_name="Ошибки по видам",
+        default=dict,
+        blank=True
+    )
+    # Время по фазам, SQL и пик памяти (apps.inventory.services.import_profile)
+    profile = models.JSONField(
+        verbose_name="Профиль",
+        default=dict,
+        blank=True
+    )
+    rejected_rows = models.FileField(
+        verbose_name="Отклонённые строки",
+        upload_to="imports/rejected/%Y/%m/%d/",
+        blank=True
+    )
+    # Итог импорта по счётчикам: вычисляется PostgreSQL при каждой записи строки и хранится с индексом
+    status = models.GeneratedField(
+        verbose_name="Статус",
+        expression=Case(
+            When(inserted=0, then=Value(Status.FAIL)),
+            When(
+                Q(inserted=F("total"), invalid_rows=0, duplicates_in_file=0, duplicates_in_db=0),
+                then=Value(Status.OK),
+            ),
+            default=Value(Status.PARTIAL),
+        ),
+        output_field=models.CharField(max_length=8),
+        choices=Status.choices,
+        db_persist=True,
+    )
+    # Импорт с фиксацией кусками: где остановились (offset, line, duration_sec); NULL — импорт завершён
+    checkpoint = models.JSONField(
+        verbose_name="Контрольная точка",
+        null=True,
+        blank=True
+    )
+    checkpoint_positions = models.BinaryField(
+        verbose_name="Принятые позиции на контрольной точке",
+        null=True,
+        blank=True
+    )
 
     class Meta:
         indexes = [
-            models.Index(fields=["batch"]),
+            # Проверка «файл уже обработан для партии» — одна проба индекса
+            models.Index(fields=["batch", "file_sha256"]),
             models.Index(fields=["file_sha256"]),
+            # Список в админке: фильтр по статусу и сортировка по времени (ChangeList добавляет -pk),
+            # date_hierarchy — по created_at
+            models.Index(fields=["status", "-created_at", "-id"]),
+            models.Index(fields=["-created_at", "-id"]),
         ]
         constraints = [
             models.CheckConstraint(
@@ -1,3 +1,89 @@
-from django.test import TestCase
+import gzip
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.audit.models import ImportLog
+from apps.inventory.models import Batch
+
+
+class ImportStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(number="B-1")
+
+    def create_log(self, **counters):
+        log = ImportLog.objects.create(batch=self.batch, file_sha256="0" * 64, **counters)
+        log.refresh_from_db()
+        return log
+
+    def test_status_follows_counters(self):
+        self.assertEqual(self.create_log(total=3, inserted=3).status, ImportLog.Status.OK)
+        self.assertEqual(self.create_log(total=3, inserted=2, duplicates_in_db=1).status, ImportLog.Status.PARTIAL)
+        self.assertEqual(self.create_log(total=3, inserted=0, invalid_rows=3).status, ImportLog.Status.FAIL)
+
+    def test_status_is_recomputed_on_update(self):
+        log = self.create_log(total=3, inserted=3)
+        ImportLog.objects.filter(pk=log.pk).update(inserted=0)
+        log.refresh_from_db()
+        self.assertEqual(log.status, ImportLog.Status.FAIL)
+
+
+class ImportLogAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("admin")
+        batch = Batch.objects.create(number="B-1")
+        cls.ok = ImportLog.objects.create(batch=batch, file_name="ok.csv", total=2, inserted=2, profile={"x": 1})
+        cls.failed = ImportLog.objects.create(batch=batch, file_name="failed.csv", total=2, invalid_rows=2)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_filter_by_status(self):
+        url = reverse("admin:audit_importlog_changelist")
+        response = self.client.get(url, {"status": ImportLog.Status.FAIL})
+        self.assertEqual(list(response.context["cl"].result_list), [self.failed])
+        self.assertEqual(len(self.client.get(url).context["cl"].result_list), 2)
+
+    def test_changelist_does_not_read_large_fields(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("admin:audit_importlog_changelist"))
+        selects = [q["sql"] for q in captured.captured_queries if 'FROM "audit_importlog"' in q["sql"]]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn('"audit_importlog"."profile"', sql)
+            self.assertNotIn('"audit_importlog"."checkpoint_positions"', sql)
+
+
+class RejectedRowsDownloadTests(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        batch = Batch.objects.create(number="B-1")
+        self.log = ImportLog.objects.create(batch=batch, total=1, invalid_rows=1)
+        self.data = gzip.compress("line,code,field,value,message\n2,bad_length,length,x,ошибка\n".encode())
+        self.log.rejected_rows.save("rejected.csv.gz", ContentFile(self.data))
+        self.user = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_login(self.user)
+
+    def url(self, log):
+        return reverse("admin:audit_importlog_rejected_rows", args=[log.pk])
+
+    def test_requires_view_permission(self):
+        self.assertEqual(self.client.get(self.url(self.log)).status_code, 403)
+
+    def test_download(self):
+        self.user.user_permissions.add(Permission.objects.get(codename="view_importlog"))
+        response = self.client.get(self.url(self.log))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+
+        empty = ImportLog.objects.create(batch=self.log.batch, total=1, inserted=1)
+        self.assertEqual(self.client.get(self.url(empty)).status_code, 404)
@@ -1,3 +1,28 @@
-from django.shortcuts import render
+from django.http import FileResponse, Http404, HttpResponseForbidden
+from django.shortcuts import get_object_or_404
+from django.views import View
 
-# Create your views here.
+from apps.audit.models import ImportLog
+
+
+class ImportLogRejectedRowsAdminView(View):
+    """Отдаёт gzip-CSV отклонённых строк импорта из админки."""
+
+    admin_site = None
+    permission_codename = "audit.view_importlog"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.has_perm(self.permission_codename):
+            return HttpResponseForbidden("Недостаточно прав для просмотра импорта.")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        log = get_object_or_404(ImportLog, pk=kwargs["object_id"])
+        if not log.rejected_rows:
+            raise Http404("Для этого импорта нет отклонённых строк.")
+        return FileResponse(
+            log.rejected_rows.open("rb"),
+            as_attachment=True,
+            filename=f"rejected_rows_{log.pk}.csv.gz",
+            content_type="application/gzip",
+        )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from apps.catalog.models import CableModel, Drum
+from apps.core.forms import CachedModelChoiceField
 
 
 @admin.register(CableModel)
@@ -11,5 +12,16 @@ class CableModelAdmin(admin.ModelAdmin):
 
 @admin.register(Drum)
 class DrumAdmin(admin.ModelAdmin):
-    list_display = ("code", "cable_model", "initial_length_m", "created_at")
+    list_display = ("code", "cable_model", "initial_length_m", "balance_m", "created_at")
+    list_select_related = ("cable_model", "balance")
     search_fields = ("code",)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "cable_model":
+            kwargs["form_class"] = CachedModelChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    @admin.display(description="Остаток, м", ordering="balance__balance_m")
+    def balance_m(self, obj: Drum):
+        balance = getattr(obj, "balance", None)
+        return balance.balance_m if balance else None
@@ -0,0 +1,205 @@
+"""
+Кэш справочников для импорта: барабаны (с границами модели кабеля) и склады.
+
+Кэш живёт в памяти процесса, ограничен по размеру (LRU) и сбрасывается при сохранении
+или удалении Drum/CableModel/Storage. Сброс рассылается остальным процессам и узлам
+через PostgreSQL NOTIFY; каждый процесс держит фоновый поток с LISTEN. Пока слушатель
+не подключён, записи живут не дольше CATALOG_CACHE_TTL секунд.
+
+Массовые изменения через QuerySet.update() сигналов не вызывают — после них
+нужно вызвать invalidate_catalog() вручную.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "catalog_changed"
+
+
+class DrumLimits(NamedTuple):
+    id: int
+    initial_length_m: Decimal
+    min_length_m: Decimal
+    max_length_m: Decimal
+
+
+class _LRU:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def set(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CatalogCache:
+    """Read-through кэш: code → DrumLimits (или None, если барабана нет) и code → Storage."""
+
+    def __init__(self, *, max_size: int, ttl: float):
+        self.ttl = ttl
+        self._drums = _LRU(max_size)
+        self._storages = _LRU(max_size)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cleared_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._drums.clear()
+            self._storages.clear()
+            self._cleared_at = time.monotonic()
+
+    def _expire(self) -> None:
+        if not _listener_alive() and time.monotonic() - self._cleared_at > self.ttl:
+            self.clear()
+
+    def drums(self, codes) -> dict[str, DrumLimits]:
+        """Барабаны по кодам; отсутствующие в каталоге коды в ответ не попадают."""
+        from apps.catalog.models import Drum
+
+        self._expire()
+        found: dict[str, DrumLimits] = {}
+        missing = []
+        with self._lock:
+            generation = self._generation
+            for code in codes:
+                if code in self._drums:
+                    limits = self._drums.get(code)
+                    if limits is not None:
+                        found[code] = limits
+                else:
+                    missing.append(code)
+        if not missing:
+            return found
+
+        loaded = {
+            code: DrumLimits(drum_id, init_len, min_len, max_len)
+            for drum_id, code, init_len, min_len, max_len in Drum.objects.filter(code__in=missing).values_list(
+                "id", "code", "initial_length_m", "cable_model__min_length_m", "cable_model__max_length_m"
+            )
+        }
+        found.update(loaded)
+        # Если каталог успели изменить во время запроса, прочитанное в кэш не кладём
+        with self._lock:
+            if generation == self._generation:
+                for code in missing:
+                    self._drums.set(code, loaded.get(code))
+        return found
+
+    def storage(self, code: str):
+        """Склад по коду; создаётся, если его ещё нет (как Storage.objects.get_or_create)."""
+        from apps.storage.models import Storage
+
+        self._expire()
+        with self._lock:
+            generation = self._generation
+            obj = self._storages.get(code)
+        if obj is not None:
+            return obj
+        obj, _ = Storage.objects.get_or_create(code=code)
+        with self._lock:
+            if generation == self._generation:
+                self._storages.set(code, obj)
+        return obj
+
+
+_cache: CatalogCache | None = None
+_cache_pid: int | None = None
+_listener: threading.Thread | None = None
+_listener_ready = threading.Event()
+
+
+def get_catalog_cache() -> CatalogCache:
+    global _cache, _cache_pid
+    pid = os.getpid()
+    # После fork (gunicorn --preload, пулы процессов) кэш и поток-слушатель заводятся заново
+    if _cache is None or _cache_pid != pid:
+        _cache = CatalogCache(max_size=settings.CATALOG_CACHE_MAX_SIZE, ttl=settings.CATALOG_CACHE_TTL)
+        _cache_pid = pid
+        _start_listener()
+    return _cache
+
+
+def invalidate_catalog() -> None:
+    """Сбрасывает кэш в этом процессе и, после коммита, во всех остальных."""
+    if _cache is not None and _cache_pid == os.getpid():
+        _cache.clear()
+    transaction.on_commit(_notify)
+
+
+def _notify() -> None:
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, str(os.getpid())])
+
+
+def _listener_alive() -> bool:
+    return _listener is not None and _listener.is_alive() and _listener_ready.is_set()
+
+
+def _start_listener() -> None:
+    global _listener, _listener_ready
+    if not settings.CATALOG_CACHE_LISTEN or connection.vendor != "postgresql":
+        return
+    _listener_ready = threading.Event()
+    _listener = threading.Thread(target=_listen, args=(_listener_ready,), name="catalog-cache-listener", daemon=True)
+    _listener.start()
+
+
+def _listen(ready: threading.Event) -> None:
+    backoff = 1.0
+    while True:
+        wrapper = connections.create_connection("default")
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            raw.autocommit = True
+            raw.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Пока слушателя не было, уведомления могли потеряться
+            if _cache is not None:
+                _cache.clear()
+            ready.set()
+            backoff = 1.0
+            for _ in raw.notifies():
+                if _cache is not None:
+                    _cache.clear()
+        except Exception:
+            logger.warning("Catalog cache listener disconnected, retrying in %.0fs", backoff, exc_info=True)
+        finally:
+            ready.clear()
+            try:
+                wrapper.close()
+            except Exception:
+                pass
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 60.0)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drum',
+            index=models.Index(fields=['created_at', 'id'], name='catalog_dru_created_8b56ff_idx'),
+        ),
+    ]
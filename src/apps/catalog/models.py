@@ -76,6 +76,10 @@ class Drum(TimeStampedModel):
         constraints = [
             models.CheckConstraint(check=Q(initial_length_m__gt=0), name="ck_drum_initial_pos"),
         ]
+        indexes = [
+            # Keyset-пагинация API
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name = "Барабан"
         verbose_name_plural = "Барабаны"
 
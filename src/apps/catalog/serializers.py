@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from apps.catalog.models import CableModel, Drum
+from apps.core.serializers import SparseFieldsMixin
+
+
+class CableModelRefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CableModel
+        fields = ("id", "code", "name", "min_length_m", "max_length_m")
+
+
+class DrumSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    cable_model = CableModelRefSerializer(read_only=True)
+    # Текущий остаток по журналу движений (null — движений не было)
+    balance_m = serializers.DecimalField(source="balance.balance_m", max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Drum
+        fields = ("id", "code", "cable_model", "initial_length_m", "balance_m", "created_at", "updated_at")
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.catalog.cache import invalidate_catalog
+from apps.catalog.models import CableModel, Drum
+from apps.core.reference_cache import invalidate_references
+from apps.storage.models import Storage
+
+
+@receiver(post_save, sender=Drum)
+@receiver(post_delete, sender=Drum)
+@receiver(post_save, sender=CableModel)
+@receiver(post_delete, sender=CableModel)
+@receiver(post_save, sender=Storage)
+@receiver(post_delete, sender=Storage)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=CableModel)
+@receiver(post_delete, sender=CableModel)
+@receiver(post_save, sender=Storage)
+@receiver(post_delete, sender=Storage)
+def reference_changed(sender, **kwargs):
+    invalidate_references(sender)
@@ -1,3 +1,72 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.catalog.cache import CatalogCache, DrumLimits, get_catalog_cache
+from apps.catalog.models import CableModel, Drum
+from apps.storage.models import Storage
+
+
+# Поток LISTEN держит своё соединение с тестовой БД и мешает её удалить
+@override_settings(CATALOG_CACHE_LISTEN=False)
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.model = CableModel.objects.create(code="CM-1", min_length_m=Decimal("1.00"), max_length_m=Decimal("500.00"))
+        cls.drum = Drum.objects.create(code="DRUM-1", cable_model=cls.model, initial_length_m=Decimal("300.00"))
+
+    def setUp(self):
+        self.cache = get_catalog_cache()
+        self.cache.clear()
+
+    def test_drums_are_read_through_once(self):
+        with self.assertNumQueries(1):
+            found = self.cache.drums(["DRUM-1", "DRUM-404"])
+        self.assertEqual(
+            found, {"DRUM-1": DrumLimits(self.drum.id, Decimal("300.00"), Decimal("1.00"), Decimal("500.00"))}
+        )
+        # Отсутствующий код тоже запомнен
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.drums(["DRUM-404", "DRUM-1"]).keys(), {"DRUM-1"})
+
+    def test_saving_drum_or_model_invalidates(self):
+        self.cache.drums(["DRUM-1"])
+        self.model.max_length_m = Decimal("250.00")
+        self.model.save()
+        self.assertEqual(self.cache.drums(["DRUM-1"])["DRUM-1"].max_length_m, Decimal("250.00"))
+
+        Drum.objects.create(code="DRUM-2", cable_model=self.model, initial_length_m=Decimal("10.00"))
+        self.assertIn("DRUM-2", self.cache.drums(["DRUM-2"]))
+
+        self.drum.delete()
+        self.assertEqual(self.cache.drums(["DRUM-1"]), {})
+
+    def test_invalidation_is_broadcast_after_commit(self):
+        with CaptureQueriesContext(connection) as captured, self.captureOnCommitCallbacks(execute=True):
+            self.drum.save()
+        self.assertTrue(any("pg_notify" in q["sql"] for q in captured.captured_queries))
+
+    def test_size_is_bounded(self):
+        cache = CatalogCache(max_size=2, ttl=300)
+        cache.drums(["A", "B"])
+        cache.drums(["A"])
+        cache.drums(["C"])
+        # B вытеснен как самый давний по обращению
+        with self.assertNumQueries(1):
+            cache.drums(["A", "C", "B"])
+
+    def test_entries_expire_without_listener(self):
+        cache = CatalogCache(max_size=10, ttl=0)
+        cache.drums(["DRUM-1"])
+        with self.assertNumQueries(1):
+            cache.drums(["DRUM-1"])
+
+    def test_storage_is_created_and_cached(self):
+        storage = self.cache.storage("S-NEW")
+        self.assertEqual(Storage.objects.get(code="S-NEW"), storage)
+        # Создание склада сбрасывает кэш (сигнал post_save) — в кэш попадает следующее чтение
+        self.assertEqual(self.cache.storage("S-NEW"), storage)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.storage("S-NEW"), storage)
@@ -1,3 +1,11 @@
-from django.shortcuts import render
+from apps.catalog.models import Drum
+from apps.catalog.serializers import DrumSerializer
+from apps.core.views import KeysetReadOnlyViewSet
 
-# Create your views here.
+
+class DrumViewSet(KeysetReadOnlyViewSet):
+    """Барабаны с моделью кабеля."""
+
+    queryset = Drum.objects.all()
+    serializer_class = DrumSerializer
+    related_fields = {"cable_model": "cable_model", "balance_m": "balance"}
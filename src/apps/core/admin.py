@@ -1,3 +1,118 @@
+"""
+Списки админки для больших таблиц.
+
+EstimatedCountPaginator берёт число строк из оценок планировщика PostgreSQL: без фильтров —
+pg_class.reltuples, с фильтрами и поиском — оценку строк из EXPLAIN. Точный COUNT(*) выполняется,
+только если оценка меньше ADMIN_EXACT_COUNT_MAX, — на небольших выборках он дешёвый.
+
+AutocompleteFilter — фильтр по внешнему ключу с поиском (autocomplete) вместо списка всех
+значений в боковой панели. Поиск идёт через стандартный autocomplete-view админки, поэтому
+у админки связанной модели должны быть search_fields.
+
+CachedRelatedFieldListFilter — обычный фильтр по внешнему ключу на справочник (склад, модель
+кабеля), список значений которого берётся из кэша справочников (apps.core.reference_cache).
+"""
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from apps.core.reference_cache import cached_queryset
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimate()
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_MAX:
+            return super().count
+        return estimate
+
+    def _estimate(self) -> int | None:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cur:
+            if not queryset.query.has_filters():
+                cur.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cur.fetchone()
+                # -1 — таблица ещё не анализировалась
+                return row[0] if row and row[0] >= 0 else None
+            sql, params = queryset.order_by().values("pk").query.sql_with_params()
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cur.fetchone()[0]
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """Фильтр по внешнему ключу field_name с выбором значения через поиск."""
+
+    template = "admin/autocomplete_filter.html"
+    field_name = ""
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = self.parameter_name or f"{self.field_name}__id__exact"
+        super().__init__(request, params, model, model_admin)
+        if self.value() is not None and not self.value().isdigit():
+            raise IncorrectLookupParameters(f"Некорректное значение фильтра {self.parameter_name}.")
+        self.field = model._meta.get_field(self.field_name)
+        self.admin_site = model_admin.admin_site
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self) -> bool:
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+    def choices(self, changelist):
+        return ()
+
+    def widget(self) -> str:
+        # Выбранное значение подгружается одним запросом по pk; остальные — поиском по мере ввода
+        field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(
+                self.field,
+                self.admin_site,
+                attrs={"data-width": "100%", "data-autocomplete-filter": self.parameter_name},
+            ),
+        )
+        return field.widget.render(self.parameter_name, self.value())
+
+
+class CachedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    def field_choices(self, field, request, model_admin):
+        queryset = field.remote_field.model._default_manager.complex_filter(field.get_limit_choices_to())
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return [(obj.pk, str(obj)) for obj in cached_queryset(queryset)]
+
+
+class LargeTableAdminMixin:
+    """Список большой таблицы: оценка числа строк вместо COUNT(*) и без второго COUNT по всей таблице."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-# Register your models here.
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(f, type) and issubclass(f, AutocompleteFilter) for f in self.list_filter):
+            # Скрипты select2 и autocomplete.js от виджета; поле виджету для них не нужно
+            media += AutocompleteSelect(None, self.admin_site).media
+        return media
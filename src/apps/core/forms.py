@@ -0,0 +1,34 @@
+from django import forms
+from django.forms.models import ModelChoiceIterator
+
+from apps.core.reference_cache import cached_queryset
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in cached_queryset(self.queryset):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(cached_queryset(self.queryset)) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(cached_queryset(self.queryset))
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Выбор из справочника: список значений и проверка выбора — по выборке из кэша справочников."""
+
+    iterator = CachedModelChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        key = self.to_field_name or "pk"
+        for obj in cached_queryset(self.queryset):
+            if str(getattr(obj, key)) == str(value):
+                return obj
+        # Объект мог появиться после заполнения кэша в этом процессе — проверка запросом
+        return super().to_python(value)
@@ -0,0 +1,326 @@
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.audit.models import ImportLog
+from apps.catalog.models import CableModel, Drum
+from apps.core.query_stats import QueryStats
+from apps.inventory.models import Batch, BatchItem
+from apps.inventory.services.import_from_csv import IMPORT_ENGINES, import_batch_from_csv
+from apps.storage.models import Storage
+
+# Доли строк с ошибками каждого вида; остальные строки — корректные
+ERROR_MIXES = {
+    "clean": {},
+    "mixed": {"invalid_length": 0.02, "missing_position": 0.01, "unknown_drum": 0.01, "duplicate_position": 0.01},
+    "heavy": {"invalid_length": 0.10, "missing_position": 0.05, "unknown_drum": 0.10, "duplicate_position": 0.05},
+}
+BAD_LENGTHS = ("0", "-5", "abc", "5000", "12,5")
+
+BENCH_STORAGE = "BENCH"
+BENCH_CABLE_MODEL = "BENCH"
+BENCH_DRUMS = 500
+BENCH_DRUM_LENGTH = Decimal("1000.00")
+
+# Рост пиковой памяти меньше этого не считается регрессией — шум аллокатора
+MEMORY_NOISE_MB = 5.0
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    engine: str
+    rows: int
+    mix: str
+    prefill: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.engine}-{self.rows}-{self.mix}-p{round(self.prefill * 100)}"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    engine: str
+    rows: int
+    mix: str
+    prefill: float
+    wall_sec: float = 0.0
+    rows_per_sec: float = 0.0
+    queries: int = 0
+    sql_sec: float = 0.0
+    peak_rss_mb: float = 0.0
+    inserted: int = 0
+    duplicates_in_file: int = 0
+    duplicates_in_db: int = 0
+    invalid_rows: int = 0
+    error: str = ""
+    # Время по фазам из ImportLog.profile — где именно изменилось время при регрессии
+    phases: dict = field(default_factory=dict)
+
+
+def _parse_rows(value: str) -> int:
+    value = value.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * factor)
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def generate_file(path: Path, *, rows: int, mix: str, seed: int) -> None:
+    """CSV из rows строк с заданной долей ошибок; при одном seed — побайтно одинаковый."""
+    rng = random.Random(seed)
+    thresholds = []
+    acc = 0.0
+    for kind, share in ERROR_MIXES[mix].items():
+        acc += share
+        thresholds.append((acc, kind))
+
+    tmp = path.with_suffix(".part")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+        f.write("position,drum_code,length\n")
+        for pos in range(1, rows + 1):
+            kind = ""
+            r = rng.random()
+            for limit, name in thresholds:
+                if r < limit:
+                    kind = name
+                    break
+            position = str(pos)
+            drum = f"BENCH-{rng.randrange(BENCH_DRUMS) + 1:04d}"
+            length = f"{rng.randint(100, 99_900) / 100:.2f}"
+            if kind == "invalid_length":
+                length = rng.choice(BAD_LENGTHS)
+            elif kind == "missing_position":
+                position = ""
+            elif kind == "unknown_drum":
+                drum = f"NOPE-{pos}"
+            elif kind == "duplicate_position" and pos > 1:
+                position = str(pos - 1)
+            f.write(f"{position},{drum},{length}\n")
+    os.replace(tmp, path)
+
+
+def _ensure_catalog() -> None:
+    Storage.objects.get_or_create(code=BENCH_STORAGE, defaults={"name": "Склад для замеров"})
+    cable_model, _ = CableModel.objects.get_or_create(
+        code=BENCH_CABLE_MODEL,
+        defaults={"name": "Модель для замеров", "min_length_m": Decimal("1.00"), "max_length_m": BENCH_DRUM_LENGTH},
+    )
+    Drum.objects.bulk_create(
+        [
+            Drum(code=f"BENCH-{i:04d}", cable_model=cable_model, initial_length_m=BENCH_DRUM_LENGTH)
+            for i in range(1, BENCH_DRUMS + 1)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _prepare_batch(number: str, *, rows: int, prefill: float) -> None:
+    """Партия, в которой заранее заняты позиции (доля prefill) — они станут дублями в БД."""
+    batch = Batch.objects.create(number=number)
+    percent = round(prefill * 100)
+    if not percent:
+        return
+    storage_id = Storage.objects.get(code=BENCH_STORAGE).pk
+    drum_ids = list(Drum.objects.filter(code__startswith="BENCH-").order_by("pk").values_list("pk", flat=True))
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {BatchItem._meta.db_table}
+                (created_at, updated_at, batch_id, drum_id, storage_location_id, number_in_batch, length_m)
+            SELECT %(now)s, %(now)s, %(batch_id)s, (%(drum_ids)s::bigint[])[1 + g %% %(drums)s], %(storage_id)s, g, 1.00
+            FROM generate_series(1, %(rows)s) AS g
+            WHERE g %% 100 < %(percent)s
+            """,
+            {
+                "now": timezone.now(),
+                "batch_id": batch.pk,
+                "drum_ids": drum_ids,
+                "drums": len(drum_ids),
+                "storage_id": storage_id,
+                "rows": rows,
+                "percent": percent,
+            },
+        )
+        cur.execute(f"ANALYZE {BatchItem._meta.db_table}")
+
+
+def _run_case(case: BenchCase, path: str, batch_number: str) -> BenchResult:
+    """Один замер в отдельном процессе: пиковая память — прирост RSS именно этого импорта."""
+    result = BenchResult(name=case.name, **asdict(case))
+    try:
+        rss_start = _rss_kb()
+        with QueryStats() as queries:
+            t0 = time.perf_counter()
+            try:
+                res = import_batch_from_csv(
+                    file=path,
+                    file_name=os.path.basename(path),
+                    batch_number=batch_number,
+                    storage=BENCH_STORAGE,
+                    engine=case.engine,
+                )
+            except Exception as e:
+                result.error = str(e)
+                return result
+            result.wall_sec = time.perf_counter() - t0
+        result.peak_rss_mb = max(0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_start) / 1024
+        result.queries = queries.count
+        result.sql_sec = queries.seconds
+        result.rows_per_sec = case.rows / result.wall_sec if result.wall_sec else 0.0
+        result.inserted = res.inserted
+        result.duplicates_in_file = res.duplicates_in_file
+        result.duplicates_in_db = res.duplicates_in_db
+        result.invalid_rows = res.invalid_rows
+        result.error = res.rejection
+        log = ImportLog.objects.filter(batch__number=batch_number).only("profile").latest("pk")
+        result.phases = log.profile.get("phases", {})
+    finally:
+        connections.close_all()
+    return result
+
+
+def compare(results: list[BenchResult], baseline: dict, *, tolerance: float) -> list[str]:
+    """Регрессии относительно базовой линии: время и память — с допуском, число запросов — без."""
+    base_cases = {c["name"]: c for c in baseline.get("cases", [])}
+    regressions = []
+    for r in results:
+        base = base_cases.get(r.name)
+        if base is None or r.error or base.get("error"):
+            continue
+        if r.wall_sec > base["wall_sec"] * (1 + tolerance):
+            regressions.append(f"{r.name}: время {r.wall_sec:.2f} с против {base['wall_sec']:.2f} с")
+        if r.queries > base["queries"]:
+            regressions.append(f"{r.name}: SQL-запросов {r.queries} против {base['queries']}")
+        if r.peak_rss_mb > base["peak_rss_mb"] * (1 + tolerance) + MEMORY_NOISE_MB:
+            regressions.append(f"{r.name}: пик памяти {r.peak_rss_mb:.1f} МБ против {base['peak_rss_mb']:.1f} МБ")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеры импорта CSV на сгенерированных файлах: время, строк/с, число SQL-запросов и пик памяти для каждого "
+        "сочетания размера файла, доли ошибок и заполненности партии. Работает в отдельной базе bench_<имя БД>, "
+        "пишет результаты в JSON и сравнивает их с базовой линией."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="10k,100k", help="Размеры файлов через запятую: 10k,100k,1m,10m.")
+        parser.add_argument(
+            "--mixes", default="clean,mixed", help=f"Доли ошибок через запятую: {', '.join(ERROR_MIXES)}.",
+        )
+        parser.add_argument(
+            "--prefill", default="0,0.5", help="Доли позиций, уже занятых в партии до импорта, через запятую.",
+        )
+        parser.add_argument(
+            "--engine", action="append", choices=IMPORT_ENGINES,
+            help=f"Движок импорта (можно несколько раз); по умолчанию {settings.CSV_IMPORT_ENGINE}.",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Повторов каждого замера; в итог идёт лучший.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--data-dir", default=str(settings.BASE_DIR / "var" / "bench"),
+            help="Каталог сгенерированных файлов (переиспользуются между запусками).",
+        )
+        parser.add_argument("--output", "-o", help="JSON с результатами (по умолчанию <data-dir>/results-<время>.json).")
+        parser.add_argument("--baseline", help="JSON прошлого запуска: регрессия — ошибка команды.")
+        parser.add_argument("--tolerance", type=float, default=0.15, help="Допуск по времени и памяти (доля).")
+        parser.add_argument("--keepdb", action="store_true", help="Не удалять базу замеров после запуска.")
+
+    def handle(self, *args, **options):
+        try:
+            cases = [
+                BenchCase(engine, _parse_rows(rows), mix.strip(), float(prefill))
+                for engine in options["engine"] or [settings.CSV_IMPORT_ENGINE]
+                for rows in options["rows"].split(",")
+                for mix in options["mixes"].split(",")
+                for prefill in options["prefill"].split(",")
+            ]
+        except ValueError as e:
+            raise CommandError(f"Некорректные параметры замеров: {e}")
+        if unknown := {c.mix for c in cases} - ERROR_MIXES.keys():
+            raise CommandError(f"Неизвестные доли ошибок: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text(encoding="utf-8"))
+
+        data_dir = Path(options["data_dir"])
+        files = {}
+        for rows, mix in sorted({(c.rows, c.mix) for c in cases}):
+            path = data_dir / f"bench-{rows}-{mix}-s{options['seed']}.csv"
+            if not path.exists():
+                self.stdout.write(f"→ Генерация {path.name}")
+                generate_file(path, rows=rows, mix=mix, seed=options["seed"])
+            files[rows, mix] = path
+
+        old_name = connection.settings_dict["NAME"]
+        connection.settings_dict["TEST"]["NAME"] = f"bench_{old_name}"
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"])
+        try:
+            _ensure_catalog()
+            results = [self._measure(case, files[case.rows, case.mix], options["repeat"]) for case in cases]
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        output = Path(options["output"] or data_dir / f"results-{timezone.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "seed": options["seed"],
+            "cases": [asdict(r) for r in results],
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        self.stdout.write(f"→ Результаты: {output}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, tolerance=options["tolerance"])
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(f"✗ {line}")
+                raise CommandError(f"Регрессий относительно {options['baseline']}: {len(regressions)}")
+            self.stdout.write(self.style.SUCCESS(f"✓ Регрессий относительно {options['baseline']} нет"))
+
+    def _measure(self, case: BenchCase, path: Path, repeat: int) -> BenchResult:
+        best = None
+        for attempt in range(max(1, repeat)):
+            batch_number = f"BENCH-{case.name}-{time.time_ns()}"
+            _prepare_batch(batch_number, rows=case.rows, prefill=case.prefill)
+            # fork после закрытия соединений: у каждого замера свой процесс и своё соединение
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as pool:
+                result = pool.submit(_run_case, case, str(path), batch_number).result()
+            if best is None or (not result.error and (best.error or result.wall_sec < best.wall_sec)):
+                best = result
+        self._write_result(best)
+        return best
+
+    def _write_result(self, r: BenchResult) -> None:
+        if r.error and not r.wall_sec:
+            self.stdout.write(self.style.ERROR(f"✗ {r.name}: {r.error}"))
+            return
+        line = (
+            f"{r.name}: {r.wall_sec:.2f} с, {r.rows_per_sec:.0f} строк/с, SQL {r.queries} за {r.sql_sec:.2f} с, "
+            f"пик памяти {r.peak_rss_mb:.1f} МБ — вставлено {r.inserted}, дублей в файле {r.duplicates_in_file}, "
+            f"в БД {r.duplicates_in_db}, с ошибками {r.invalid_rows}"
+        )
+        self.stdout.write(self.style.WARNING(f"! {line} ({r.error})") if r.error else f"✓ {line}")
@@ -0,0 +1,58 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from apps.core.query_budget import get_budget
+from apps.core.testing import assert_changelist_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Открывает списки всех моделей админки от временного суперпользователя и проверяет, что число "
+        "SQL-запросов укладывается в бюджет и не растёт с числом строк на странице (запрос на строку). "
+        "Всё, что записано за проверку, откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=None,
+            help="Допустимо запросов на страницу (по умолчанию — бюджет SQL_BUDGETS['request']).",
+        )
+        parser.add_argument("--per-page", type=int, default=100, help="Строк на полной странице.")
+        parser.add_argument("--model", action="append", default=[], help="Только эти модели: app_label.model.")
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        if limit is None:
+            budget = get_budget("request")
+            if budget is None or budget.queries is None:
+                raise CommandError("Нет бюджета SQL_BUDGETS['request'] — задайте --limit.")
+            limit = budget.queries
+        only = {label.lower() for label in options["model"]}
+        models = [m for m in admin.site._registry if not only or m._meta.label_lower in only]
+        if not models:
+            raise CommandError("Нет подходящих моделей в админке.")
+
+        failures = []
+        # Пользователь и сессия нужны только на время проверки
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            user = get_user_model().objects.create_superuser(username="__check_admin_queries__", password=None)
+            client = Client()
+            client.force_login(user)
+            for model in sorted(models, key=lambda m: m._meta.label_lower):
+                label = model._meta.label
+                try:
+                    count = assert_changelist_queries(client, model, limit=limit, per_page=options["per_page"])
+                except AssertionError as e:
+                    failures.append(label)
+                    self.stderr.write(self.style.ERROR(f"✗ {e}"))
+                else:
+                    self.stdout.write(f"✓ {label}: {count} SQL-запросов")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Превышение бюджета или запросы на строку: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"✓ Списки укладываются в {limit} SQL-запросов"))
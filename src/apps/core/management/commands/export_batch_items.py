@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.models import BatchItem
+from apps.inventory.services.export import EXPORT_FORMATS, iter_export
+from apps.storage.models import Storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает позиции партий в CSV или NDJSON потоком (серверный курсор, память не зависит от объёма). "
+        "Без фильтров — все позиции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", action="append", default=[], help="Номер партии (можно несколько раз).")
+        parser.add_argument("--storage", help="Код склада.")
+        parser.add_argument("--format", dest="export_format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="Файл выгрузки (по умолчанию stdout).")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Строк за одну выборку курсора.")
+
+    def handle(self, *args, **options):
+        queryset = BatchItem.objects.all()
+        if options["batch"]:
+            queryset = queryset.filter(batch__number__in=options["batch"])
+        if options["storage"]:
+            storage = Storage.objects.filter(code=options["storage"].strip().upper()).first()
+            if storage is None:
+                raise CommandError(f"Склад '{options['storage']}' не найден.")
+            queryset = queryset.filter(storage_location=storage)
+
+        chunks = iter_export(queryset, options["export_format"], chunk_size=options["chunk_size"])
+        if not options["output"]:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        t0 = time.perf_counter()
+        size = 0
+        with open(options["output"], "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Выгружено в {options['output']}: {size / 1024 / 1024:.1f} МБ за {time.perf_counter() - t0:.1f} с"
+        ))
@@ -0,0 +1,199 @@
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.inventory.services.csv_rows import norm_code
+from apps.inventory.services.import_from_csv import IMPORT_ENGINES, import_batch_from_csv
+from apps.inventory.services.upload_store import stored_path, store_upload
+from apps.storage.models import Storage
+
+
+@dataclass(frozen=True)
+class FileTask:
+    path: str
+    file_name: str
+    batch_number: str
+    storage_code: str
+    # Известна для файла из stdin: он сначала сохраняется в хранилище загрузок
+    file_sha: str | None = None
+
+
+@dataclass(frozen=True)
+class FileSummary:
+    file_name: str
+    batch_number: str
+    seconds: float
+    total: int = 0
+    inserted: int = 0
+    duplicates_in_file: int = 0
+    duplicates_in_db: int = 0
+    invalid_rows: int = 0
+    error: str = ""
+
+
+def _import_group(tasks: list[FileTask], options: dict) -> list[FileSummary]:
+    """Файлы одной партии — по очереди в одном процессе: параллельные импорты в партию мешали бы друг другу."""
+    summaries = []
+    try:
+        for task in tasks:
+            t0 = time.perf_counter()
+            try:
+                res = import_batch_from_csv(
+                    file=task.path,
+                    file_name=task.file_name,
+                    file_sha=task.file_sha,
+                    batch_number=task.batch_number,
+                    storage=task.storage_code,
+                    engine=options["engine"],
+                    commit_rows=options["commit_rows"],
+                    dry_run=options["dry_run"],
+                )
+            except Exception as e:
+                summaries.append(FileSummary(task.file_name, task.batch_number, time.perf_counter() - t0, error=str(e)))
+                continue
+            summaries.append(FileSummary(
+                task.file_name,
+                task.batch_number,
+                time.perf_counter() - t0,
+                total=res.total,
+                inserted=res.inserted,
+                duplicates_in_file=res.duplicates_in_file,
+                duplicates_in_db=res.duplicates_in_db,
+                invalid_rows=res.invalid_rows,
+                error=res.rejection,
+            ))
+    finally:
+        connections.close_all()
+    return summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует много CSV-файлов в партии: пути к файлам, каталоги (*.csv) или «-» для чтения CSV из stdin. "
+        "Файлы разных партий обрабатываются параллельно в пуле процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="CSV-файлы, каталоги с *.csv или «-» (stdin).")
+        parser.add_argument(
+            "--batch", default="{stem}",
+            help="Номер партии; подстановки {stem} (имя файла без расширения), {name}, {parent}. По умолчанию {stem}.",
+        )
+        parser.add_argument("--storage", help="Код склада для всех файлов.")
+        parser.add_argument(
+            "--map", dest="mapping",
+            help="CSV с колонками file,batch[,storage]: партия и склад для каждого файла (пути — от каталога CSV).",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Число процессов.")
+        parser.add_argument("--engine", choices=IMPORT_ENGINES, default=settings.CSV_IMPORT_ENGINE)
+        parser.add_argument(
+            "--commit-rows", type=int, default=settings.CSV_IMPORT_COMMIT_ROWS,
+            help="Фиксация каждые N строк с продолжением после сбоя (0 — одна транзакция на файл).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Только проверить файлы, ничего не записывая.")
+
+    def handle(self, *args, **options):
+        tasks = self._collect_tasks(options)
+        if not tasks:
+            raise CommandError("Не найдено ни одного CSV-файла.")
+
+        # Код склада нормализуется так же, как при импорте
+        codes = {norm_code(t.storage_code) for t in tasks}
+        known = set(Storage.objects.filter(code__in=codes).values_list("code", flat=True))
+        if unknown := codes - known:
+            raise CommandError(f"Неизвестные склады: {', '.join(sorted(unknown))}")
+
+        groups: dict[str, list[FileTask]] = {}
+        for task in tasks:
+            groups.setdefault(task.batch_number, []).append(task)
+        workers = max(1, min(options["workers"], len(groups)))
+        self.stdout.write(f"→ Файлов: {len(tasks)}, партий: {len(groups)}, процессов: {workers}")
+
+        t0 = time.perf_counter()
+        summaries: list[FileSummary] = []
+        # fork: дочерним процессам не нужно заново настраивать Django; соединения родителя им не передаются
+        connections.close_all()
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            import_options = {k: options[k] for k in ("engine", "commit_rows", "dry_run")}
+            futures = [pool.submit(_import_group, group, import_options) for group in groups.values()]
+            for future in as_completed(futures):
+                for s in future.result():
+                    summaries.append(s)
+                    self._write_summary(s)
+        elapsed = time.perf_counter() - t0
+
+        rows = sum(s.total for s in summaries)
+        failed = [s for s in summaries if s.error]
+        self.stdout.write(
+            f"→ Итого: файлов {len(summaries)}, строк {rows}, вставлено {sum(s.inserted for s in summaries)}, "
+            f"с ошибкой {len(failed)} за {elapsed:.1f} с — "
+            f"{rows / elapsed if elapsed else 0:.0f} строк/с, {len(summaries) / elapsed if elapsed else 0:.2f} файлов/с"
+        )
+        if failed:
+            raise CommandError(f"Не импортировано файлов: {len(failed)}")
+
+    def _write_summary(self, s: FileSummary) -> None:
+        if s.error:
+            self.stdout.write(self.style.ERROR(f"  ✗ {s.file_name} → {s.batch_number}: {s.error}"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"  ✓ {s.file_name} → {s.batch_number}: всего={s.total}, вставлено={s.inserted}, "
+            f"дубли_в_файле={s.duplicates_in_file}, дубли_в_БД={s.duplicates_in_db}, "
+            f"некорректных={s.invalid_rows}, {s.seconds:.2f} с"
+        ))
+
+    def _collect_tasks(self, options) -> list[FileTask]:
+        batch_template = options["batch"]
+        storage = options["storage"]
+        tasks = []
+
+        if options["mapping"]:
+            base = Path(options["mapping"]).resolve().parent
+            with open(options["mapping"], newline="", encoding="utf-8-sig") as f:
+                for n, row in enumerate(csv.DictReader(f), start=2):
+                    path = base / (row.get("file") or "").strip()
+                    row_storage = (row.get("storage") or "").strip() or storage
+                    if not path.is_file():
+                        raise CommandError(f"{options['mapping']}, строка {n}: файл не найден: {path}")
+                    if not row_storage:
+                        raise CommandError(f"{options['mapping']}, строка {n}: не задан склад (колонка storage или --storage)")
+                    batch = (row.get("batch") or "").strip() or self._batch_number(batch_template, path)
+                    tasks.append(FileTask(str(path), path.name, batch, row_storage))
+
+        for arg in options["paths"]:
+            if not storage:
+                raise CommandError("Не задан склад: --storage или колонка storage в --map.")
+            if arg == "-":
+                # stdin читается один раз — сначала в хранилище загрузок, оттуда обрабатывается как обычный файл
+                if "{" in batch_template:
+                    raise CommandError("Для CSV из stdin укажите номер партии: --batch.")
+                stored = store_upload(sys.stdin.buffer)
+                tasks.append(FileTask(str(stored_path(stored.sha256)), "stdin", batch_template, storage, stored.sha256))
+                continue
+            path = Path(arg)
+            if path.is_dir():
+                files = sorted(p for p in path.iterdir() if p.suffix.lower() == ".csv" and p.is_file())
+            elif path.is_file():
+                files = [path]
+            else:
+                raise CommandError(f"Файл или каталог не найден: {arg}")
+            for p in files:
+                tasks.append(FileTask(str(p), p.name, self._batch_number(batch_template, p), storage))
+        return tasks
+
+    @staticmethod
+    def _batch_number(template: str, path: Path) -> str:
+        try:
+            return template.format(stem=path.stem, name=path.name, parent=path.resolve().parent.name)
+        except (KeyError, IndexError, ValueError):
+            raise CommandError(f"Некорректный шаблон номера партии: {template}")
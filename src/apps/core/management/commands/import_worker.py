@@ -0,0 +1,56 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.inventory.services.import_jobs import run_worker
+
+_stop = multiprocessing.Event()
+
+
+def _handle_stop(signum, frame):
+    _stop.set()
+
+
+def _worker_main(poll_interval: float, once: bool) -> None:
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+    try:
+        run_worker(poll_interval=poll_interval, once=once, should_stop=_stop.is_set)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Запускает обработчики очереди импорта CSV (ImportJob). Задачи разбираются через FOR UPDATE SKIP LOCKED."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Число процессов-обработчиков.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Пауза между опросами пустой очереди, с.")
+        parser.add_argument("--once", action="store_true", help="Разобрать очередь и завершиться.")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        poll_interval = options["poll_interval"]
+        once = options["once"]
+
+        signal.signal(signal.SIGTERM, _handle_stop)
+        signal.signal(signal.SIGINT, _handle_stop)
+
+        self.stdout.write(f"→ Обработчиков импорта: {processes}")
+        if processes == 1:
+            _worker_main(poll_interval, once)
+            return
+
+        # Дочерние процессы не должны наследовать открытые соединения родителя
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_worker_main, args=(poll_interval, once), daemon=False)
+            for _ in range(processes)
+        ]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        self.stdout.write(self.style.SUCCESS("Готово."))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services.upload_store import PURGE_GRACE, purge_unreferenced
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет из хранилища загрузок файлы, на которые не ссылаются задачи и журналы импорта, "
+        "и брошенные временные файлы. Запускается по расписанию (например, раз в сутки)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=float, default=PURGE_GRACE.total_seconds() / 3600,
+            help="Не трогать файлы моложе стольких часов.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, сколько будет удалено.")
+
+    def handle(self, *args, **options):
+        removed, freed = purge_unreferenced(
+            older_than=timedelta(hours=options["older_than"]), dry_run=options["dry_run"],
+        )
+        verb = "Будет удалено" if options["dry_run"] else "Удалено"
+        self.stdout.write(self.style.SUCCESS(f"✓ {verb} файлов: {removed}, {freed / 1024 / 1024:.1f} МиБ"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает сводки остатков (склад × модель кабеля, партии) по всем позициям. "
+        "Нужен после изменения позиций в обход импорта; импорты на время пересчёта ждут."
+    )
+
+    def handle(self, *args, **options):
+        t0 = time.perf_counter()
+        stock_rows, batch_rows = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Сводки пересчитаны: склад × модель — {stock_rows}, партий — {batch_rows} "
+            f"за {time.perf_counter() - t0:.1f} с"
+        ))
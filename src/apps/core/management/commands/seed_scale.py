@@ -0,0 +1,291 @@
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.catalog.cache import invalidate_catalog
+from apps.catalog.models import CableModel, Drum
+from apps.core.reference_cache import invalidate_references
+from apps.inventory.models import Batch, BatchItem, BatchSummary, DrumBalance, DrumMovement, StockSummary
+from apps.storage.models import Storage
+
+# Волоконность и типовая максимальная длина строительной длины кабеля, м
+FIBER_COUNTS = (2, 4, 8, 12, 16, 24, 32, 48, 64, 96, 144)
+MAX_LENGTHS = (300, 500, 700, 900, 1200, 2000, 4000, 6000)
+MIN_LENGTH_M = 10
+# Популярность моделей и складов убывает по Ципфу: несколько моделей и складов — бо́льшая часть барабанов и партий
+ZIPF_EXPONENT = 1.1
+# Размер партии — логнормальный вокруг --batch-items
+BATCH_SIZE_SIGMA = 0.8
+# Барабаны и партии появляются в течение этого срока до запуска
+HISTORY = timedelta(days=365)
+COPY_CHUNK_ROWS = 500_000
+
+
+def _parse_count(value: str) -> int:
+    value = value.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * factor)
+
+
+def _zipf_weights(n: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** ZIPF_EXPONENT
+    return weights / weights.sum()
+
+
+def _timestamps(rng: np.random.Generator, size: int, *, now) -> np.ndarray:
+    """Моменты создания за HISTORY до now — строками для COPY (UTC)."""
+    seconds = rng.integers(0, int(HISTORY.total_seconds()), size)
+    stamps = np.datetime64(now.replace(tzinfo=None), "s") - seconds.astype("timedelta64[s]")
+    return np.char.add(np.datetime_as_string(stamps, unit="s"), "+00")
+
+
+def _cents(values: np.ndarray) -> list[str]:
+    return [f"{c // 100}.{c % 100:02d}" for c in values.tolist()]
+
+
+def _reserve_ids(cur, table: str, count: int) -> int:
+    """
+    Первый из count подряд идущих id таблицы: последовательность сдвигается сразу на count.
+    Таблица до конца транзакции закрыта для вставок, поэтому чужие строки в этот диапазон не попадут.
+    """
+    cur.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+    cur.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [table])
+    start = cur.fetchone()[0]
+    cur.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, start + count - 1])
+    return start
+
+
+@contextmanager
+def _foreign_keys_deferred_to_end(cur, tables: list[str]):
+    """
+    Внешние ключи таблиц снимаются на время загрузки и создаются заново: проверка при создании —
+    один проход по таблице, а не срабатывание триггера на каждую строку при коммите.
+    Всё в транзакции загрузки — при ошибке ключи остаются как были.
+    """
+    cur.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+        """,
+        [tables],
+    )
+    constraints = cur.fetchall()
+    for table, name, _ in constraints:
+        cur.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    yield
+    for table, name, definition in constraints:
+        cur.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+
+def _copy_lines(cur, table: str, columns: tuple[str, ...], lines: list[str]) -> None:
+    with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        copy.write("\n".join(lines) + "\n")
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует каталог и заполненные партии для нагрузочных замеров: склады, модели кабеля, барабаны и "
+        "позиции партий с правдоподобными распределениями из фиксированного seed. Склады и модели — bulk_create, "
+        "барабаны, партии и позиции — COPY без save() и full_clean; затем движения прихода, остатки барабанов и "
+        "сводки. Всё в одной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--storages", default="20", help="Число складов.")
+        parser.add_argument("--cable-models", default="40", help="Число моделей кабеля.")
+        parser.add_argument("--drums", default="100k", help="Число барабанов: 100k, 10m.")
+        parser.add_argument("--batches", default="200", help="Число заполненных партий (0 — только каталог).")
+        parser.add_argument("--batch-items", default="500", help="Средний размер партии, позиций.")
+        parser.add_argument("--seed", type=int, default=20241017, help="Seed генератора — те же данные при повторе.")
+        parser.add_argument("--prefix", default="SEED", help="Префикс кодов складов, моделей, барабанов и партий.")
+
+    def handle(self, *args, **options):
+        counts = {
+            name: _parse_count(options[name])
+            for name in ("storages", "cable_models", "drums", "batches", "batch_items")
+        }
+        if min(counts["storages"], counts["cable_models"], counts["drums"]) < 1:
+            raise CommandError("Нужны хотя бы один склад, модель кабеля и барабан.")
+        prefix = options["prefix"].strip().upper()
+        if Storage.objects.filter(code__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Данные с префиксом {prefix} уже есть — задайте другой --prefix.")
+
+        rng = np.random.default_rng(options["seed"])
+        now = timezone.now()
+        t0 = time.perf_counter()
+        bulk_tables = [model._meta.db_table for model in (Drum, BatchItem, DrumMovement)]
+        with transaction.atomic(), connection.cursor() as cur:
+            storage_ids = self._seed_storages(counts["storages"], prefix=prefix)
+            model_ids, max_cents = self._seed_cable_models(rng, counts["cable_models"], prefix=prefix)
+            with _foreign_keys_deferred_to_end(cur, bulk_tables):
+                drum_start, drum_cents = self._seed_drums(
+                    cur, rng, counts["drums"], model_ids, max_cents, prefix=prefix, now=now
+                )
+                if counts["batches"]:
+                    self._seed_batches(
+                        cur, rng, counts["batches"], counts["batch_items"], storage_ids, drum_start, drum_cents,
+                        prefix=prefix, now=now,
+                    )
+                self.stdout.write("→ Проверка внешних ключей")
+            # Справочники изменены в обход save() — сигналы не сработали
+            invalidate_references(Storage)
+            invalidate_references(CableModel)
+            invalidate_catalog()
+
+        # Оценки планировщика (списки админки, планы запросов) — по новым объёмам
+        with connection.cursor() as cur:
+            for model in (Storage, CableModel, Drum, Batch, BatchItem, DrumMovement, DrumBalance, StockSummary):
+                cur.execute(f"ANALYZE {model._meta.db_table}")
+        self.stdout.write(self.style.SUCCESS(f"✓ Готово за {time.perf_counter() - t0:.1f} с"))
+
+    def _seed_storages(self, count: int, *, prefix: str) -> np.ndarray:
+        storages = Storage.objects.bulk_create(
+            Storage(code=f"{prefix}-S{i:04d}", name=f"Склад {i}") for i in range(1, count + 1)
+        )
+        self.stdout.write(f"→ Складов: {count}")
+        return np.array([s.pk for s in storages])
+
+    def _seed_cable_models(self, rng, count: int, *, prefix: str) -> tuple[np.ndarray, np.ndarray]:
+        """Модели bulk_create; возвращает их id и максимальные длины в сантиметрах."""
+        fibers = rng.choice(FIBER_COUNTS, count)
+        max_lengths = rng.choice(MAX_LENGTHS, count)
+        created = CableModel.objects.bulk_create(
+            CableModel(
+                code=f"{prefix}-CM{i:04d}",
+                name=f"Оптика {fibers[i - 1]}F",
+                min_length_m=Decimal(MIN_LENGTH_M),
+                max_length_m=Decimal(int(max_lengths[i - 1])),
+            )
+            for i in range(1, count + 1)
+        )
+        self.stdout.write(f"→ Моделей кабеля: {count}")
+        return np.array([m.pk for m in created]), max_lengths.astype(np.int64) * 100
+
+    def _seed_drums(
+        self, cur, rng, count: int, model_ids: np.ndarray, max_cents: np.ndarray, *, prefix: str, now,
+    ) -> tuple[int, np.ndarray]:
+        """Барабаны COPY с заранее выделенными id; возвращает первый id и первичные длины в сантиметрах."""
+        table = Drum._meta.db_table
+        start = _reserve_ids(cur, table, count)
+        drum_model = rng.choice(len(model_ids), count, p=_zipf_weights(len(model_ids)))
+        # Намотано 30–100% максимальной длины модели, с шагом 10 м
+        fill = rng.uniform(0.3, 1.0, count)
+        cents = np.round(max_cents[drum_model] * fill / 1000).astype(np.int64) * 1000
+        cents = np.clip(cents, MIN_LENGTH_M * 100, max_cents[drum_model])
+
+        columns = ("id", "created_at", "updated_at", "code", "cable_model_id", "initial_length_m")
+        for offset in range(0, count, COPY_CHUNK_ROWS):
+            end = min(offset + COPY_CHUNK_ROWS, count)
+            stamps = _timestamps(rng, end - offset, now=now).tolist()
+            chunk_models = model_ids[drum_model[offset:end]].tolist()
+            lengths = _cents(cents[offset:end])
+            _copy_lines(cur, table, columns, [
+                f"{start + i}\t{stamp}\t{stamp}\t{prefix}-D{i + 1:08d}\t{model_id}\t{length}"
+                for i, stamp, model_id, length in zip(range(offset, end), stamps, chunk_models, lengths)
+            ])
+            self.stdout.write(f"→ Барабанов: {end}/{count}")
+        return start, cents
+
+    def _seed_batches(
+        self, cur, rng, count: int, mean_items: int, storage_ids: np.ndarray, drum_start: int,
+        drum_cents: np.ndarray, *, prefix: str, now,
+    ) -> None:
+        """Партии и позиции COPY; приходы на барабаны, остатки и сводки — как после импорта этих партий."""
+        batch_table = Batch._meta.db_table
+        item_table = BatchItem._meta.db_table
+        batch_start = _reserve_ids(cur, batch_table, count)
+        stamps = _timestamps(rng, count, now=now)
+        sizes = np.clip(
+            rng.lognormal(np.log(max(mean_items, 1)), BATCH_SIZE_SIGMA, count).astype(np.int64), 1, None
+        )
+        batch_storage = storage_ids[rng.choice(len(storage_ids), count, p=_zipf_weights(len(storage_ids)))]
+        _copy_lines(cur, batch_table, ("id", "created_at", "updated_at", "number"), [
+            f"{batch_start + i}\t{stamp}\t{stamp}\t{prefix}-B{i + 1:06d}" for i, stamp in enumerate(stamps.tolist())
+        ])
+        self.stdout.write(f"→ Партий: {count}")
+
+        columns = (
+            "created_at", "updated_at", "batch_id", "drum_id", "storage_location_id", "number_in_batch", "length_m",
+        )
+        total = int(sizes.sum())
+        written = 0
+        first = 0
+        while first < count:
+            # Партии целиком, пока не набрано COPY_CHUNK_ROWS позиций
+            last = first + max(1, int(np.searchsorted(np.cumsum(sizes[first:]), COPY_CHUNK_ROWS)))
+            chunk_sizes = sizes[first:last]
+            rows = int(chunk_sizes.sum())
+            batch_idx = np.repeat(np.arange(first, last), chunk_sizes)
+            positions = np.arange(rows) - np.repeat(np.cumsum(chunk_sizes) - chunk_sizes, chunk_sizes) + 1
+            drums = rng.integers(0, len(drum_cents), rows)
+            # Отрез — от 5% до всей первичной длины барабана, с шагом 0,5 м, не короче минимума модели
+            cents = np.round(drum_cents[drums] * rng.uniform(0.05, 1.0, rows) / 50).astype(np.int64) * 50
+            cents = np.clip(cents, MIN_LENGTH_M * 100, drum_cents[drums])
+            item_stamps = stamps[batch_idx].tolist()
+            _copy_lines(cur, item_table, columns, [
+                f"{stamp}\t{stamp}\t{batch_start + b}\t{drum_start + d}\t{s}\t{p}\t{length}"
+                for stamp, b, d, s, p, length in zip(
+                    item_stamps, batch_idx.tolist(), drums.tolist(), batch_storage[batch_idx].tolist(),
+                    positions.tolist(), _cents(cents),
+                )
+            ])
+            written += rows
+            first = last
+            self.stdout.write(f"→ Позиций: {written}/{total}")
+
+        batch_range = {"first": batch_start, "last": batch_start + count - 1}
+        # Приход на барабан по каждой партии — как post_receipts при импорте
+        cur.execute(
+            f"""
+            INSERT INTO {DrumMovement._meta.db_table}
+                (created_at, updated_at, drum_id, kind, delta_m, batch_id, comment)
+            SELECT b.created_at, b.created_at, bi.drum_id, %(kind)s, sum(bi.length_m), bi.batch_id, ''
+            FROM {item_table} bi
+            JOIN {batch_table} b ON b.id = bi.batch_id
+            WHERE bi.batch_id BETWEEN %(first)s AND %(last)s
+            GROUP BY bi.batch_id, b.created_at, bi.drum_id
+            """,
+            {**batch_range, "kind": DrumMovement.Kind.RECEIPT},
+        )
+        cur.execute(
+            f"""
+            INSERT INTO {DrumBalance._meta.db_table} AS db (drum_id, balance_m, updated_at)
+            SELECT drum_id, sum(length_m), %(now)s
+            FROM {item_table}
+            WHERE batch_id BETWEEN %(first)s AND %(last)s
+            GROUP BY drum_id
+            ON CONFLICT (drum_id) DO UPDATE
+            SET balance_m = db.balance_m + EXCLUDED.balance_m, updated_at = EXCLUDED.updated_at
+            """,
+            {**batch_range, "now": now},
+        )
+        # Склады и партии новые — строк сводок для них ещё нет, достаточно INSERT по сгенерированным позициям
+        cur.execute(
+            f"""
+            INSERT INTO {StockSummary._meta.db_table}
+                (storage_id, cable_model_id, items_count, total_length_m, updated_at)
+            SELECT bi.storage_location_id, d.cable_model_id, count(*), sum(bi.length_m), %(now)s
+            FROM {item_table} bi
+            JOIN {Drum._meta.db_table} d ON d.id = bi.drum_id
+            WHERE bi.batch_id BETWEEN %(first)s AND %(last)s
+            GROUP BY bi.storage_location_id, d.cable_model_id
+            """,
+            {**batch_range, "now": now},
+        )
+        cur.execute(
+            f"""
+            INSERT INTO {BatchSummary._meta.db_table} (batch_id, items_count, total_length_m, updated_at)
+            SELECT batch_id, count(*), sum(length_m), %(now)s
+            FROM {item_table}
+            WHERE batch_id BETWEEN %(first)s AND %(last)s
+            GROUP BY batch_id
+            """,
+            {**batch_range, "now": now},
+        )
+        self.stdout.write("→ Приходы на барабаны, остатки барабанов и сводки")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services.drum_ledger import SNAPSHOT_LAG, take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Снимки остатков барабанов для запросов «остаток на дату» — по барабанам с движениями после "
+        "их прошлого снимка. Запускается по расписанию (например, раз в сутки)."
+    )
+
+    def handle(self, *args, **options):
+        created = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Снимков остатков: {created} (на момент {int(SNAPSHOT_LAG.total_seconds() // 60)} мин назад)"
+        ))
@@ -0,0 +1,43 @@
+"""
+Метрики Prometheus для GET /metrics (текстовый формат экспозиции).
+
+Счётчики и гистограммы пишутся в реестр prometheus_client процесса. Под gunicorn с несколькими
+процессами и с отдельными обработчиками очереди (import_worker) задаётся PROMETHEUS_MULTIPROC_DIR —
+общий каталог, куда каждый процесс пишет свои значения; /metrics складывает их по всем процессам
+(MultiProcessCollector). Переменная читается prometheus_client при импорте, поэтому задаётся в окружении
+процесса, а не в settings.
+
+Метрики, которые считаются в момент опроса (глубина очереди импорта), регистрируются в SCRAPE_REGISTRY:
+их значение берётся из БД, а не складывается по процессам.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Время ответа: от быстрых запросов API до тяжёлых страниц админки и синхронного импорта
+REQUEST_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUEST_LATENCY = Histogram(
+    "cabletrack_http_request_duration_seconds",
+    "Время ответа по представлениям (до отдачи заголовков для потоковых ответов)",
+    ["view", "method", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+
+# Коллекторы, значения которых вычисляются при каждом опросе /metrics
+SCRAPE_REGISTRY = CollectorRegistry()
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Текст экспозиции и его Content-Type: метрики процессов и метрики момента опроса."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(SCRAPE_REGISTRY), CONTENT_TYPE_LATEST
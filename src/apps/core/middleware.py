@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+
+from apps.core.metrics import REQUEST_LATENCY
+from apps.core.query_budget import QueryBudget
+
+# Запросы, не сопоставленные ни одному URL (404 до представления), — одной меткой
+UNRESOLVED_VIEW = "<unresolved>"
+
+
+class RequestMetricsMiddleware:
+    """Время ответа в гистограмму REQUEST_LATENCY с меткой представления (view_name из URLconf)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        t0 = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        # Имя представления, а не путь: у путей с id своя метка на каждый объект
+        view = match.view_name if match is not None else UNRESOLVED_VIEW
+        REQUEST_LATENCY.labels(view=view, method=request.method, status=str(response.status_code)).observe(
+            time.perf_counter() - t0
+        )
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    SQL каждого запроса сверяется с бюджетом SQL_BUDGETS["request"] (см. apps.core.query_budget).
+    При DEBUG число запросов и их время отдаются в заголовке Server-Timing (видно в DevTools).
+    Для потоковых ответов учитываются только запросы до отдачи заголовков.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = QueryBudget("request", detail=f"{request.method} {request.path}")
+        with budget as stats:
+            response = self.get_response(request)
+        if settings.DEBUG:
+            response["Server-Timing"] = f'sql;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+        return response
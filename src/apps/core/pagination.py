@@ -0,0 +1,121 @@
+"""
+Keyset-пагинация для REST API.
+
+Страница выбирается условием по паре (created_at, id) от последней строки предыдущей страницы,
+а не OFFSET: глубокие страницы читаются так же быстро, как первая, — диапазонным сканом индекса
+(created_at, id). Курсор непрозрачный (base64 от JSON), общее число строк не считается.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    ordering_query_param = "ordering"
+    # Значение ordering → порядок выдачи; по умолчанию новые строки первыми
+    orderings = {"-created_at": True, "created_at": False}
+    invalid_cursor_message = "Некорректный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self._get_limit(request)
+        ordering = request.query_params.get(self.ordering_query_param, "-created_at")
+        self.descending = self.orderings.get(ordering, True)
+
+        if self.descending:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        cursor = self._decode_cursor(request.query_params.get(self.cursor_query_param))
+        if cursor is not None:
+            # Сравнение строк (created_at, id) целиком — условие индекса, без фильтрации строк
+            # с одинаковым created_at (импорт вставляет тысячи строк с одним временем)
+            table = queryset.model._meta.db_table
+            op = "<" if self.descending else ">"
+            queryset = queryset.filter(RawSQL(
+                f'("{table}"."created_at", "{table}"."id") {op} (%s, %s)', cursor, output_field=BooleanField()
+            ))
+
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode_cursor(self.last))
+
+    def _get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(limit, self.max_page_size))
+
+    @staticmethod
+    def _encode_cursor(obj) -> str:
+        raw = json.dumps([obj.created_at.isoformat(), obj.pk], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, value: str | None):
+        if not value:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            created_at, pk = json.loads(raw)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор следующей страницы (из поля next).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Строк на странице, до {self.max_page_size}.",
+                "schema": {"type": "integer", "default": self.page_size},
+            },
+            {
+                "name": self.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Порядок по времени создания: -created_at (новые первыми) или created_at.",
+                "schema": {"type": "string", "enum": list(self.orderings), "default": "-created_at"},
+            },
+        ]
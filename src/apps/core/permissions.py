@@ -0,0 +1,13 @@
+"""
+Права REST API.
+
+DjangoModelPermissions не проверяет чтение: GET открыт любому авторизованному пользователю.
+ModelViewPermissions требует для GET/HEAD право view_<модель> — то же, что даёт просмотр в админке.
+"""
+from rest_framework.permissions import DjangoModelPermissions
+
+_VIEW_PERMS = ["%(app_label)s.view_%(model_name)s"]
+
+
+class ModelViewPermissions(DjangoModelPermissions):
+    perms_map = {**DjangoModelPermissions.perms_map, "GET": _VIEW_PERMS, "HEAD": _VIEW_PERMS}
@@ -0,0 +1,79 @@
+"""
+Бюджеты SQL: число запросов и их время на HTTP-запрос (QueryBudgetMiddleware) и на вызов сервиса
+(@query_budget). Превышение пишется предупреждением в лог apps.core.query_budget — с путём
+запроса или именем сервиса, чтобы новый столбец list_display с запросом на строку был виден сразу.
+
+Бюджеты — в settings.SQL_BUDGETS: имя → {"queries": N, "seconds": S}; "request" — для любого
+HTTP-запроса, остальные — по имени сервиса. Без бюджета вызов только считается (лог DEBUG).
+Для тестов — assert_max_queries в apps.core.testing.
+"""
+import functools
+import logging
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.core.query_stats import QueryStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int | None = None
+    seconds: float | None = None
+
+    def exceeded(self, stats: QueryStats) -> bool:
+        return (self.queries is not None and stats.count > self.queries) or (
+            self.seconds is not None and stats.seconds > self.seconds
+        )
+
+
+def get_budget(name: str) -> Budget | None:
+    conf = settings.SQL_BUDGETS.get(name)
+    return Budget(**conf) if conf else None
+
+
+class QueryBudget:
+    """with QueryBudget("имя", detail=...): счётчик SQL с проверкой бюджета на выходе."""
+
+    def __init__(self, name: str, *, detail: str = "", budget: Budget | None = None, using: str = DEFAULT_DB_ALIAS):
+        self.name = name
+        self.detail = detail
+        self.budget = budget if budget is not None else get_budget(name)
+        self.stats = QueryStats(using)
+
+    def __enter__(self):
+        self.stats.__enter__()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.__exit__(*exc)
+        self.report()
+
+    def report(self) -> None:
+        label = f"{self.name} {self.detail}".strip()
+        if self.budget is not None and self.budget.exceeded(self.stats):
+            logger.warning(
+                "SQL budget exceeded: %s — %d queries in %.3f s (budget: %s queries, %s s)",
+                label, self.stats.count, self.stats.seconds, self.budget.queries, self.budget.seconds,
+            )
+        else:
+            logger.debug("SQL: %s — %d queries in %.3f s", label, self.stats.count, self.stats.seconds)
+
+
+def query_budget(name: str | None = None):
+    """Декоратор сервиса: SQL каждого вызова сверяется с SQL_BUDGETS[name] (по умолчанию — имя функции)."""
+
+    def decorator(func):
+        budget_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(budget_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,38 @@
+"""
+Счётчик SQL-запросов соединения: число выполненных команд и их суммарное время.
+
+В отличие от CaptureQueriesContext тексты запросов не сохраняются — счётчик можно держать
+включённым на импорте в миллионы строк, где один bulk_create — сотни килобайт SQL.
+Считаются запросы через курсоры Django в текущем потоке; COPY и запросы других
+процессов не учитываются.
+"""
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class QueryStats:
+    """Контекстный менеджер: with QueryStats() as q: ...; затем q.count, q.seconds."""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.count = 0
+        self.seconds = 0.0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.count += 1
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._wrapper.__exit__(*exc)
+        self._wrapper = None
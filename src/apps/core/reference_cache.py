@@ -0,0 +1,55 @@
+"""
+Кэш справочных выборок (склады, модели кабеля) для выпадающих списков форм и фильтров админки.
+
+Выборка хранится в кэше "default" целиком, списком объектов, под ключом с версией модели.
+Сохранение или удаление объекта модели (сигналы в apps.catalog.signals) после коммита меняет
+версию — старые записи больше не читаются и вытесняются сами. Версия — метка времени, а не
+счётчик: если ключ версии вытеснен, новая версия не совпадёт ни с одной из прежних.
+
+С кэшем в памяти процесса (по умолчанию) смена версии видна только процессу, в котором сохранили
+объект; остальные процессы увидят изменения не позже чем через REFERENCE_CACHE_TTL секунд.
+С общим кэшем (Redis, CACHE_URL=redis://...) — сразу во всех процессах.
+
+Массовые изменения через QuerySet.update() сигналов не вызывают — после них
+нужно вызвать invalidate_references(model) вручную.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model, QuerySet
+
+
+def _version_key(model: type[Model]) -> str:
+    return f"refcache:{model._meta.label_lower}:version"
+
+
+def _version(model: type[Model]) -> int:
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # add: параллельный процесс мог уже записать версию — тогда берётся она
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def cached_queryset(queryset: QuerySet) -> list:
+    """Объекты выборки из кэша; при промахе — один запрос, результат кладётся в кэш."""
+    model = queryset.model
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    key = f"refcache:{model._meta.label_lower}:{_version(model)}:{digest}"
+    objects = cache.get(key)
+    if objects is None:
+        objects = list(queryset)
+        cache.set(key, objects, settings.REFERENCE_CACHE_TTL)
+    return objects
+
+
+def invalidate_references(model: type[Model]) -> None:
+    """Новая версия выборок модели — после коммита, чтобы в кэш не попали незафиксированные данные."""
+    transaction.on_commit(lambda: cache.set(_version_key(model), time.time_ns(), None))
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+FIELDS_QUERY_PARAM = "fields"
+
+
+def requested_fields(request) -> set[str] | None:
+    """Поля из ?fields=a,b,c; None — параметр не задан (все поля)."""
+    if request is None:
+        return None
+    value = request.query_params.get(FIELDS_QUERY_PARAM)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля из ?fields= (только для сериализатора верхнего уровня)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get("request"))
+        if fields is None:
+            return
+        if unknown := fields - self.fields.keys():
+            raise serializers.ValidationError({FIELDS_QUERY_PARAM: f"Неизвестные поля: {', '.join(sorted(unknown))}"})
+        for name in self.fields.keys() - fields:
+            self.fields.pop(name)
@@ -0,0 +1,71 @@
+"""
+Проверки числа SQL-запросов для тестов: в отличие от assertNumQueries — верхняя граница,
+а при превышении в сообщении есть сами запросы, чтобы N+1 было видно сразу.
+
+    class BatchItemAdminTests(MaxQueriesMixin, TestCase):
+        def test_changelist(self):
+            with self.assertMaxQueries(8):
+                self.client.get(reverse("admin:inventory_batchitem_changelist"))
+
+Число запросов страницы списка не должно зависеть от числа строк на ней — assert_changelist_queries
+открывает список с одной строкой и с полной страницей и сравнивает; для всех списков админки
+на рабочей базе — команда check_admin_queries.
+"""
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def _format_queries(captured: CaptureQueriesContext) -> str:
+    return "\n".join(f"{i}. {q['sql']}" for i, q in enumerate(captured.captured_queries, start=1))
+
+
+@contextmanager
+def assert_max_queries(limit: int, *, using: str = DEFAULT_DB_ALIAS, label: str = ""):
+    """Не больше limit запросов внутри блока; иначе AssertionError со списком запросов."""
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    if len(captured) > limit:
+        where = f"{label}: " if label else ""
+        raise AssertionError(
+            f"{where}{len(captured)} SQL-запросов при допустимых {limit}:\n{_format_queries(captured)}"
+        )
+
+
+class MaxQueriesMixin:
+    """assertMaxQueries для TestCase."""
+
+    def assertMaxQueries(self, limit: int, *, using: str = DEFAULT_DB_ALIAS, label: str = ""):
+        return assert_max_queries(limit, using=using, label=label)
+
+
+def changelist_url(model) -> str:
+    return reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+
+
+def assert_changelist_queries(client, model, *, limit: int, per_page: int = 100) -> int:
+    """
+    Список модели в админке укладывается в limit запросов и не делает запросов на строку: число
+    запросов страницы с одной строкой и с per_page строками совпадает (в таблице должно быть больше
+    одной строки). Возвращает число запросов полной страницы.
+    """
+    model_admin = admin.site.get_model_admin(model)
+    url = changelist_url(model)
+    # Прогрев: заполнение кэша справочников для фильтров не должно попасть в разницу
+    client.get(url)
+    with patch.object(model_admin, "list_per_page", 1):
+        with assert_max_queries(limit, label=f"{url} (одна строка)") as one:
+            client.get(url)
+    with patch.object(model_admin, "list_per_page", per_page):
+        with assert_max_queries(limit, label=url) as full:
+            client.get(url)
+    if len(full) != len(one):
+        raise AssertionError(
+            f"{url}: {len(one)} SQL-запросов на одну строку и {len(full)} на {per_page} — запрос на строку:\n"
+            f"{_format_queries(full)}"
+        )
+    return len(full)
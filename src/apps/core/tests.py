@@ -1,3 +1,188 @@
-from django.test import TestCase
+import csv
+import tempfile
+from dataclasses import asdict
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.catalog.cache import get_catalog_cache
+from apps.catalog.models import CableModel, Drum
+from apps.core.admin import EstimatedCountPaginator
+from apps.core.management.commands.bench_import import BenchResult, compare, generate_file
+from apps.core.query_budget import get_budget
+from apps.core.reference_cache import cached_queryset
+from apps.core.testing import assert_changelist_queries
+from apps.inventory.models import Batch, ImportJob
+from apps.inventory.forms import BatchImportForm
+from apps.inventory.services import drum_ledger
+from apps.inventory.services.import_from_csv import import_batch_from_csv
+from apps.storage.models import Storage
+
+
+@override_settings(CATALOG_CACHE_LISTEN=False, CSV_IMPORT_PLAN_TTL=0)
+class AdminChangelistQueryTests(TestCase):
+    """Каждый список админки — в бюджете SQL_BUDGETS['request'] и без запроса на строку (как check_admin_queries)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # По две строки в таблице каждой модели админки: иначе запрос на строку не отличить от постоянного
+        cls.user = get_user_model().objects.create_superuser(username="admin", password=None)
+        get_user_model().objects.create_user(username="reader")
+        Group.objects.bulk_create([Group(name="readers"), Group(name="importers")])
+        storages = [Storage.objects.create(code=f"S-{n}") for n in (1, 2)]
+        for n in (1, 2):
+            model = CableModel.objects.create(
+                code=f"CM-{n}", min_length_m=Decimal("1.00"), max_length_m=Decimal("1000.00")
+            )
+            Drum.objects.create(code=f"DRUM-{n}", cable_model=model, initial_length_m=Decimal("500.00"))
+        get_catalog_cache().clear()
+        body = b"position,drum_code,length\n1,DRUM-1,100\n2,DRUM-2,200\n3,DRUM-1,50\n"
+        for n, storage in enumerate(storages, start=1):
+            import_batch_from_csv(
+                file=SimpleUploadedFile("batch.csv", body), batch_number=f"B-{n}", storage=storage, engine="python"
+            )
+            ImportJob.objects.create(batch_number=f"B-{n}", storage=storage, file_name="batch.csv")
+        drum_ledger.cut(Drum.objects.get(code="DRUM-1"), Decimal("10"))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_changelists_fit_request_budget(self):
+        limit = get_budget("request").queries
+        for model in sorted(admin.site._registry, key=lambda m: m._meta.label_lower):
+            with self.subTest(model=model._meta.label):
+                self.assertGreater(model._default_manager.count(), 1)
+                assert_changelist_queries(self.client, model, limit=limit)
+
+
+class ReferenceCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.storage = Storage.objects.create(code="S-1")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_queryset_is_read_once(self):
+        queryset = Storage.objects.order_by("code")
+        self.assertEqual(cached_queryset(queryset), [self.storage])
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_queryset(Storage.objects.order_by("code")), [self.storage])
+        # Другая выборка той же модели — свой ключ
+        self.assertEqual(cached_queryset(Storage.objects.filter(code="S-404")), [])
+
+    def test_change_invalidates_after_commit(self):
+        cached_queryset(Storage.objects.order_by("code"))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            other = Storage.objects.create(code="S-2")
+        # До коммита в кэше прежняя выборка
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_queryset(Storage.objects.order_by("code")), [self.storage])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cached_queryset(Storage.objects.order_by("code")), [self.storage, other])
+
+    def test_form_choices_and_validation_use_cache(self):
+        BatchImportForm()["storage"].as_widget()
+        with self.assertNumQueries(0):
+            field = BatchImportForm().fields["storage"]
+            self.assertEqual([label for _, label in field.choices][1:], [str(self.storage)])
+            self.assertEqual(field.clean(str(self.storage.pk)), self.storage)
+        # Склад, которого ещё нет в кэше процесса, проверяется запросом
+        other = Storage.objects.bulk_create([Storage(code="S-2")])[0]
+        self.assertEqual(BatchImportForm().fields["storage"].clean(str(other.pk)), other)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Batch.objects.bulk_create([Batch(number=f"B-{n}") for n in range(30)])
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE inventory_batch")
+
+    def count(self, queryset) -> tuple[int, list[str]]:
+        with CaptureQueriesContext(connection) as captured:
+            count = EstimatedCountPaginator(queryset.order_by("pk"), 10).count
+        return count, [q["sql"] for q in captured.captured_queries]
+
+    def test_small_estimate_is_counted_exactly(self):
+        count, queries = self.count(Batch.objects.filter(number__startswith="B-1"))
+        self.assertEqual(count, 11)
+        self.assertIn("COUNT(*)", queries[-1])
+
+    @override_settings(ADMIN_EXACT_COUNT_MAX=0)
+    def test_large_estimate_is_used(self):
+        count, queries = self.count(Batch.objects.all())
+        self.assertEqual(count, 30)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("reltuples", queries[0])
+
+        count, queries = self.count(Batch.objects.filter(number__startswith="B-1"))
+        self.assertGreater(count, 0)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith("EXPLAIN"))
+
+
+class AutocompleteFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(username="admin", password=None)
+        cls.batch = Batch.objects.create(number="B-1")
+        Batch.objects.create(number="B-2")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_filter_by_related_pk(self):
+        url = reverse("admin:audit_importlog_changelist")
+        response = self.client.get(url, {"batch__id__exact": self.batch.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-autocomplete-filter="batch__id__exact"')
+        # Выбранное значение подписано, список всех партий не выводится
+        self.assertContains(response, "B-1")
+        self.assertNotContains(response, "B-2")
+
+    def test_invalid_value(self):
+        url = reverse("admin:audit_importlog_changelist")
+        response = self.client.get(url, {"batch__id__exact": "x"})
+        self.assertRedirects(response, f"{url}?e=1", fetch_redirect_response=False)
+
+
+class BenchImportTests(SimpleTestCase):
+    def test_generated_file_is_reproducible_and_mixed(self):
+        tmp = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        generate_file(tmp / "a.csv", rows=2000, mix="heavy", seed=1)
+        generate_file(tmp / "b.csv", rows=2000, mix="heavy", seed=1)
+        self.assertEqual((tmp / "a.csv").read_bytes(), (tmp / "b.csv").read_bytes())
+        with open(tmp / "a.csv", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2000)
+        # heavy: 5% без позиции и 10% с неизвестным барабаном — с разбросом выборки
+        self.assertTrue(60 < sum(not r["position"] for r in rows) < 140)
+        self.assertTrue(140 < sum(r["drum_code"].startswith("NOPE-") for r in rows) < 260)
+
+        generate_file(tmp / "clean.csv", rows=100, mix="clean", seed=1)
+        with open(tmp / "clean.csv", newline="") as f:
+            self.assertEqual([int(r["position"]) for r in csv.DictReader(f)], list(range(1, 101)))
+
+    def test_compare_with_baseline(self):
+        base = BenchResult("python-10-clean-p0", "python", 10, "clean", 0.0, wall_sec=1.0, queries=5, peak_rss_mb=50)
+        baseline = {"cases": [asdict(base)]}
+        same = BenchResult(**{**asdict(base), "wall_sec": 1.1, "peak_rss_mb": 60})
+        self.assertEqual(compare([same], baseline, tolerance=0.15), [])
+
+        worse = BenchResult(**{**asdict(base), "wall_sec": 1.5, "queries": 6, "peak_rss_mb": 100})
+        self.assertEqual(len(compare([worse], baseline, tolerance=0.15)), 3)
+        # Упавшие замеры и замеры без базовой линии не сравниваются
+        failed = BenchResult(**{**asdict(worse), "error": "отказ"})
+        new = BenchResult(**{**asdict(worse), "name": "numpy-10-clean-p0"})
+        self.assertEqual(compare([failed, new], baseline, tolerance=0.15), [])
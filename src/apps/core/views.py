@@ -1,3 +1,59 @@
-from django.shortcuts import render
+import hmac
+import ipaddress
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import viewsets
+
+from apps.core.metrics import render_metrics
+from apps.core.pagination import KeysetPagination
+from apps.core.permissions import ModelViewPermissions
+from apps.core.serializers import FIELDS_QUERY_PARAM, requested_fields
+
+
+@extend_schema(parameters=[
+    OpenApiParameter(
+        FIELDS_QUERY_PARAM, OpenApiTypes.STR, description="Поля ответа через запятую (по умолчанию — все).",
+    ),
+])
+class KeysetReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+    # Чтение с keyset-пагинацией и выбором полей; связи подтягиваются только для запрошенных полей.
+    # Описание эндпоинта в схеме API берётся из docstring наследника
+
+    permission_classes = [ModelViewPermissions]
+    pagination_class = KeysetPagination
+    # Поле ответа → связь для select_related
+    related_fields: dict[str, str] = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        related = [rel for name, rel in self.related_fields.items() if fields is None or name in fields]
+        return queryset.select_related(*related) if related else queryset
+
+
+def _metrics_allowed(request) -> bool:
+    """Адрес из METRICS_ALLOWED_IPS, токен METRICS_TOKEN или сотрудник, вошедший в админку."""
+    try:
+        addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        addr = None
+    networks = (ipaddress.ip_network(net, strict=False) for net in settings.METRICS_ALLOWED_IPS)
+    if addr is not None and any(addr in net for net in networks):
+        return True
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if settings.METRICS_TOKEN and scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return True
+    return request.user.is_active and request.user.is_staff
+
+
+@require_GET
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus (см. apps.core.metrics); опрос очереди импорта — запрос к БД."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
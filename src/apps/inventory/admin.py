@@ -1,16 +1,56 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.shortcuts import redirect
 from django.urls import path, reverse
 
-from apps.inventory.models import Batch, BatchItem
-from apps.inventory.views import BatchImportAdminView
+from apps.core.admin import AutocompleteFilter, CachedRelatedFieldListFilter, LargeTableAdminMixin
+from apps.inventory.models import Batch, BatchItem, DrumMovement, ImportJob, StockSummary
+from apps.inventory.services.export import export_filename
+from apps.inventory.services.import_jobs import enqueue_stored
+from apps.inventory.services.upload_store import is_stored
+from apps.inventory.views import BatchImportAdminView, ImportJobStatusAdminView, export_response
+
+
+class BatchFilter(AutocompleteFilter):
+    title = "партии"
+    field_name = "batch"
+
+
+class StorageFilter(AutocompleteFilter):
+    title = "складу"
+    field_name = "storage_location"
 
 
 @admin.register(Batch)
-class BatchAdmin(admin.ModelAdmin):
-    list_display = ("number", "created_at")
+class BatchAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("number", "items_count", "total_length_m", "created_at")
+    list_select_related = ("summary",)
     search_fields = ("number",)
     ordering = ("-created_at",)
+    actions = ("export_csv", "export_ndjson")
+
+    @admin.display(description="Позиций", ordering="summary__items_count")
+    def items_count(self, obj: Batch):
+        summary = getattr(obj, "summary", None)
+        return summary.items_count if summary else 0
+
+    @admin.display(description="Суммарная длина, м", ordering="summary__total_length_m")
+    def total_length_m(self, obj: Batch):
+        summary = getattr(obj, "summary", None)
+        return summary.total_length_m if summary else 0
+
+    @admin.action(description="Выгрузить позиции в CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv")
+
+    @admin.action(description="Выгрузить позиции в NDJSON")
+    def export_ndjson(self, request, queryset):
+        return self._export(queryset, "ndjson")
+
+    def _export(self, queryset, export_format: str):
+        numbers = list(queryset.values_list("number", flat=True)[:2])
+        items = BatchItem.objects.filter(batch__in=queryset.values("pk"))
+        batch_number = numbers[0] if len(numbers) == 1 else None
+        return export_response(items, export_format, filename=export_filename(export_format, batch_number=batch_number))
 
     def add_view(self, request, form_url="", extra_context=None):
         return redirect(reverse("admin:inventory_batch_import"))
@@ -18,19 +58,122 @@ class BatchAdmin(admin.ModelAdmin):
     def get_urls(self):
         urls = super().get_urls()
         view = BatchImportAdminView.as_view(admin_site=self.admin_site)
+        status_view = ImportJobStatusAdminView.as_view(admin_site=self.admin_site)
         my_urls = [
             path(
                 "import/",
                 self.admin_site.admin_view(view),
                 name="inventory_batch_import",
             ),
+            path(
+                "import/<int:job_id>/",
+                self.admin_site.admin_view(status_view),
+                name="inventory_batch_import_status",
+            ),
         ]
         return my_urls + urls
 
 
 @admin.register(BatchItem)
-class BatchItemAdmin(admin.ModelAdmin):
+class BatchItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("batch", "number_in_batch", "drum", "storage_location", "length_m", "created_at")
     search_fields = ("batch__number", "drum__code", "storage_location__code")
-    list_filter = ("batch", "storage_location")
+    list_filter = (BatchFilter, StorageFilter)
     list_select_related = ("batch", "drum", "storage_location")
+    actions = ("export_csv", "export_ndjson")
+
+    # С «выбрать все» действие получает всю отфильтрованную выборку, а не только страницу
+    @admin.action(description="Выгрузить в CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv", filename=export_filename("csv"))
+
+    @admin.action(description="Выгрузить в NDJSON")
+    def export_ndjson(self, request, queryset):
+        return export_response(queryset, "ndjson", filename=export_filename("ndjson"))
+
+
+@admin.register(StockSummary)
+class StockSummaryAdmin(admin.ModelAdmin):
+    list_display = ("storage", "cable_model", "items_count", "total_length_m", "updated_at")
+    list_select_related = ("storage", "cable_model")
+    list_filter = (("storage", CachedRelatedFieldListFilter), ("cable_model", CachedRelatedFieldListFilter))
+    search_fields = ("storage__code", "cable_model__code")
+    ordering = ("storage__code", "cable_model__code")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class DrumFilter(AutocompleteFilter):
+    title = "барабану"
+    field_name = "drum"
+
+
+@admin.register(DrumMovement)
+class DrumMovementAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("created_at", "drum", "kind", "delta_m", "batch", "counterpart_drum", "comment")
+    list_select_related = ("drum", "batch", "counterpart_drum")
+    list_filter = ("kind", DrumFilter)
+    search_fields = ("drum__code", "batch__number", "comment")
+    ordering = ("-created_at",)
+
+    # Журнал только на добавление: движения создаются сервисом drum_ledger
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at", "batch_number", "file_name", "dry_run", "status", "rows_processed", "attempts", "worker",
+    )
+    list_filter = ("status", "dry_run")
+    search_fields = ("batch_number", "file_name")
+    ordering = ("-created_at",)
+    actions = ("reprocess",)
+    readonly_fields = (
+        "batch_number", "storage", "file_name", "file_size", "file_sha256", "dry_run", "status", "rows_processed",
+        "bytes_processed", "attempts", "worker", "started_at", "heartbeat_at", "finished_at",
+        "batch", "result", "error", "created_at", "updated_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Импортировать повторно из хранилища загрузок", permissions=["reprocess"])
+    def reprocess(self, request, queryset):
+        queued = skipped = 0
+        for job in queryset:
+            if not job.file_sha256 or not is_stored(job.file_sha256):
+                skipped += 1
+                continue
+            enqueue_stored(
+                file_sha256=job.file_sha256,
+                file_size=job.file_size,
+                file_name=job.file_name,
+                batch_number=job.batch_number,
+                storage=job.storage,
+            )
+            queued += 1
+        if queued:
+            self.message_user(request, f"Поставлено в очередь импорта: {queued}.", messages.SUCCESS)
+        if skipped:
+            self.message_user(request, f"Файла нет в хранилище загрузок, пропущено: {skipped}.", messages.WARNING)
+
+    def has_reprocess_permission(self, request):
+        return request.user.has_perm("inventory.add_batchitem")
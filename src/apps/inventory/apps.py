@@ -5,3 +5,8 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
     label = 'inventory'
+
+    def ready(self):
+        from apps.inventory.services.import_metrics import register_queue_collector
+
+        register_queue_collector()
@@ -1,15 +1,16 @@
 from django import forms
 
+from apps.core.forms import CachedModelChoiceField
 from apps.storage.models import Storage
 
 
 class BatchImportForm(forms.Form):
     batch_number = forms.CharField(label="Номер партии", max_length=64)
-    storage = forms.ModelChoiceField(label="Склад", queryset=Storage.objects.all())
+    storage = CachedModelChoiceField(label="Склад", queryset=Storage.objects.order_by("code"))
     file = forms.FileField(label="CSV-файл")
-
-    def clean_file(self):
-        f = self.cleaned_data["file"]
-        if f.size > 5 * 1024 * 1024:
-            raise forms.ValidationError("Слишком большой файл (>5MB).")
-        return f
+    dry_run = forms.BooleanField(
+        label="Только проверить",
+        required=False,
+        help_text="Выполнить все проверки без записи. Если сразу после проверки загрузить тот же файл, "
+                  "повторный разбор не понадобится.",
+    )
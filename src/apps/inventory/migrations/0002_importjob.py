@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('storage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('batch_number', models.CharField(max_length=64, verbose_name='Номер партии')),
+                ('file', models.FileField(blank=True, upload_to='imports/%Y/%m/%d/', verbose_name='Файл')),
+                ('file_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Имя файла')),
+                ('file_size', models.PositiveBigIntegerField(default=0, verbose_name='Размер файла, байт')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершён'), ('failed', 'Ошибка')], default='queued', max_length=16, verbose_name='Статус')),
+                ('rows_processed', models.PositiveBigIntegerField(default=0, verbose_name='Обработано строк')),
+                ('bytes_processed', models.PositiveBigIntegerField(default=0, verbose_name='Прочитано байт')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('worker', models.CharField(blank=True, default='', max_length=128, verbose_name='Обработчик')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начат')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний сигнал')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='Итоги')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to='inventory.batch', verbose_name='Партия')),
+                ('storage', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='import_jobs', to='storage.storage', verbose_name='Склад')),
+            ],
+            options={
+                'verbose_name': 'Задача импорта',
+                'verbose_name_plural': 'Задачи импорта',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='inventory_i_status_67e2fa_idx')],
+            },
+        ),
+    ]
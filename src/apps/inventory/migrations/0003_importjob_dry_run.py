@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, verbose_name='Только проверка'),
+        ),
+    ]
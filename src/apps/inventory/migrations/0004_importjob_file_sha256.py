@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_importjob_dry_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='file_sha256',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='SHA256'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индекс на BatchItem строится CONCURRENTLY: таблица большая, запись в неё не блокируется
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0004_importjob_file_sha256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_b_created_5fe6d2_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='batchitem',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_b_created_69298e_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+# Начальное заполнение сводок по уже загруженным позициям (то же, что команда rebuild_summaries)
+FILL_SUMMARIES = """
+INSERT INTO inventory_stocksummary (storage_id, cable_model_id, items_count, total_length_m, updated_at)
+SELECT bi.storage_location_id, d.cable_model_id, count(*), sum(bi.length_m), now()
+FROM inventory_batchitem bi
+JOIN catalog_drum d ON d.id = bi.drum_id
+GROUP BY bi.storage_location_id, d.cable_model_id;
+
+INSERT INTO inventory_batchsummary (batch_id, items_count, total_length_m, updated_at)
+SELECT batch_id, count(*), sum(length_m), now()
+FROM inventory_batchitem
+GROUP BY batch_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+        ('inventory', '0005_batch_batchitem_created_at_id_index'),
+        ('storage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchSummary',
+            fields=[
+                ('batch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='inventory.batch', verbose_name='Партия')),
+                ('items_count', models.BigIntegerField(default=0, verbose_name='Позиций')),
+                ('total_length_m', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Суммарная длина, м')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Итоги партии',
+                'verbose_name_plural': 'Итоги партий',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('items_count', models.BigIntegerField(default=0, verbose_name='Позиций')),
+                ('total_length_m', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Суммарная длина, м')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('cable_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_summaries', to='catalog.cablemodel', verbose_name='Модель кабеля')),
+                ('storage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_summaries', to='storage.storage', verbose_name='Склад')),
+            ],
+            options={
+                'verbose_name': 'Остаток по складу и модели',
+                'verbose_name_plural': 'Остатки по складам и моделям',
+                'constraints': [models.UniqueConstraint(fields=('storage', 'cable_model'), name='uq_stocksummary_storage_model')],
+            },
+        ),
+        migrations.RunSQL(FILL_SUMMARIES, migrations.RunSQL.noop),
+    ]
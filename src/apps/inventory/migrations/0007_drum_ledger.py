@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+# Уже загруженные позиции — приходом по каждой паре (партия, барабан); остатки — их сумма
+FILL_LEDGER = """
+INSERT INTO inventory_drummovement (created_at, updated_at, drum_id, kind, delta_m, batch_id, comment)
+SELECT max(created_at), max(created_at), drum_id, 'receipt', sum(length_m), batch_id, ''
+FROM inventory_batchitem
+GROUP BY batch_id, drum_id;
+
+INSERT INTO inventory_drumbalance (drum_id, balance_m, updated_at)
+SELECT drum_id, sum(delta_m), now()
+FROM inventory_drummovement
+GROUP BY drum_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+        ('inventory', '0006_stocksummary_batchsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrumBalance',
+            fields=[
+                ('drum', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='catalog.drum', verbose_name='Барабан')),
+                ('balance_m', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Остаток, м')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Остаток барабана',
+                'verbose_name_plural': 'Остатки барабанов',
+            },
+        ),
+        migrations.CreateModel(
+            name='DrumBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(verbose_name='На момент')),
+                ('balance_m', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Остаток, м')),
+                ('drum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='catalog.drum', verbose_name='Барабан')),
+            ],
+            options={
+                'verbose_name': 'Снимок остатка барабана',
+                'verbose_name_plural': 'Снимки остатков барабанов',
+                'constraints': [models.UniqueConstraint(fields=('drum', 'taken_at'), name='uq_drumsnapshot_drum_taken_at')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DrumMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('kind', models.CharField(choices=[('receipt', 'Приход'), ('cut', 'Отрез'), ('transfer', 'Перемотка'), ('write_off', 'Списание')], max_length=16, verbose_name='Вид')),
+                ('delta_m', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Изменение, м')),
+                ('comment', models.CharField(blank=True, default='', max_length=255, verbose_name='Комментарий')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='drum_movements', to='inventory.batch', verbose_name='Партия')),
+                ('counterpart_drum', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='catalog.drum', verbose_name='Второй барабан перемотки')),
+                ('drum', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='catalog.drum', verbose_name='Барабан')),
+            ],
+            options={
+                'verbose_name': 'Движение по барабану',
+                'verbose_name_plural': 'Движения по барабанам',
+                'indexes': [models.Index(fields=['drum', 'created_at'], name='inventory_d_drum_id_07f4f3_idx'), models.Index(fields=['created_at'], name='inventory_d_created_a5ecb2_idx')],
+            },
+        ),
+        migrations.RunSQL(FILL_LEDGER, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_drum_ledger'),
+        ('storage', '0002_storage_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='importjob',
+            name='file',
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['file_sha256'], name='inventory_i_file_sh_5e2ea8_idx'),
+        ),
+    ]
@@ -16,6 +16,10 @@ class Batch(TimeStampedModel):
     )
 
     class Meta:
+        indexes = [
+            # Keyset-пагинация API
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name = "Партия"
         verbose_name_plural = "Партии"
 
@@ -69,6 +73,8 @@ class BatchItem(TimeStampedModel):
             models.Index(fields=["batch"]),
             models.Index(fields=["drum"]),
             models.Index(fields=["storage_location"]),
+            # Keyset-пагинация API
+            models.Index(fields=["created_at", "id"]),
         ]
         verbose_name = "Предмет в партии"
         verbose_name_plural = "Предметы в партии"
@@ -94,3 +100,310 @@ class BatchItem(TimeStampedModel):
 
     def __str__(self):
         return f"{self.batch} / {self.drum}"
+
+
+class StockSummary(models.Model):
+    """Остаток по складу и модели кабеля; ведётся импортом, см. services.summaries."""
+
+    storage = models.ForeignKey(
+        "storage.Storage",
+        on_delete=models.CASCADE,
+        related_name="stock_summaries",
+        verbose_name="Склад"
+    )
+    cable_model = models.ForeignKey(
+        "catalog.CableModel",
+        on_delete=models.CASCADE,
+        related_name="stock_summaries",
+        verbose_name="Модель кабеля"
+    )
+    items_count = models.BigIntegerField(
+        verbose_name="Позиций",
+        default=0
+    )
+    total_length_m = models.DecimalField(
+        verbose_name="Суммарная длина, м",
+        max_digits=16, decimal_places=2,
+        default=Decimal("0.00")
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Обновлено",
+        auto_now=True
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["storage", "cable_model"], name="uq_stocksummary_storage_model"),
+        ]
+        verbose_name = "Остаток по складу и модели"
+        verbose_name_plural = "Остатки по складам и моделям"
+
+    def __str__(self):
+        return f"{self.storage} / {self.cable_model}"
+
+
+class BatchSummary(models.Model):
+    """Итоги партии; ведутся импортом, см. services.summaries."""
+
+    batch = models.OneToOneField(
+        "inventory.Batch",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+        verbose_name="Партия"
+    )
+    items_count = models.BigIntegerField(
+        verbose_name="Позиций",
+        default=0
+    )
+    total_length_m = models.DecimalField(
+        verbose_name="Суммарная длина, м",
+        max_digits=16, decimal_places=2,
+        default=Decimal("0.00")
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Обновлено",
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "Итоги партии"
+        verbose_name_plural = "Итоги партий"
+
+    def __str__(self):
+        return str(self.batch_id)
+
+
+class DrumMovement(TimeStampedModel):
+    """
+    Движение длины по барабану (журнал только на добавление): приход с импортом партии,
+    отрез, перемотка на другой барабан, списание. См. services.drum_ledger.
+    """
+
+    class Kind(models.TextChoices):
+        RECEIPT = "receipt", "Приход"
+        CUT = "cut", "Отрез"
+        TRANSFER = "transfer", "Перемотка"
+        WRITE_OFF = "write_off", "Списание"
+
+    drum = models.ForeignKey(
+        "catalog.Drum",
+        on_delete=models.PROTECT,
+        related_name="movements",
+        verbose_name="Барабан"
+    )
+    kind = models.CharField(
+        verbose_name="Вид",
+        max_length=16,
+        choices=Kind.choices
+    )
+    # Со знаком: приход — плюс, расход — минус
+    delta_m = models.DecimalField(
+        verbose_name="Изменение, м",
+        max_digits=12, decimal_places=2
+    )
+    batch = models.ForeignKey(
+        "inventory.Batch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="drum_movements",
+        verbose_name="Партия"
+    )
+    counterpart_drum = models.ForeignKey(
+        "catalog.Drum",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Второй барабан перемотки"
+    )
+    comment = models.CharField(
+        verbose_name="Комментарий",
+        max_length=255,
+        blank=True,
+        default=""
+    )
+
+    class Meta:
+        indexes = [
+            # Хвост журнала после снимка для остатка на дату
+            models.Index(fields=["drum", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+        verbose_name = "Движение по барабану"
+        verbose_name_plural = "Движения по барабанам"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Движения по барабану не изменяются — нужна новая запись.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.drum_id}: {self.delta_m:+} м ({self.get_kind_display()})"
+
+
+class DrumBalance(models.Model):
+    """Текущий остаток барабана — сумма его движений; меняется атомарным приращением."""
+
+    drum = models.OneToOneField(
+        "catalog.Drum",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance",
+        verbose_name="Барабан"
+    )
+    balance_m = models.DecimalField(
+        verbose_name="Остаток, м",
+        max_digits=12, decimal_places=2,
+        default=Decimal("0.00")
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Обновлено",
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "Остаток барабана"
+        verbose_name_plural = "Остатки барабанов"
+
+    def __str__(self):
+        return f"{self.drum_id}: {self.balance_m} м"
+
+
+class DrumBalanceSnapshot(models.Model):
+    """Остаток барабана на момент taken_at — опорная точка для остатка на дату."""
+
+    drum = models.ForeignKey(
+        "catalog.Drum",
+        on_delete=models.CASCADE,
+        related_name="balance_snapshots",
+        verbose_name="Барабан"
+    )
+    taken_at = models.DateTimeField(
+        verbose_name="На момент"
+    )
+    balance_m = models.DecimalField(
+        verbose_name="Остаток, м",
+        max_digits=12, decimal_places=2
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["drum", "taken_at"], name="uq_drumsnapshot_drum_taken_at"),
+        ]
+        verbose_name = "Снимок остатка барабана"
+        verbose_name_plural = "Снимки остатков барабанов"
+
+    def __str__(self):
+        return f"{self.drum_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.balance_m} м"
+
+
+class ImportJob(TimeStampedModel):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Завершён"
+        FAILED = "failed", "Ошибка"
+
+    batch_number = models.CharField(
+        verbose_name="Номер партии",
+        max_length=64
+    )
+    storage = models.ForeignKey(
+        "storage.Storage",
+        on_delete=models.PROTECT,
+        related_name="import_jobs",
+        verbose_name="Склад"
+    )
+    file_name = models.CharField(
+        verbose_name="Имя файла",
+        max_length=255,
+        blank=True,
+        default=""
+    )
+    file_size = models.PositiveBigIntegerField(
+        verbose_name="Размер файла, байт",
+        default=0
+    )
+    # Файл в хранилище загрузок (upload_store)
+    file_sha256 = models.CharField(
+        verbose_name="SHA256",
+        max_length=64,
+        blank=True,
+        default=""
+    )
+    dry_run = models.BooleanField(
+        verbose_name="Только проверка",
+        default=False
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=16,
+        choices=Status.choices,
+        default=Status.QUEUED
+    )
+    rows_processed = models.PositiveBigIntegerField(
+        verbose_name="Обработано строк",
+        default=0
+    )
+    bytes_processed = models.PositiveBigIntegerField(
+        verbose_name="Прочитано байт",
+        default=0
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток",
+        default=0
+    )
+    worker = models.CharField(
+        verbose_name="Обработчик",
+        max_length=128,
+        blank=True,
+        default=""
+    )
+    started_at = models.DateTimeField("Начат", null=True, blank=True)
+    heartbeat_at = models.DateTimeField("Последний сигнал", null=True, blank=True)
+    finished_at = models.DateTimeField("Завершён", null=True, blank=True)
+    batch = models.ForeignKey(
+        "inventory.Batch",
+        on_delete=models.SET_NULL,
+        related_name="import_jobs",
+        null=True,
+        blank=True,
+        verbose_name="Партия"
+    )
+    result = models.JSONField(
+        verbose_name="Итоги",
+        default=dict,
+        blank=True
+    )
+    error = models.TextField(
+        verbose_name="Ошибка",
+        blank=True,
+        default=""
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            # Поиск ссылок на файл при очистке хранилища загрузок
+            models.Index(fields=["file_sha256"]),
+        ]
+        verbose_name = "Задача импорта"
+        verbose_name_plural = "Задачи импорта"
+        ordering = ["-created_at"]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @property
+    def progress_percent(self) -> int:
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.file_size:
+            return 0
+        return min(99, int(self.bytes_processed * 100 / self.file_size))
+
+    def __str__(self) -> str:
+        return f"ImportJob[{self.batch_number} | {self.file_name} | {self.status}]"
@@ -0,0 +1,79 @@
+from rest_framework import serializers
+
+from apps.catalog.models import Drum
+from apps.core.serializers import SparseFieldsMixin
+from apps.inventory.models import Batch, BatchItem
+from apps.storage.models import Storage
+
+
+class BatchSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Batch
+        fields = ("id", "number", "created_at", "updated_at")
+
+
+class BatchRefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Batch
+        fields = ("id", "number")
+
+
+class DrumRefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Drum
+        fields = ("id", "code")
+
+
+class StorageRefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Storage
+        fields = ("id", "code")
+
+
+class BatchItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    batch = BatchRefSerializer(read_only=True)
+    drum = DrumRefSerializer(read_only=True)
+    storage_location = StorageRefSerializer(read_only=True)
+
+    class Meta:
+        model = BatchItem
+        fields = (
+            "id", "batch", "number_in_batch", "drum", "storage_location", "length_m", "created_at", "updated_at",
+        )
+
+
+class BatchImportParamsSerializer(serializers.Serializer):
+    """Параметры потоковой загрузки CSV (в строке запроса; тело — сам CSV)."""
+
+    MODES = ("auto", "sync", "async")
+
+    batch = serializers.CharField(max_length=64, help_text="Номер партии.")
+    storage = serializers.CharField(help_text="Код склада.")
+    dry_run = serializers.BooleanField(default=False, help_text="Только проверить, ничего не записывая.")
+    mode = serializers.ChoiceField(
+        choices=MODES,
+        default="auto",
+        help_text="sync — импорт в запросе, async — задача в очереди; "
+                  "auto — в очереди, если тело больше CSV_IMPORT_API_SYNC_MAX_BYTES или его размер неизвестен.",
+    )
+    file_name = serializers.CharField(max_length=255, default="upload.csv", help_text="Имя файла для журнала.")
+
+    def validate_storage(self, value: str) -> Storage:
+        storage = Storage.objects.filter(code=value.strip().upper()).first()
+        if storage is None:
+            raise serializers.ValidationError(f"Склад '{value}' не найден.")
+        return storage
+
+
+class BatchItemExportParamsSerializer(serializers.Serializer):
+    """Параметры выгрузки позиций; без фильтров выгружаются все позиции."""
+
+    batch = serializers.CharField(max_length=64, required=False, help_text="Номер партии.")
+    storage = serializers.CharField(required=False, help_text="Код склада.")
+    output = serializers.ChoiceField(choices=("csv", "ndjson"), default="csv", help_text="Формат выгрузки.")
+
+    def validate_storage(self, value: str) -> Storage:
+        storage = Storage.objects.filter(code=value.strip().upper()).first()
+        if storage is None:
+            raise serializers.ValidationError(f"Склад '{value}' не найден.")
+        return storage
@@ -0,0 +1,107 @@
+"""
+Разбор и нормализация строк CSV импорта.
+
+Модуль не зависит от Django: его функции выполняются и в процессах пула
+параллельного разбора (см. import_parallel).
+
+Грамматика значений одна для всех движков импорта: только цифры ASCII, без разделителей «_»,
+пробелы по краям — только пробельные символы ASCII. Движок copy проверяет те же LENGTH_PATTERN
+и POSITION_PATTERN в SQL, numpy — в быстром пути, остальное передаёт сюда.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+REQUIRED_COLUMNS = {"drum_code", "length", "position"}
+# BatchItem.number_in_batch — integer PostgreSQL
+MAX_POSITION = 2_147_483_647
+# Пробельные символы по краям значений; NBSP и прочие пробелы Юникода — часть значения
+WHITESPACE = " \t\r\n\f\v"
+# Синтаксис одинаков у re и регулярных выражений PostgreSQL
+LENGTH_PATTERN = r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+POSITION_PATTERN = r"\+?[0-9]+"
+_LENGTH_RE = re.compile(LENGTH_PATTERN)
+_POSITION_RE = re.compile(POSITION_PATTERN)
+
+
+class RowError(ValueError):
+    """
+    Строка не прошла нормализацию; текст — без префикса «Строка N:».
+    code — код ошибки (см. import_errors), field и value — колонка CSV и её сырое значение.
+    """
+
+    def __init__(self, message: str, *, code: str, field: str, value: str | None = None):
+        super().__init__(message)
+        self.code = code
+        self.field = field
+        self.value = value
+
+
+def norm_code(v: str | None) -> str:
+    return (v or "").strip(WHITESPACE).upper()
+
+
+def parse_length(val: str | None) -> Decimal:
+    s = (val or "").strip(WHITESPACE)
+    if not s:
+        raise RowError("не задана длина.", code="empty_length", field="length", value=val)
+    s = s.replace(",", ".")
+    try:
+        # Decimal принимает и «1_000», цифры других письменностей, NaN — их отсекает шаблон
+        if not _LENGTH_RE.fullmatch(s):
+            raise InvalidOperation
+        d = Decimal(s)
+    except InvalidOperation:
+        raise RowError(f"некорректная длина '{val}'.", code="bad_length", field="length", value=val)
+    # NaN и Infinity с числами не сравниваются — некорректная длина, как в движке copy
+    if not d.is_finite():
+        raise RowError(f"некорректная длина '{val}'.", code="bad_length", field="length", value=val)
+    if d <= 0:
+        raise RowError(f"длина должна быть > 0 (получено {d}).", code="length_not_positive", field="length", value=val)
+    if d > Decimal("1000000"):
+        raise RowError(f"длина слишком большая ({d}).", code="length_too_big", field="length", value=val)
+    return d.quantize(Decimal("0.01"))
+
+
+def parse_position(val: str | None) -> int:
+    pos_val = (val or "").strip(WHITESPACE)
+    if not pos_val:
+        raise RowError("пустая position — строка пропущена.", code="empty_position", field="position", value=val)
+    try:
+        if not _POSITION_RE.fullmatch(pos_val):
+            raise ValueError
+        pos = int(pos_val)
+        if not 0 < pos <= MAX_POSITION:
+            raise ValueError
+    except Exception:
+        raise RowError(
+            f"некорректная position '{pos_val}' (ожидается положительное целое).",
+            code="bad_position", field="position", value=val,
+        )
+    return pos
+
+
+def normalize_row(raw_code: str | None, raw_length: str | None, raw_pos: str | None) -> tuple[str, Decimal, int]:
+    """Проверки первой фазы в исходном порядке: drum_code, length, position."""
+    drum_code = norm_code(raw_code)
+    if not drum_code:
+        raise RowError("пустой drum_code.", code="empty_drum_code", field="drum_code", value=raw_code)
+    return drum_code, parse_length(raw_length), parse_position(raw_pos)
+
+
+def header_columns(header: list[str]) -> dict[str, int]:
+    return {h.strip().lower(): i for i, h in enumerate(header)}
+
+
+def _cell(row: list[str], idx: int) -> str | None:
+    return row[idx] if idx < len(row) else None
+
+
+def iter_records(reader, columns: dict[str, int], *, first_line: int = 2):
+    """Отдаёт (номер строки, drum_code, length, position), пропуская пустые строки как csv.DictReader."""
+    i_code, i_len, i_pos = columns["drum_code"], columns["length"], columns["position"]
+    idx = first_line - 1
+    for row in reader:
+        if not row:
+            continue
+        idx += 1
+        yield idx, _cell(row, i_code), _cell(row, i_len), _cell(row, i_pos)
@@ -0,0 +1,108 @@
+import hashlib
+import os
+from collections.abc import Iterator
+from contextlib import nullcontext
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_file_chunks(file, chunk_size: int = READ_CHUNK_SIZE, *, start: int = 0) -> Iterator[bytes]:
+    """
+    Отдаёт содержимое загрузки кусками фиксированного размера, начиная с байта start.
+
+    Поддерживает bytes, путь к файлу, UploadedFile Django (в памяти и TemporaryUploadedFile
+    на диске) и любые файловые объекты с read().
+    """
+    if file is None:
+        return
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            yield from iter_file_chunks(f, chunk_size, start=start)
+        return
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        view = memoryview(file)
+        for pos in range(start, len(view), chunk_size):
+            yield bytes(view[pos:pos + chunk_size])
+        return
+    if hasattr(file, "chunks") and not start:
+        yield from file.chunks(chunk_size)
+        return
+    if hasattr(file, "seek"):
+        try:
+            file.seek(start)
+        except (OSError, ValueError):
+            if start:
+                raise
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        yield data
+
+
+class CsvLineSource:
+    """
+    Построчный источник для csv.reader поверх потока байтов.
+
+    За один проход считает SHA-256 всего файла и смещение (в байтах) последней
+    отданной строки. В памяти держится не больше одного куска чтения.
+    """
+
+    def __init__(self, file, *, chunk_size: int = READ_CHUNK_SIZE, start: int = 0, profile=None):
+        self._chunks = iter_file_chunks(file, chunk_size, start=start)
+        self._hasher = hashlib.sha256()
+        # BOM бывает только в начале файла
+        self._first = start == 0
+        self.bytes_read = start
+        self.offset = start
+        # Чтение и декодирование куска — фаза "decode" профиля импорта (см. import_profile)
+        self._profile = profile
+
+    def __iter__(self) -> Iterator[str]:
+        tail = b""
+        while True:
+            with self._profile.phase("decode") if self._profile is not None else nullcontext():
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    lines = [tail] if tail else []
+                else:
+                    self._hasher.update(chunk)
+                    self.bytes_read += len(chunk)
+                    if self._profile is not None:
+                        self._profile.bytes_read += len(chunk)
+                    lines = (tail + chunk).split(b"\n")
+                    tail = lines.pop()
+                    lines = [raw + b"\n" for raw in lines]
+                # Строки куска декодируются сразу, смещение сдвигается по мере выдачи
+                decoded = [(len(raw), self._decode(raw)) for raw in lines]
+            for size, line in decoded:
+                self.offset += size
+                yield line
+            if chunk is None:
+                return
+
+    def _decode(self, raw: bytes) -> str:
+        if self._first:
+            self._first = False
+            return raw.decode("utf-8-sig")
+        return raw.decode("utf-8")
+
+    def drain(self) -> None:
+        """Дочитывает остаток файла, чтобы контрольная сумма покрывала его целиком."""
+        for chunk in self._chunks:
+            self._hasher.update(chunk)
+            self.bytes_read += len(chunk)
+            if self._profile is not None:
+                self._profile.bytes_read += len(chunk)
+
+    @property
+    def sha256(self) -> str:
+        """Контрольная сумма прочитанного; для всего файла — только если чтение шло с начала."""
+        return self._hasher.hexdigest()
+
+
+def file_sha256(file, chunk_size: int = READ_CHUNK_SIZE) -> str:
+    hasher = hashlib.sha256()
+    for chunk in iter_file_chunks(file, chunk_size):
+        hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,175 @@
+"""
+Журнал движений по барабанам и остатки.
+
+Каждое изменение длины на барабане — новая строка DrumMovement (приход с импортом партии, отрез,
+перемотка, списание); строки не меняются и не удаляются. Текущий остаток хранится в DrumBalance
+и меняется атомарным приращением (UPDATE ... SET balance_m = balance_m + delta): блокировка строки
+остатка держится только до конца короткой транзакции движения, без SELECT ... FOR UPDATE.
+Расход проверяется тем же UPDATE (условие balance_m >= длины), поэтому остаток не уходит в минус.
+
+Остаток на дату — последний снимок DrumBalanceSnapshot не позже даты плюс короткий хвост журнала
+после снимка (индекс drum, created_at). Снимки делает take_snapshots (команда snapshot_drum_balances,
+например раз в сутки) — только по барабанам с движениями после их прошлого снимка. Снимок берётся
+на момент SNAPSHOT_LAG назад: движения, чьи транзакции ещё не зафиксированы, в него не попадут.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.inventory.models import DrumBalance, DrumBalanceSnapshot, DrumMovement
+from apps.inventory.services.summaries import SummaryDelta
+
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+
+def post_receipts(delta: SummaryDelta, *, batch_id: int, comment: str = "") -> None:
+    """
+    Приход на барабаны по строкам, вставленным импортом (или отмена прихода при отрицательных
+    приращениях), — одна строка журнала на барабан. Вызывается в транзакции импорта до apply_delta.
+    delta собирается только из RETURNING вставки (удаления): строки, пропущенные ON CONFLICT, прихода не дают.
+    """
+    if not delta:
+        return
+    drum_ids, _, cents = delta.arrays()
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            WITH t AS (
+                SELECT drum_id, cents / 100.0 AS delta_m
+                FROM unnest(%(drum_ids)s::bigint[], %(cents)s::bigint[]) AS t(drum_id, cents)
+                WHERE cents <> 0
+            ), mv AS (
+                INSERT INTO {DrumMovement._meta.db_table}
+                    (created_at, updated_at, drum_id, kind, delta_m, batch_id, comment)
+                SELECT %(now)s, %(now)s, drum_id, %(kind)s, delta_m, %(batch_id)s, %(comment)s FROM t
+            )
+            INSERT INTO {DrumBalance._meta.db_table} AS b (drum_id, balance_m, updated_at)
+            SELECT drum_id, delta_m, %(now)s FROM t
+            ORDER BY drum_id
+            ON CONFLICT (drum_id) DO UPDATE
+            SET balance_m = b.balance_m + EXCLUDED.balance_m, updated_at = EXCLUDED.updated_at
+            """,
+            {
+                "now": timezone.now(),
+                "drum_ids": drum_ids,
+                "cents": cents,
+                "kind": DrumMovement.Kind.RECEIPT,
+                "batch_id": batch_id,
+                "comment": comment,
+            },
+        )
+
+
+def _take(drum_id: int, length_m: Decimal) -> None:
+    """Уменьшает остаток, если его хватает; иначе ValueError."""
+    if length_m <= 0:
+        raise ValueError("Длина должна быть больше нуля.")
+    updated = DrumBalance.objects.filter(drum_id=drum_id, balance_m__gte=length_m).update(
+        balance_m=F("balance_m") - length_m, updated_at=timezone.now(),
+    )
+    if not updated:
+        raise ValueError(f"На барабане недостаточно кабеля для расхода {length_m} м.")
+
+
+def _put(drum_id: int, length_m: Decimal) -> None:
+    updated = DrumBalance.objects.filter(drum_id=drum_id).update(
+        balance_m=F("balance_m") + length_m, updated_at=timezone.now(),
+    )
+    if not updated:
+        # Первое движение барабана; параллельная вставка той же строки — повтор через приращение
+        _, created = DrumBalance.objects.get_or_create(drum_id=drum_id, defaults={"balance_m": length_m})
+        if not created:
+            _put(drum_id, length_m)
+
+
+def cut(drum, length_m: Decimal, *, comment: str = "") -> DrumMovement:
+    """Отрез с барабана."""
+    with transaction.atomic():
+        _take(drum.pk, length_m)
+        return DrumMovement.objects.create(drum=drum, kind=DrumMovement.Kind.CUT, delta_m=-length_m, comment=comment)
+
+
+def write_off(drum, length_m: Decimal, *, comment: str = "") -> DrumMovement:
+    """Списание с барабана (брак, остаток)."""
+    with transaction.atomic():
+        _take(drum.pk, length_m)
+        return DrumMovement.objects.create(
+            drum=drum, kind=DrumMovement.Kind.WRITE_OFF, delta_m=-length_m, comment=comment,
+        )
+
+
+def transfer(from_drum, to_drum, length_m: Decimal, *, comment: str = "") -> tuple[DrumMovement, DrumMovement]:
+    """Перемотка length_m с одного барабана на другой: расход и приход, связанные друг с другом."""
+    if from_drum.pk == to_drum.pk:
+        raise ValueError("Перемотка на тот же барабан.")
+    with transaction.atomic():
+        # Остатки меняются в порядке id барабанов — встречные перемотки не взаимоблокируются
+        for drum_id in sorted([from_drum.pk, to_drum.pk]):
+            if drum_id == from_drum.pk:
+                _take(drum_id, length_m)
+            else:
+                _put(drum_id, length_m)
+        out = DrumMovement.objects.create(
+            drum=from_drum, kind=DrumMovement.Kind.TRANSFER, delta_m=-length_m,
+            counterpart_drum=to_drum, comment=comment,
+        )
+        into = DrumMovement.objects.create(
+            drum=to_drum, kind=DrumMovement.Kind.TRANSFER, delta_m=length_m,
+            counterpart_drum=from_drum, comment=comment,
+        )
+    return out, into
+
+
+def balance(drum) -> Decimal:
+    """Текущий остаток барабана — одна строка DrumBalance."""
+    value = DrumBalance.objects.filter(drum_id=drum.pk).values_list("balance_m", flat=True).first()
+    return value if value is not None else Decimal("0.00")
+
+
+def balance_as_of(drum, at: datetime) -> Decimal:
+    """Остаток барабана на момент at: ближайший снимок не позже at и движения после него."""
+    snapshot = (
+        DrumBalanceSnapshot.objects.filter(drum_id=drum.pk, taken_at__lte=at)
+        .order_by("-taken_at")
+        .first()
+    )
+    tail = DrumMovement.objects.filter(drum_id=drum.pk, created_at__lte=at)
+    start = Decimal("0.00")
+    if snapshot is not None:
+        tail = tail.filter(created_at__gt=snapshot.taken_at)
+        start = snapshot.balance_m
+    return start + (tail.aggregate(s=Sum("delta_m"))["s"] or Decimal("0.00"))
+
+
+def take_snapshots(*, at: datetime | None = None) -> int:
+    """Снимки остатков на момент at (по умолчанию — SNAPSHOT_LAG назад); возвращает их число."""
+    at = at or timezone.now() - SNAPSHOT_LAG
+    movements = DrumMovement._meta.db_table
+    snapshots = DrumBalanceSnapshot._meta.db_table
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {snapshots} (drum_id, taken_at, balance_m)
+            SELECT b.drum_id, %(at)s, coalesce(s.balance_m, 0) + t.delta_m
+            FROM {DrumBalance._meta.db_table} b
+            LEFT JOIN LATERAL (
+                SELECT taken_at, balance_m FROM {snapshots}
+                WHERE drum_id = b.drum_id AND taken_at <= %(at)s
+                ORDER BY taken_at DESC
+                LIMIT 1
+            ) s ON true
+            CROSS JOIN LATERAL (
+                SELECT sum(m.delta_m) AS delta_m, count(*) AS n FROM {movements} m
+                WHERE m.drum_id = b.drum_id
+                  AND m.created_at > coalesce(s.taken_at, '-infinity')
+                  AND m.created_at <= %(at)s
+            ) t
+            WHERE t.n > 0
+            ON CONFLICT ON CONSTRAINT uq_drumsnapshot_drum_taken_at DO NOTHING
+            """,
+            {"at": at},
+        )
+        return cur.rowcount
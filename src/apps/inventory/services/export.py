@@ -0,0 +1,72 @@
+"""
+Потоковая выгрузка позиций партий в CSV или NDJSON.
+
+Строки читаются серверным курсором PostgreSQL (QuerySet.iterator) порциями по CSV_EXPORT_CHUNK_SIZE,
+только нужные столбцы (values_list), и отдаются кусками байтов по мере чтения: память не зависит
+от размера выгрузки, а заголовок уходит клиенту до первой выборки.
+
+CSV выгружается в формате импорта (position, drum_code, length) с дополнительными столбцами
+партии, склада и даты — файл одной партии можно загрузить обратно.
+"""
+import csv
+import io
+import json
+from collections.abc import Iterator
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils.text import get_valid_filename
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+COLUMNS = ("batch", "position", "drum_code", "storage_code", "length", "created_at")
+_FIELDS = ("batch__number", "number_in_batch", "drum__code", "storage_location__code", "length_m", "created_at")
+
+
+def export_rows(queryset: QuerySet, *, chunk_size: int | None = None) -> Iterator[tuple]:
+    """Строки выгрузки из выборки BatchItem в порядке партии и номера в партии."""
+    chunk_size = chunk_size or settings.CSV_EXPORT_CHUNK_SIZE
+    # Порядок совпадает с уникальным индексом (batch, number_in_batch) — строки идут без сортировки всей выборки
+    queryset = queryset.order_by("batch_id", "number_in_batch").values_list(*_FIELDS)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def iter_export(queryset: QuerySet, export_format: str, *, chunk_size: int | None = None) -> Iterator[bytes]:
+    """Выгрузка кусками байтов: заголовок (для CSV) и далее по куску на порцию курсора."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}.")
+    chunk_size = chunk_size or settings.CSV_EXPORT_CHUNK_SIZE
+    buf = io.StringIO()
+    if export_format == "csv":
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        write = writer.writerow
+    else:
+        def write(row):
+            buf.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False))
+            buf.write("\n")
+
+    def flush() -> bytes:
+        data = buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+    if export_format == "csv":
+        yield flush()
+    pending = 0
+    for batch, position, drum_code, storage_code, length_m, created_at in export_rows(queryset, chunk_size=chunk_size):
+        write((batch, position, drum_code, storage_code, str(length_m), created_at.isoformat()))
+        pending += 1
+        if pending >= chunk_size:
+            yield flush()
+            pending = 0
+    if pending:
+        yield flush()
+
+
+def export_filename(export_format: str, *, batch_number: str | None = None) -> str:
+    stem = get_valid_filename(f"batch-{batch_number}") if batch_number else "batch-items"
+    return f"{stem}.{export_format}"
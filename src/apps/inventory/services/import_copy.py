@@ -0,0 +1,252 @@
+"""
+Множественный (set-based) импорт для PostgreSQL.
+
+Сырые строки CSV потоково заливаются через COPY (psycopg3) в UNLOGGED-таблицу,
+после чего нормализация, проверки по каталогу барабанов и дубли позиций выполняются
+одним SQL-проходом, а вставка идёт через INSERT ... ON CONFLICT DO NOTHING RETURNING,
+что даёт точные числа вставленных строк и дублей.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.inventory.models import Batch, BatchItem
+from apps.inventory.services.csv_rows import LENGTH_PATTERN, MAX_POSITION, POSITION_PATTERN, WHITESPACE
+from apps.inventory.services.import_errors import RowIssue
+from apps.storage.models import Storage
+
+# Грамматика — из csv_rows (после замены запятой на точку); \d в PostgreSQL зависит от локали, здесь только [0-9]
+_LENGTH_RE = f"^{LENGTH_PATTERN}$"
+# Порядок от 10 000 по модулю не помещается в numeric: такие длины классифицируются по знакам
+_LENGTH_HUGE_EXP_RE = r"[eE][+-]?0*[1-9][0-9]{4,}$"
+_LENGTH_MANTISSA_RE = r"^([+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+))"
+_POSITION_RE = f"^{POSITION_PATTERN}$"
+
+# Округление до 0.01 по правилу банковского округления, как Decimal.quantize по умолчанию
+_ROUND_HALF_EVEN = """
+    CASE
+        WHEN len_num * 100 - floor(len_num * 100) = 0.5 AND mod(floor(len_num * 100), 2) = 0
+            THEN floor(len_num * 100) / 100
+        ELSE round(len_num, 2)
+    END
+"""
+
+
+def _line_issue(code: str, row) -> RowIssue:
+    line_no, drum_code, raw_length, raw_position, pos, length_m, init_len, min_len, max_len = row
+    if code == "empty_drum_code":
+        return RowIssue(line_no, code, "drum_code", drum_code, "пустой drum_code.")
+    if code == "empty_length":
+        return RowIssue(line_no, code, "length", raw_length, "не задана длина.")
+    if code == "bad_length":
+        return RowIssue(line_no, code, "length", raw_length, f"некорректная длина '{raw_length}'.")
+    if code == "length_not_positive":
+        return RowIssue(
+            line_no, code, "length", raw_length, f"длина должна быть > 0 (получено {_raw_decimal(raw_length)})."
+        )
+    if code == "length_too_big":
+        return RowIssue(line_no, code, "length", raw_length, f"длина слишком большая ({_raw_decimal(raw_length)}).")
+    if code == "empty_position":
+        return RowIssue(line_no, code, "position", raw_position, "пустая position — строка пропущена.")
+    if code == "bad_position":
+        return RowIssue(
+            line_no, code, "position", raw_position,
+            f"некорректная position '{(raw_position or '').strip(WHITESPACE)}' (ожидается положительное целое).",
+        )
+    if code == "drum_not_found":
+        return RowIssue(line_no, code, "drum_code", drum_code, f"барабан '{drum_code}' не найден в каталоге.")
+    if code == "length_exceeds_drum":
+        return RowIssue(
+            line_no, code, "length", str(length_m),
+            f"длина {length_m} м превышает первичную длину барабана {init_len} м.",
+        )
+    if code == "length_out_of_model":
+        return RowIssue(
+            line_no, code, "length", str(length_m),
+            f"длина {length_m} м вне диапазона модели кабеля барабана '{drum_code}': {min_len}–{max_len} м.",
+        )
+    if code == "duplicate_in_file":
+        return RowIssue(line_no, code, "position", str(pos), f"дублирование position {pos} в файле.")
+    raise ValueError(f"Неизвестный код ошибки: {code}")
+
+
+def _raw_decimal(raw: str | None) -> Decimal:
+    return Decimal((raw or "").strip(WHITESPACE).replace(",", "."))
+
+
+def copy_import_rows(
+    records, *, state, batch: Batch, storage_obj: Storage, accept, progress=None, progress_every: int = 5000
+) -> None:
+    """
+    Заливает записи (номер строки, drum_code, length, position) через COPY и выполняет
+    валидацию и вставку в SQL. Счётчики и тексты ошибок пишутся в state.
+
+    Должна вызываться внутри transaction.atomic(): промежуточные таблицы создаются
+    и удаляются в той же транзакции. Вставка выполняется, только если accept()
+    вернёт True для собранных счётчиков. progress(строк) вызывается каждые progress_every строк COPY.
+
+    Фазы профиля (state.profile): разбор CSV вместе с передачей через COPY — "parse", SQL-нормализация
+    вместе с поиском барабанов (JOIN с каталогом) — "normalize", дубли и счётчики — "validate".
+    """
+    suffix = uuid.uuid4().hex
+    stage = f"import_stage_{suffix}"
+    norm = f"import_norm_{suffix}"
+    item_table = BatchItem._meta.db_table
+
+    profile = state.profile
+    with connection.cursor() as cur:
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {stage} ("
+            f"line_no integer NOT NULL, drum_code text, length text, position text)"
+        )
+        copy_sql = f"COPY {stage} (line_no, drum_code, length, position) FROM STDIN"
+        with profile.phase("parse"), cur.copy(copy_sql) as copy:
+            for n, rec in enumerate(records, start=1):
+                copy.write_row(rec)
+                if progress is not None and n % progress_every == 0:
+                    progress(n)
+
+        with profile.phase("normalize"):
+            cur.execute(
+                f"""
+                CREATE UNLOGGED TABLE {norm} AS
+                WITH parsed AS (
+                    SELECT line_no,
+                           length AS raw_length,
+                           position AS raw_position,
+                           upper(btrim(coalesce(drum_code, ''), %(ws)s)) AS code,
+                           replace(btrim(coalesce(length, ''), %(ws)s), ',', '.') AS len_txt,
+                           btrim(coalesce(position, ''), %(ws)s) AS pos_txt
+                    FROM {stage}
+                ), typed AS MATERIALIZED (
+                    SELECT p.*,
+                           CASE
+                               WHEN len_txt !~ %(length_re)s THEN NULL
+                               WHEN len_txt !~ %(huge_exp_re)s THEN len_txt::numeric
+                               -- Как у Decimal: ноль, ±«слишком большая» или положительная, округляемая до 0.00
+                               WHEN substring(len_txt from %(mantissa_re)s)::numeric = 0 THEN 0
+                               WHEN len_txt ~ '[eE]-' THEN sign(substring(len_txt from %(mantissa_re)s)::numeric) * 0.001
+                               ELSE sign(substring(len_txt from %(mantissa_re)s)::numeric) * 10000000
+                           END AS len_num,
+                           -- Ведущие нули и длинные числа — через numeric, чтобы не переполнить bigint
+                           CASE
+                               WHEN pos_txt !~ %(position_re)s THEN NULL
+                               WHEN pos_txt::numeric BETWEEN 1 AND %(max_position)s THEN pos_txt::bigint
+                           END AS pos_num
+                    FROM parsed p
+                ), ranged AS MATERIALIZED (
+                    SELECT t.*,
+                           CASE WHEN len_num > 0 AND len_num <= 1000000
+                                THEN ({_ROUND_HALF_EVEN})::numeric(9, 2) END AS length_m
+                    FROM typed t
+                )
+                SELECT r.line_no, r.code, r.raw_length, r.raw_position,
+                       r.pos_num AS pos, r.length_m, d.id AS drum_id, d.initial_length_m,
+                       m.min_length_m, m.max_length_m,
+                       CASE
+                           WHEN r.code = '' THEN 'empty_drum_code'
+                           WHEN r.len_txt = '' THEN 'empty_length'
+                           WHEN r.len_num IS NULL THEN 'bad_length'
+                           WHEN r.len_num <= 0 THEN 'length_not_positive'
+                           WHEN r.len_num > 1000000 THEN 'length_too_big'
+                           WHEN r.pos_txt = '' THEN 'empty_position'
+                           WHEN r.pos_num IS NULL THEN 'bad_position'
+                           WHEN d.id IS NULL THEN 'drum_not_found'
+                           WHEN r.length_m > d.initial_length_m THEN 'length_exceeds_drum'
+                           WHEN r.length_m NOT BETWEEN m.min_length_m AND m.max_length_m THEN 'length_out_of_model'
+                       END AS error,
+                       false AS in_db,
+                       0 AS rn
+                FROM ranged r
+                LEFT JOIN catalog_drum d ON d.code = r.code
+                LEFT JOIN catalog_cablemodel m ON m.id = d.cable_model_id
+                """,
+                {
+                    "ws": WHITESPACE, "length_re": _LENGTH_RE, "huge_exp_re": _LENGTH_HUGE_EXP_RE,
+                    "mantissa_re": _LENGTH_MANTISSA_RE, "position_re": _POSITION_RE, "max_position": MAX_POSITION,
+                },
+            )
+
+        with profile.phase("validate"):
+            # Позиции, уже занятые в партии, и порядок строк внутри одной позиции
+            cur.execute(
+                f"""
+                UPDATE {norm} n
+                SET in_db = EXISTS (
+                        SELECT 1 FROM {item_table} bi
+                        WHERE bi.batch_id = %(batch_id)s AND bi.number_in_batch = n.pos
+                    ),
+                    rn = w.rn
+                FROM (
+                    SELECT line_no, row_number() OVER (PARTITION BY pos ORDER BY line_no) AS rn
+                    FROM {norm}
+                    WHERE error IS NULL
+                ) w
+                WHERE n.line_no = w.line_no
+                """,
+                {"batch_id": batch.id},
+            )
+            cur.execute(
+                f"""
+                UPDATE {norm} n
+                SET error = 'duplicate_in_file'
+                WHERE n.error IS NULL AND NOT n.in_db AND n.rn > 1
+                """
+            )
+
+            cur.execute(
+                f"""
+                SELECT count(*),
+                       count(*) FILTER (WHERE error IS NOT NULL AND error <> 'duplicate_in_file'),
+                       count(*) FILTER (WHERE error = 'duplicate_in_file'),
+                       count(*) FILTER (WHERE error IS NULL AND in_db)
+                FROM {norm}
+                """
+            )
+            state.total, state.invalid_rows, state.duplicates_in_file, state.duplicates_in_db = cur.fetchone()
+
+            # Серверный курсор: строки с ошибками читаются порциями, а не всем результатом сразу
+            with connection.chunked_cursor() as err_cur:
+                err_cur.execute(
+                    f"""
+                    SELECT error, line_no, code, raw_length, raw_position, pos, length_m, initial_length_m,
+                           min_length_m, max_length_m
+                    FROM {norm}
+                    WHERE error IS NOT NULL
+                    ORDER BY line_no
+                    """
+                )
+                for code, *row in err_cur:
+                    state.errors.append(_line_issue(code, row))
+
+        if accept():
+            with profile.phase("insert"):
+                now = timezone.now()
+                cur.execute(
+                    f"""
+                    WITH ins AS (
+                        INSERT INTO {item_table}
+                            (created_at, updated_at, batch_id, drum_id, storage_location_id, number_in_batch, length_m)
+                        SELECT %(now)s, %(now)s, %(batch_id)s, drum_id, %(storage_id)s, pos, length_m
+                        FROM {norm}
+                        WHERE error IS NULL AND NOT in_db
+                        ORDER BY pos
+                        ON CONFLICT ON CONSTRAINT uq_batch_number_in_batch DO NOTHING
+                        RETURNING drum_id, length_m
+                    )
+                    SELECT drum_id, count(*), sum(length_m * 100)::bigint FROM ins GROUP BY drum_id
+                    """,
+                    {"now": now, "batch_id": batch.id, "storage_id": storage_obj.id},
+                )
+                # Вставленные строки по барабанам — и для счётчика, и для сводок
+                inserted_by_drum = cur.fetchall()
+                state.summary.add_grouped(inserted_by_drum)
+                inserted = sum(count for _, count, _ in inserted_by_drum)
+                candidates = state.total - state.invalid_rows - state.duplicates_in_file - state.duplicates_in_db
+                # Строки, которые успела вставить параллельная транзакция, — тоже дубли в БД
+                state.duplicates_in_db += candidates - inserted
+                state.inserted = inserted
+
+        cur.execute(f"DROP TABLE {norm}, {stage}")
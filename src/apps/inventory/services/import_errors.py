@@ -0,0 +1,138 @@
+"""
+Сбор ошибок строк импорта в фиксированной памяти.
+
+Каждая ошибка — структурированная запись (номер строки, код, колонка, значение, текст).
+В памяти остаются только счётчики по кодам и первые по номеру строки sample_size сообщений — они
+попадают в ImportLog. Движки находят ошибки куска не по порядку строк (сначала разбора, затем
+проверок по каталогу), поэтому выборка — куча по номеру строки, а не первые добавленные. Все отклонённые строки потоково пишутся в сжатый CSV во временном файле,
+который после импорта сохраняется рядом с логом (ImportLog.rejected_rows).
+
+Модуль не зависит от Django: записи ошибок собираются и в процессах пула параллельного разбора.
+"""
+import csv
+import gzip
+import heapq
+import io
+import tempfile
+from collections import Counter
+from typing import NamedTuple
+
+# Сколько сообщений об ошибках сохраняется в ImportLog.errors
+ERROR_SAMPLE_SIZE = 100
+
+# Коды ошибок строк и их названия для отчётов
+ERROR_CODES = {
+    "empty_drum_code": "Пустой drum_code",
+    "empty_length": "Не задана длина",
+    "bad_length": "Некорректная длина",
+    "length_not_positive": "Длина ≤ 0",
+    "length_too_big": "Слишком большая длина",
+    "empty_position": "Пустая position",
+    "bad_position": "Некорректная position",
+    "drum_not_found": "Барабан не найден",
+    "length_exceeds_drum": "Длина больше первичной длины барабана",
+    "length_out_of_model": "Длина вне диапазона модели кабеля",
+    "duplicate_in_file": "Дубль position в файле",
+}
+
+REJECTED_ROWS_HEADER = ("line", "code", "field", "value", "message")
+
+
+class RowIssue(NamedTuple):
+    line: int
+    code: str
+    field: str
+    value: str | None
+    message: str
+
+    @property
+    def text(self) -> str:
+        return f"Строка {self.line}: {self.message}"
+
+
+class ImportErrors:
+    """
+    Счётчики ошибок по кодам, ограниченная выборка сообщений и gzip-CSV всех отклонённых строк.
+
+    Пустой файл отклонённых строк не создаётся: временный файл открывается при первой ошибке.
+    """
+
+    def __init__(self, *, sample_size: int = ERROR_SAMPLE_SIZE, counts=None, sample=None, write_header: bool = True):
+        self.sample_size = sample_size
+        self.counts: Counter[str] = Counter(counts or {})
+        # Куча (-строка, -порядковый номер, текст): на вершине — последняя по строке запись выборки.
+        # Выборка, сохранённая до контрольной точки, предшествует всем новым строкам — строка 0
+        self._sample: list[tuple[int, int, str]] = [(0, -n, text) for n, text in enumerate(sample or [])]
+        heapq.heapify(self._sample)
+        self._seq = len(self._sample)
+        # При продолжении импорта строки дописываются к уже сохранённому файлу — без заголовка
+        self.write_header = write_header
+        self._raw = None
+        self._text = None
+        self._writer = None
+
+    def __len__(self) -> int:
+        return self.counts.total()
+
+    @property
+    def sample(self) -> list[str]:
+        """Первые по номеру строки сообщения."""
+        return [text for _, _, text in sorted(self._sample, reverse=True)]
+
+    def __bool__(self) -> bool:
+        return bool(self.counts)
+
+    def add(self, line: int, code: str, field: str, value, message: str) -> None:
+        self.append(RowIssue(line, code, field, None if value is None else str(value), message))
+
+    def append(self, issue: RowIssue) -> None:
+        self.counts[issue.code] += 1
+        entry = (-issue.line, -self._seq, issue.text)
+        self._seq += 1
+        if len(self._sample) < self.sample_size:
+            heapq.heappush(self._sample, entry)
+        elif self.sample_size and entry > self._sample[0]:
+            heapq.heapreplace(self._sample, entry)
+        if self._writer is None:
+            self._open()
+        self._writer.writerow(issue)
+
+    def extend(self, issues) -> None:
+        for issue in issues:
+            self.append(issue)
+
+    def _open(self) -> None:
+        self._raw = tempfile.TemporaryFile(suffix=".csv.gz")
+        gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        # utf-8-sig: BOM нужен, чтобы Excel открыл кириллицу без выбора кодировки; только в начале файла
+        encoding = "utf-8-sig" if self.write_header else "utf-8"
+        self._text = io.TextIOWrapper(gz, encoding=encoding, newline="")
+        self._writer = csv.writer(self._text)
+        if self.write_header:
+            self._writer.writerow(REJECTED_ROWS_HEADER)
+
+    def rejected_rows_file(self):
+        """
+        Завершает запись и возвращает временный файл с gzip-CSV (позиция — в начале)
+        или None, если ошибок не было. Закрывать файл — на вызывающем коде (см. close()).
+        """
+        if self._raw is None:
+            return None
+        if self._text is not None:
+            # Закрывает GzipFile (дописывает трейлер), но не сам временный файл
+            self._text.close()
+            self._text = None
+        self._raw.seek(0)
+        return self._raw
+
+    def close(self) -> None:
+        """Освобождает временный файл; счётчики и выборка сохраняются, следующие ошибки пишутся в новый файл."""
+        if self._raw is not None:
+            self.write_header = False
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+        self._writer = None
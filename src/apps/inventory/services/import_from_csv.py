@@ -1,17 +1,67 @@
 import csv
 import hashlib
-import io
+import os
+import shutil
 import time
-from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import islice
 
-from django.db import transaction
+import numpy as np
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
 
 from apps.audit.models import ImportLog
-from apps.catalog.models import Drum
+from apps.catalog.cache import get_catalog_cache
+from apps.core.query_budget import query_budget
 from apps.inventory.models import Batch, BatchItem
+from apps.inventory.services.csv_rows import (
+    REQUIRED_COLUMNS,
+    RowError,
+    header_columns,
+    iter_records,
+    norm_code,
+    normalize_row,
+)
+from apps.inventory.services.csv_source import CsvLineSource, file_sha256
+from apps.inventory.services.drum_ledger import post_receipts
+from apps.inventory.services import import_numpy
+from apps.inventory.services.import_copy import copy_import_rows
+from apps.inventory.services.import_errors import ImportErrors
+from apps.inventory.services.import_metrics import observe_import
+from apps.inventory.services.import_parallel import iter_parsed_ranges, local_path
+from apps.inventory.services.import_plan import (
+    ImportPlan,
+    PlanBuilder,
+    insert_items,
+    insert_plan,
+    plans_enabled,
+    save_plan,
+    take_plan,
+)
+from apps.inventory.services.import_profile import ImportProfile
+from apps.inventory.services.positions import BatchPositions, PositionSet
+from apps.inventory.services.summaries import SummaryDelta, apply_delta
 from apps.storage.models import Storage
 
+# Сколько строк CSV валидируется и вставляется за один шаг потоковой обработки
+IMPORT_CHUNK_ROWS = 5000
+# Сколько позиций удаляется одним запросом при откате импорта с фиксацией кусками
+DELETE_CHUNK_ROWS = 50_000
+
+# python — построчная проверка в Python; numpy — те же проверки масками над массивами;
+# copy — COPY во временную таблицу и проверки в SQL
+IMPORT_ENGINES = ("python", "numpy", "copy")
+
+REJECTION_MESSAGES = {
+    "empty": "Файл не содержит данных.",
+    "duplicate_file": "Файл уже был обработан для этой партии.",
+    "error_ratio": "В файле более 50% ошибок. Загрузка отменена.",
+}
+
 
 @dataclass(frozen=True)
 class ImportResult:
@@ -20,51 +70,454 @@ class ImportResult:
     duplicates_in_file: int
     duplicates_in_db: int
     invalid_rows: int
+    # Первые ERROR_SAMPLE_SIZE сообщений; полный список — в ImportLog.rejected_rows
     errors: list[str]
     batch_id: int | None = None
     file_name: str | None = None
     file_sha256: str | None = None
+    error_counts: dict[str, int] = field(default_factory=dict)
+    # Проверка без записи: inserted — сколько строк было бы вставлено, rejection — почему импорт был бы отклонён
+    dry_run: bool = False
+    rejection: str = ""
+
+
+@dataclass
+class _ImportState:
+    total: int = 0
+    inserted: int = 0
+    duplicates_in_file: int = 0
+    duplicates_in_db: int = 0
+    invalid_rows: int = 0
+    errors: ImportErrors = field(default_factory=ImportErrors)
+    # Индекс позиций партии: принятые из файла и занятые в БД (см. positions)
+    positions: BatchPositions | None = None
+    # При проверке без записи принятые строки собираются в план вместо вставки
+    plan: PlanBuilder | None = None
+    # Приращения по вставленным строкам для сводок и остатков барабанов; применяются в транзакции импорта
+    summary: SummaryDelta = field(default_factory=SummaryDelta)
+    # Время по фазам, SQL и память — в ImportLog.profile
+    profile: ImportProfile = field(default_factory=ImportProfile)
+
+
+def _read_chunk(records, size: int, *, state: _ImportState) -> list:
+    with state.profile.phase("parse"):
+        return list(islice(records, size))
+
+
+def _next_part(parts, *, state: _ImportState):
+    # Разбор и нормализация диапазонов идут в пуле процессов: в фазу "parse" попадает ожидание готового
+    with state.profile.phase("parse"):
+        return next(parts, None)
+
+
+def _normalize_chunk(records, *, state: _ImportState) -> list[tuple[int, str, Decimal, int]]:
+    """Первая фаза: разбор и нормализация строк."""
+    norm_rows = []
+    for idx, raw_code, raw_length, raw_pos in records:
+        state.total += 1
+        try:
+            drum_code, length, pos = normalize_row(raw_code, raw_length, raw_pos)
+        except RowError as e:
+            state.invalid_rows += 1
+            state.errors.add(idx, e.code, e.field, e.value, str(e))
+            continue
+        norm_rows.append((idx, drum_code, length, pos))
+    return norm_rows
+
 
+def _validate_and_insert(norm_rows, *, state: _ImportState, batch: Batch, storage_obj: Storage) -> None:
+    """Вторая фаза: проверки по каталогу и дублям, вставка прошедших строк."""
+    if not norm_rows:
+        return
+    errors = state.errors
 
-def _b(value) -> bytes:
-    if value is None:
-        return b""
-    if isinstance(value, (bytes, bytearray)):
-        return bytes(value)
-    if hasattr(value, "read"):
-        return value.read()
-    return bytes(value)
+    # Барабаны берутся из кэша справочника, занятые позиции — только для строк текущего куска
+    codes = {code for _, code, _, _ in norm_rows}
+    with state.profile.phase("drum_lookup"):
+        drums_by_code = get_catalog_cache().drums(codes)
+    if state.plan is not None:
+        state.plan.note_drums(codes, drums_by_code)
 
+    # Какие позиции куска уже приняты из файла или заняты в БД — одним запросом к индексу позиций
+    chunk_positions = np.fromiter((pos for _, _, _, pos in norm_rows), dtype=np.int64, count=len(norm_rows))
+    used_positions_in_file = set(chunk_positions[state.positions.in_file(chunk_positions)].tolist())
+    existing_positions = set(chunk_positions[state.positions.in_db(chunk_positions)].tolist())
 
-def _sha256(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+    accepted: list[tuple[int, int, Decimal]] = []
+    for (idx, drum_code, length, pos) in norm_rows:
+        drum = drums_by_code.get(drum_code)
+        if not drum:
+            state.invalid_rows += 1
+            errors.add(idx, "drum_not_found", "drum_code", drum_code, f"барабан '{drum_code}' не найден в каталоге.")
+            continue
+        drum_id, init_len = drum.id, drum.initial_length_m
 
+        # Длина > первичной длины барабана
+        if init_len is not None and length > init_len:
+            state.invalid_rows += 1
+            errors.add(
+                idx, "length_exceeds_drum", "length", length,
+                f"длина {length} м превышает первичную длину барабана {init_len} м.",
+            )
+            continue
 
-def _norm_code(v: str | None) -> str:
-    return (v or "").strip().upper()
+        # Длина вне диапазона модели кабеля барабана
+        if not (drum.min_length_m <= length <= drum.max_length_m):
+            state.invalid_rows += 1
+            errors.add(
+                idx, "length_out_of_model", "length", length,
+                f"длина {length} м вне диапазона модели кабеля барабана '{drum_code}': "
+                f"{drum.min_length_m}–{drum.max_length_m} м.",
+            )
+            continue
 
+        # Дубли позиций в файле/БД
+        if pos in used_positions_in_file:
+            state.duplicates_in_file += 1
+            errors.add(idx, "duplicate_in_file", "position", pos, f"дублирование position {pos} в файле.")
+            continue
+        if pos in existing_positions:
+            state.duplicates_in_db += 1
+            continue
 
-def _parse_length(val: str, *, line_no: int, errors: list[str]) -> Decimal | None:
-    s = (val or "").strip()
-    if not s:
-        errors.append(f"Строка {line_no}: не задана длина.")
-        return None
-    s = s.replace(",", ".")
+        used_positions_in_file.add(pos)
+        accepted.append((pos, drum_id, length))
+
+    if not accepted:
+        return
+    positions, drum_ids, cents = zip(*((pos, drum_id, int(length.scaleb(2))) for pos, drum_id, length in accepted))
+    if state.plan is not None:
+        state.positions.accept(positions)
+        state.plan.add(positions, drum_ids, cents)
+        state.inserted += len(accepted)
+        return
+    with state.profile.phase("insert"):
+        positions, drum_ids, cents = insert_items(positions, drum_ids, cents, batch=batch, storage_id=storage_obj.id)
+    # Счётчики, сводки и принятые позиции — только по вставленным строкам: позиции, занятые после чтения
+    # индекса (параллельный импорт в ту же партию), считаются дублями в БД
+    state.positions.accept(positions)
+    state.inserted += len(positions)
+    state.duplicates_in_db += len(accepted) - len(positions)
+    state.summary.add(drum_ids, cents)
+
+
+def _rewindable(file) -> bool:
+    """Можно ли прочитать файл ещё раз (отдельный проход SHA-256, продолжение с контрольной точки)."""
+    if isinstance(file, (str, os.PathLike, bytes, bytearray, memoryview)):
+        return True
+    seekable = getattr(file, "seekable", None)
+    return bool(seekable and seekable())
+
+
+def _post_inserted(delta: SummaryDelta, *, batch_id: int, storage_id: int, comment: str = "") -> None:
+    """Приход на барабаны и сводки по вставленным (при отмене — удалённым) строкам, в текущей транзакции."""
+    post_receipts(delta, batch_id=batch_id, comment=comment)
+    apply_delta(delta, batch_id=batch_id, storage_id=storage_id)
+
+
+def _already_imported(batch: Batch, file_sha: str) -> bool:
+    """Есть ли завершённый импорт файла с этой sha в партию (индекс по batch, file_sha256)."""
+    if batch.pk is None:
+        return False
+    return ImportLog.objects.filter(batch=batch, file_sha256=file_sha, checkpoint__isnull=True).exists()
+
+
+def _save_rejected_rows(log: ImportLog, errors: ImportErrors) -> None:
+    """Сохраняет gzip-CSV отклонённых строк рядом с логом импорта и освобождает временный файл."""
     try:
-        d = Decimal(s)
-    except InvalidOperation:
-        errors.append(f"Строка {line_no}: некорректная длина '{val}'.")
-        return None
-    if d <= 0:
-        errors.append(f"Строка {line_no}: длина должна быть > 0 (получено {d}).")
-        return None
-    if d > Decimal("1000000"):
-        errors.append(f"Строка {line_no}: длина слишком большая ({d}).")
-        return None
-    return d.quantize(Decimal("0.01"))
-
-
-def import_batch_from_csv(*, file, batch_number: str, storage) -> ImportResult:
+        f = errors.rejected_rows_file()
+        if f is None:
+            pass
+        elif log.rejected_rows:
+            # gzip допускает склейку потоков: продолжение импорта дописывает новый поток в конец файла
+            with log.rejected_rows.storage.open(log.rejected_rows.name, "ab") as out:
+                shutil.copyfileobj(f, out)
+        else:
+            log.rejected_rows.save(f"rejected_rows_{log.pk}.csv.gz", File(f), save=False)
+            log.save(update_fields=["rejected_rows", "updated_at"])
+    finally:
+        errors.close()
+
+
+def _save_checkpoint(log: ImportLog, state: _ImportState, *, offset: int, line: int, duration: float) -> None:
+    log.total = state.total
+    log.inserted = state.inserted
+    log.duplicates_in_file = state.duplicates_in_file
+    log.duplicates_in_db = state.duplicates_in_db
+    log.invalid_rows = state.invalid_rows
+    log.errors = state.errors.sample
+    log.error_counts = dict(state.errors.counts)
+    log.duration_sec = Decimal(str(round(duration, 3)))
+    log.checkpoint = {
+        "offset": offset,
+        "line": line,
+        "duration_sec": duration,
+        # Файл отклонённых строк пишется вне транзакции: при продолжении лишний хвост обрезается
+        "rejected_rows_size": log.rejected_rows.size if log.rejected_rows else 0,
+    }
+    log.checkpoint_positions = state.positions.accepted.to_bytes()
+    log.profile = state.profile.as_dict()
+    log.save(update_fields=[
+        "total", "inserted", "duplicates_in_file", "duplicates_in_db", "invalid_rows", "errors",
+        "error_counts", "duration_sec", "checkpoint", "checkpoint_positions", "profile", "updated_at",
+    ])
+
+
+def _finish_log(log: ImportLog, profile: ImportProfile, *, duration: float) -> None:
+    """Длительность и профиль — последней записью лога, чтобы в них вошли вставка и запись самого лога."""
+    log.duration_sec = Decimal(str(round(duration, 3)))
+    log.profile = profile.as_dict()
+    ImportLog.objects.filter(pk=log.pk).update(duration_sec=log.duration_sec, profile=log.profile)
+
+
+def _delete_accepted(batch: Batch, positions: PositionSet, *, storage_obj: Storage) -> None:
+    """Откат импорта с фиксацией кусками: удаляет строки, вставленные им в партию, и вычитает их из сводок и остатков."""
+    table = BatchItem._meta.db_table
+    accepted = positions.to_array()
+    removed = SummaryDelta()
+    with transaction.atomic(), connection.cursor() as cur:
+        for i in range(0, len(accepted), DELETE_CHUNK_ROWS):
+            cur.execute(
+                f"""
+                WITH del AS (
+                    DELETE FROM {table} WHERE batch_id = %s AND number_in_batch = ANY(%s)
+                    RETURNING drum_id, length_m
+                )
+                SELECT drum_id, count(*), sum(length_m * 100)::bigint FROM del GROUP BY drum_id
+                """,
+                [batch.id, accepted[i:i + DELETE_CHUNK_ROWS].tolist()],
+            )
+            removed.add_grouped(cur.fetchall(), sign=-1)
+        _post_inserted(removed, batch_id=batch.id, storage_id=storage_obj.id, comment="Отмена импорта")
+
+
+def _import_resumable(
+    *,
+    file,
+    file_sha: str,
+    header_offset: int,
+    columns: dict[str, int],
+    batch: Batch,
+    storage_obj: Storage,
+    engine: str,
+    chunk_rows: int,
+    commit_rows: int,
+    file_name: str,
+    progress: Callable[[int, int], None] | None,
+    profile: ImportProfile,
+) -> ImportResult:
+    """
+    Импорт с фиксацией каждые commit_rows строк. После каждого коммита в ImportLog пишется
+    контрольная точка: смещение в файле, номер строки, счётчики и принятые позиции.
+    Повторный запуск того же файла для той же партии продолжает с последней точки.
+    """
+    t0 = time.perf_counter()
+    # Завершённые импорты этого файла отклонены до разбора; здесь — только незавершённый
+    log = (
+        ImportLog.objects.filter(batch=batch, file_sha256=file_sha, checkpoint__isnull=False)
+        .order_by("-created_at")
+        .first()
+    )
+
+    if log is None:
+        log = ImportLog.objects.create(
+            batch=batch,
+            file_name=file_name or "",
+            file_sha256=file_sha,
+            checkpoint={"offset": header_offset, "line": 1, "duration_sec": 0.0, "rejected_rows_size": 0},
+        )
+        state = _ImportState(positions=BatchPositions(batch), profile=profile)
+    else:
+        accepted = PositionSet.from_bytes(bytes(log.checkpoint_positions)) if log.checkpoint_positions else None
+        if log.rejected_rows:
+            with log.rejected_rows.storage.open(log.rejected_rows.name, "r+b") as f:
+                f.truncate(log.checkpoint["rejected_rows_size"])
+        state = _ImportState(
+            total=log.total,
+            inserted=log.inserted,
+            duplicates_in_file=log.duplicates_in_file,
+            duplicates_in_db=log.duplicates_in_db,
+            invalid_rows=log.invalid_rows,
+            errors=ImportErrors(counts=log.error_counts, sample=log.errors, write_header=not log.rejected_rows),
+            positions=BatchPositions(batch, accepted=accepted),
+            profile=profile,
+        )
+        profile.resume(log.profile)
+    line = log.checkpoint["line"]
+    duration_before = log.checkpoint["duration_sec"]
+
+    source = CsvLineSource(file, start=log.checkpoint["offset"], profile=profile)
+    records = iter_records(csv.reader(source), columns, first_line=line + 1)
+    if engine == "numpy":
+        normalize, validate = import_numpy.normalize_chunk, import_numpy.validate_and_insert
+    else:
+        normalize, validate = _normalize_chunk, _validate_and_insert
+
+    while part := _read_chunk(records, commit_rows, state=state):
+        with profile.on_exit("commit", transaction.atomic()):
+            for i in range(0, len(part), chunk_rows):
+                with profile.phase("normalize"):
+                    norm_rows = normalize(part[i:i + chunk_rows], state=state)
+                with profile.phase("validate"):
+                    validate(norm_rows, state=state, batch=batch, storage_obj=storage_obj)
+            with profile.phase("insert"):
+                _post_inserted(state.summary, batch_id=batch.id, storage_id=storage_obj.id)
+            line = part[-1][0]
+            with profile.phase("log"):
+                _save_rejected_rows(log, state.errors)
+                _save_checkpoint(
+                    log, state, offset=source.offset, line=line, duration=duration_before + time.perf_counter() - t0
+                )
+        if progress is not None:
+            progress(state.total, source.bytes_read)
+
+    total = state.total
+    log.checkpoint = None
+    log.checkpoint_positions = None
+
+    # Нет данных в файле
+    if total == 0:
+        log.errors = ["Файл не содержит данных."]
+        log.duration_sec = Decimal("0.000")
+        log.save()
+        raise ValueError(REJECTION_MESSAGES["empty"])
+
+    # Порог 50% ошибок: зафиксированные куски откатываются удалением вставленных строк
+    file_quality_errors = state.invalid_rows + state.duplicates_in_file
+    if file_quality_errors / total > 0.5:
+        _delete_accepted(batch, state.positions.accepted, storage_obj=storage_obj)
+        log.inserted = 0
+        log.errors = state.errors.sample + [
+            f"Порог >50% ошибок ({file_quality_errors}/{total}) — загрузка отменена."
+        ]
+        with profile.phase("log"):
+            log.save()
+        _finish_log(log, profile, duration=duration_before + time.perf_counter() - t0)
+        raise ValueError(REJECTION_MESSAGES["error_ratio"])
+
+    with profile.phase("log"):
+        log.save()
+    _finish_log(log, profile, duration=duration_before + time.perf_counter() - t0)
+    return ImportResult(
+        total=total,
+        inserted=state.inserted,
+        duplicates_in_file=state.duplicates_in_file,
+        duplicates_in_db=state.duplicates_in_db,
+        invalid_rows=state.invalid_rows,
+        errors=state.errors.sample,
+        batch_id=batch.id,
+        file_name=file_name,
+        file_sha256=file_sha,
+        error_counts=dict(state.errors.counts),
+    )
+
+
+def _import_from_plan(
+    plan: ImportPlan, *, batch: Batch, file_sha: str, file_name: str, t0: float, profile: ImportProfile,
+) -> ImportResult:
+    """Импорт по плану проверки без записи: строки уже проверены, остаётся вставка."""
+    with profile.on_exit("commit", transaction.atomic()):
+        with profile.phase("insert"):
+            summary = SummaryDelta()
+            inserted = insert_plan(plan, batch=batch, summary=summary)
+            _post_inserted(summary, batch_id=batch.id, storage_id=plan.storage_id)
+        # Позиции, занятые в партии после проверки, — тоже дубли в БД
+        duplicates_in_db = plan.duplicates_in_db + len(plan) - inserted
+        with profile.phase("log"):
+            log = ImportLog.objects.create(
+                batch=batch,
+                file_name=file_name or "",
+                file_sha256=file_sha,
+                total=plan.total,
+                inserted=inserted,
+                duplicates_in_file=plan.duplicates_in_file,
+                duplicates_in_db=duplicates_in_db,
+                invalid_rows=plan.invalid_rows,
+                errors=plan.errors,
+                error_counts=plan.error_counts,
+            )
+    with profile.phase("log"):
+        if plan.rejected_rows:
+            log.rejected_rows.save(f"rejected_rows_{log.pk}.csv.gz", ContentFile(plan.rejected_rows), save=False)
+            log.save(update_fields=["rejected_rows", "updated_at"])
+    _finish_log(log, profile, duration=time.perf_counter() - t0)
+
+    return ImportResult(
+        total=plan.total,
+        inserted=inserted,
+        duplicates_in_file=plan.duplicates_in_file,
+        duplicates_in_db=duplicates_in_db,
+        invalid_rows=plan.invalid_rows,
+        errors=plan.errors,
+        batch_id=batch.id,
+        file_name=file_name,
+        file_sha256=file_sha,
+        error_counts=plan.error_counts,
+    )
+
+
+def _dry_run_result(
+    state: _ImportState, *, rejection: str | None, batch: Batch, storage_obj: Storage, file_sha: str, file_name: str,
+) -> ImportResult:
+    """Итог проверки без записи; если импорт не был бы отклонён, план кладётся в кэш."""
+    errors = state.errors.sample
+    if rejection == "error_ratio":
+        file_quality_errors = state.invalid_rows + state.duplicates_in_file
+        errors = errors + [f"Порог >50% ошибок ({file_quality_errors}/{state.total}) — загрузка отменена."]
+
+    plan = state.plan
+    try:
+        if rejection is None and plans_enabled() and not plan.overflow and storage_obj.pk is not None:
+            f = state.errors.rejected_rows_file()
+            positions, drum_ids, cents = plan.arrays()
+            save_plan(batch.number, file_sha, ImportPlan(
+                storage_id=storage_obj.pk,
+                positions=positions,
+                drum_ids=drum_ids,
+                cents=cents,
+                total=state.total,
+                duplicates_in_file=state.duplicates_in_file,
+                duplicates_in_db=state.duplicates_in_db,
+                invalid_rows=state.invalid_rows,
+                errors=errors,
+                error_counts=dict(state.errors.counts),
+                drums=plan.drums,
+                rejected_rows=f.read() if f is not None else None,
+            ))
+    finally:
+        state.errors.close()
+
+    return ImportResult(
+        total=state.total,
+        inserted=0 if rejection else state.inserted,
+        duplicates_in_file=state.duplicates_in_file,
+        duplicates_in_db=state.duplicates_in_db,
+        invalid_rows=state.invalid_rows,
+        errors=errors,
+        batch_id=batch.pk,
+        file_name=file_name,
+        file_sha256=file_sha,
+        error_counts=dict(state.errors.counts),
+        dry_run=True,
+        rejection=REJECTION_MESSAGES.get(rejection, ""),
+    )
+
+
+@query_budget()
+def import_batch_from_csv(
+    *,
+    file,
+    batch_number: str,
+    storage,
+    engine: str = "python",
+    chunk_rows: int = IMPORT_CHUNK_ROWS,
+    file_name: str | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    workers: int = 1,
+    commit_rows: int = 0,
+    dry_run: bool = False,
+    file_sha: str | None = None,
+) -> ImportResult:
     """
     Импорт CSV формата: position, drum_code, length
 
@@ -73,35 +526,158 @@ def import_batch_from_csv(*, file, batch_number: str, storage) -> ImportResult:
     - Если >50% строк файла с ошибками (валидация/дубли в файле) — создаём ImportLog (с ошибкой) и бросаем исключение.
     - Всегда создаём новый ImportLog. Если (batch+sha256) уже встречались — пишем новый лог с ошибкой «файл уже обработан» и бросаем исключение.
     - drum_code должен существовать в каталоге; иначе строка — ошибка и пропуск.
-    - Длина > 0 и ≤ стандартной длины барабана (initial_length_m, если задана).
+    - Длина > 0 и ≤ стандартной длины барабана (initial_length_m, если задана),
+      а также в пределах min_length_m..max_length_m модели кабеля барабана.
     - Позиции не должны повторяться (ни в файле, ни в БД).
-    """
-    t0 = time.perf_counter()
-    content = _b(file)
-    file_name = getattr(file, "name", "uploaded.csv")
-    file_sha = _sha256(content)
 
-    decoded = content.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(decoded))
-    headers = {h.strip().lower() for h in (reader.fieldnames or [])}
-    required = {"drum_code", "length", "position"}
+    Файл читается потоково: SHA-256 и разбор CSV считаются за один проход, проверки и вставка
+    идут кусками по chunk_rows строк внутри одной транзакции, поэтому память не зависит от размера файла.
+    Если после разбора импорт нужно отклонить (пустой файл, повтор, >50% ошибок), транзакция откатывается.
+
+    Ошибки строк собираются в фиксированной памяти (см. import_errors): в ImportLog попадают счётчики
+    по кодам и первые ERROR_SAMPLE_SIZE сообщений, а все отклонённые строки — в сжатый CSV
+    ImportLog.rejected_rows. ImportResult.errors содержит ту же ограниченную выборку.
+
+    engine="numpy" выполняет те же проверки над кусками как над массивами (длины — в целых сантиметрах),
+    без построчной арифметики Decimal; результат и тексты ошибок совпадают с engine="python".
+
+    engine="copy" переносит нормализацию, проверки и вставку в PostgreSQL (см. import_copy).
+
+    Все движки вставляют строки через INSERT ... ON CONFLICT DO NOTHING RETURNING: inserted, сводки
+    и приход на барабаны считаются только по вставленным строкам, а позиции, занятые параллельным
+    импортом после проверки дублей, попадают в duplicates_in_db.
+
+    progress(строк, байт) вызывается после каждого куска — для отображения хода фоновой задачи.
+
+    workers > 1 включает параллельный разбор (только engine="python" и файл на диске):
+    файл делится на диапазоны байтов по переводам строк, разбор и нормализация идут в пуле
+    процессов, а проверки по каталогу, дубли позиций (в том числе между диапазонами) и вставка —
+    в текущем процессе по порядку строк. Иначе параметр игнорируется.
+
+    commit_rows > 0 (engine="python"/"numpy") включает импорт с фиксацией кусками: каждые commit_rows
+    строк — отдельная транзакция и контрольная точка в ImportLog (смещение, строка, счётчики).
+    Повторный запуск того же файла (по SHA-256) для той же партии продолжает с контрольной точки,
+    а не отклоняется как уже обработанный. При пороге >50% ошибок вставленные строки удаляются.
+    Параллельный разбор в этом режиме не используется.
+
+    dry_run=True выполняет все проверки, но ничего не пишет в БД (ни строк, ни ImportLog, ни партии):
+    причины отклонения возвращаются в ImportResult.rejection вместо исключения, inserted — сколько строк
+    было бы вставлено. Для engine="copy" проверка идёт теми же правилами на NumPy. Если импорт не был бы
+    отклонён, проверенные строки кэшируются как план (см. import_plan), и следующий импорт этого файла
+    в ту же партию сразу вставляет их без разбора и проверок.
+
+    file может быть и потоком только для чтения (без seek): тогда он читается ровно один раз,
+    а импорт с фиксацией кусками и план проверки без записи не используются.
 
-    # Партия и склад
-    batch, _ = Batch.objects.get_or_create(number=(batch_number or "").strip())
+    file_sha — SHA-256 файла, если она уже известна (файл из хранилища загрузок, см. upload_store):
+    повтор файла для партии тогда отклоняется до разбора, без отдельного прохода по файлу.
+
+    В ImportLog.profile записываются время по фазам (чтение, разбор, нормализация, поиск барабанов,
+    проверки, вставка, фиксация, запись журнала), число SQL-запросов с их временем и пик памяти
+    (см. import_profile); duration_sec включает вставку и запись журнала.
+    """
+    if engine not in IMPORT_ENGINES:
+        raise ValueError(f"Неизвестный режим импорта: {engine}")
+
+    t0 = time.perf_counter()
+    with ImportProfile() as profile:
+        try:
+            result = _import_batch(
+                file=file, batch_number=batch_number, storage=storage, engine=engine, chunk_rows=chunk_rows,
+                file_name=file_name, progress=progress, workers=workers, commit_rows=commit_rows, dry_run=dry_run,
+                file_sha=file_sha, profile=profile,
+            )
+        except Exception as e:
+            outcome = "rejected" if isinstance(e, ValueError) else "error"
+            observe_import(engine=engine, profile=profile, duration=time.perf_counter() - t0, outcome=outcome)
+            raise
+    observe_import(engine=engine, profile=profile, duration=time.perf_counter() - t0, result=result)
+    return result
+
+
+def _import_batch(
+    *,
+    file,
+    batch_number: str,
+    storage,
+    engine: str,
+    chunk_rows: int,
+    file_name: str | None,
+    progress: Callable[[int, int], None] | None,
+    workers: int,
+    commit_rows: int,
+    dry_run: bool,
+    file_sha: str | None,
+    profile: ImportProfile,
+) -> ImportResult:
+    t0 = time.perf_counter()
+    file_name = file_name or getattr(file, "name", "uploaded.csv")
+    if dry_run and engine == "copy":
+        # engine="copy" проверяет строки в SQL вместе со вставкой; без записи — те же правила на NumPy
+        engine = "numpy"
+    # Поток (тело HTTP-запроса) читается один раз: без отдельного прохода, контрольных точек и плана
+    rewindable = _rewindable(file)
+    resumable = commit_rows > 0 and engine != "copy" and not dry_run and rewindable
+    use_plan = not dry_run and plans_enabled() and rewindable
+    # Для продолжения с контрольной точки и поиска плана контрольная сумма нужна до разбора — отдельным проходом
+    if file_sha is None and (resumable or use_plan):
+        file_sha = file_sha256(file)
+
+    # Партия и склад; при проверке без записи не создаются
+    batch_number = (batch_number or "").strip()
     storage_obj = storage
-    if isinstance(storage_obj, str):
-        storage_obj, _ = Storage.objects.get_or_create(code=_norm_code(storage_obj))
+    if dry_run:
+        batch = Batch.objects.filter(number=batch_number).first() or Batch(number=batch_number)
+        if isinstance(storage_obj, str):
+            code = norm_code(storage_obj)
+            storage_obj = Storage.objects.filter(code=code).first() or Storage(code=code)
+    else:
+        batch, _ = Batch.objects.get_or_create(number=batch_number)
+        if isinstance(storage_obj, str):
+            storage_obj = get_catalog_cache().storage(norm_code(storage_obj))
+
+    # Повторная обработка файла с тем же sha для этой партии — до разбора, если sha уже известна
+    if file_sha is not None and _already_imported(batch, file_sha):
+        if dry_run:
+            return ImportResult(
+                total=0, inserted=0, duplicates_in_file=0, duplicates_in_db=0, invalid_rows=0, errors=[],
+                batch_id=batch.pk, file_name=file_name, file_sha256=file_sha, dry_run=True,
+                rejection=REJECTION_MESSAGES["duplicate_file"],
+            )
+        _ = ImportLog.objects.create(
+            batch=batch,
+            file_name=file_name or "",
+            file_sha256=file_sha,
+            total=0,
+            inserted=0,
+            duplicates_in_file=0,
+            duplicates_in_db=0,
+            invalid_rows=0,
+            duration_sec=Decimal("0.000"),
+            errors=["Файл с такой контрольной суммой уже был обработан для этой партии."],
+        )
+        raise ValueError(REJECTION_MESSAGES["duplicate_file"])
 
-    rows = list(reader)
-    total = len(rows)
+    source = CsvLineSource(file, profile=profile)
+    reader = csv.reader(source)
+    header = next(reader, [])
+    columns = header_columns(header)
+    path = local_path(file) if workers > 1 and engine == "python" and not resumable else None
 
     # Нет нужных колонок в файле
-    if not required.issubset(headers):
-        missing = ", ".join(sorted(required - headers))
+    if not REQUIRED_COLUMNS.issubset(columns):
+        source.drain()
+        missing = ", ".join(sorted(REQUIRED_COLUMNS - columns.keys()))
+        if dry_run:
+            message = f"Отсутствуют обязательные колонки: {missing}"
+            return ImportResult(
+                total=0, inserted=0, duplicates_in_file=0, duplicates_in_db=0, invalid_rows=0, errors=[message],
+                batch_id=batch.pk, file_name=file_name, file_sha256=source.sha256, dry_run=True, rejection=message,
+            )
         _ = ImportLog.objects.create(
-            batch=batch_number,
+            batch=batch,
             file_name=file_name or "",
-            file_sha256=file_sha,
+            file_sha256=source.sha256,
             total=0,
             inserted=0,
             duplicates_in_file=0,
@@ -112,8 +688,98 @@ def import_batch_from_csv(*, file, batch_number: str, storage) -> ImportResult:
         )
         raise ValueError(f"Отсутствуют обязательные колонки: {missing}")
 
+    if use_plan and (plan := take_plan(batch.number, file_sha, storage=storage_obj)) is not None:
+        return _import_from_plan(plan, batch=batch, file_sha=file_sha, file_name=file_name, t0=t0, profile=profile)
+
+    if resumable:
+        return _import_resumable(
+            file=file, file_sha=file_sha, header_offset=source.offset, columns=columns, batch=batch,
+            storage_obj=storage_obj, engine=engine, chunk_rows=chunk_rows, commit_rows=commit_rows,
+            file_name=file_name, progress=progress, profile=profile,
+        )
+
+    state = _ImportState(
+        positions=BatchPositions(batch),
+        plan=PlanBuilder(max_rows=settings.CSV_IMPORT_PLAN_MAX_ROWS) if dry_run else None,
+        profile=profile,
+    )
+    records = iter_records(reader, columns)
+    rejection = None
+
+    def accept(sha: str | None = None) -> bool:
+        nonlocal rejection, file_sha
+        if sha is None:
+            source.drain()
+            sha = source.sha256
+        file_sha = sha
+        if state.total == 0:
+            rejection = "empty"
+        elif _already_imported(batch, file_sha):
+            rejection = "duplicate_file"
+        elif (state.invalid_rows + state.duplicates_in_file) / state.total > 0.5:
+            rejection = "error_ratio"
+        return rejection is None
+
+    def report(rows: int) -> None:
+        if progress is not None:
+            progress(rows, source.bytes_read)
+
+    with profile.on_exit("commit", transaction.atomic()):
+        if engine == "copy":
+            copy_import_rows(
+                records, state=state, batch=batch, storage_obj=storage_obj, accept=accept,
+                progress=report, progress_every=chunk_rows,
+            )
+        elif path is not None:
+            line_base = 1
+            # Диапазоны читаются один раз: SHA-256 считается по ходу чтения, если она ещё не известна
+            hasher = None
+            if file_sha is None:
+                with open(path, "rb") as f:
+                    hasher = hashlib.sha256(f.read(source.offset))
+            parts = iter_parsed_ranges(path, start=source.offset, columns=columns, workers=workers, hasher=hasher)
+            while (part := _next_part(parts, state=state)) is not None:
+                state.total += part.records
+                state.invalid_rows += len(part.errors)
+                state.errors.extend(issue._replace(line=line_base + issue.line) for issue in part.errors)
+                rows = [(line_base + idx, code, length, pos) for idx, code, length, pos in part.rows]
+                for i in range(0, len(rows), chunk_rows):
+                    with profile.phase("validate"):
+                        _validate_and_insert(rows[i:i + chunk_rows], state=state, batch=batch, storage_obj=storage_obj)
+                line_base += part.records
+                report(state.total)
+            accept(hasher.hexdigest() if hasher is not None else file_sha)
+        elif engine == "numpy":
+            while chunk := _read_chunk(records, chunk_rows, state=state):
+                with profile.phase("normalize"):
+                    arrays = import_numpy.normalize_chunk(chunk, state=state)
+                with profile.phase("validate"):
+                    import_numpy.validate_and_insert(arrays, state=state, batch=batch, storage_obj=storage_obj)
+                report(state.total)
+            accept()
+        else:
+            while chunk := _read_chunk(records, chunk_rows, state=state):
+                with profile.phase("normalize"):
+                    norm_rows = _normalize_chunk(chunk, state=state)
+                with profile.phase("validate"):
+                    _validate_and_insert(norm_rows, state=state, batch=batch, storage_obj=storage_obj)
+                report(state.total)
+            accept()
+        if rejection or dry_run:
+            transaction.set_rollback(True)
+        else:
+            with profile.phase("insert"):
+                _post_inserted(state.summary, batch_id=batch.id, storage_id=storage_obj.id)
+
+    total = state.total
+
+    if dry_run:
+        return _dry_run_result(
+            state, rejection=rejection, batch=batch, storage_obj=storage_obj, file_sha=file_sha, file_name=file_name,
+        )
+
     # Нет данных в файле
-    if total == 0:
+    if rejection == "empty":
         _ = ImportLog.objects.create(
             batch=batch,
             file_name=file_name or "",
@@ -126,10 +792,11 @@ def import_batch_from_csv(*, file, batch_number: str, storage) -> ImportResult:
             duration_sec=Decimal("0.000"),
             errors=["Файл не содержит данных."],
         )
-        raise ValueError("Файл не содержит данных.")
+        state.errors.close()
+        raise ValueError(REJECTION_MESSAGES["empty"])
 
     # Повторная обработка файла с тем же sha для этой партии
-    if ImportLog.objects.filter(batch=batch, file_sha256=file_sha).exists():
+    if rejection == "duplicate_file":
         _ = ImportLog.objects.create(
             batch=batch,
             file_name=file_name or "",
@@ -142,137 +809,56 @@ def import_batch_from_csv(*, file, batch_number: str, storage) -> ImportResult:
             duration_sec=Decimal("0.000"),
             errors=["Файл с такой контрольной суммой уже был обработан для этой партии."],
         )
-        raise ValueError("Файл уже был обработан для этой партии.")
-
-    errors: list[str] = []
-    duplicates_in_file = 0
-    duplicates_in_db = 0
-    invalid_rows = 0
-
-    # Текущее состояние БД по партии
-    existing_items = BatchItem.objects.filter(batch=batch).select_related("drum")
-    existing_positions = set(existing_items.values_list("number_in_batch", flat=True))
-
-    used_positions_in_file: set[int] = set()
-    used_drums_in_file: set[str] = set()
-
-    drum_codes = []
-    norm_rows = []
-    for idx, r in enumerate(rows, start=2):
-        drum_code = _norm_code(r.get("drum_code"))
-        if not drum_code:
-            invalid_rows += 1
-            errors.append(f"Строка {idx}: пустой drum_code.")
-            continue
-        length = _parse_length(r.get("length"), line_no=idx, errors=errors)
-        if length is None:
-            invalid_rows += 1
-            continue
-
-        pos_val = (r.get("position") or "").strip()
-        if not pos_val:
-            invalid_rows += 1
-            errors.append(f"Строка {idx}: пустая position — строка пропущена.")
-            continue
-        try:
-            pos = int(pos_val)
-            if pos <= 0:
-                raise ValueError
-        except Exception:
-            invalid_rows += 1
-            errors.append(f"Строка {idx}: некорректная position '{pos_val}' (ожидается положительное целое).")
-            continue
-
-        norm_rows.append((idx, drum_code, length, pos))
-        drum_codes.append(drum_code)
-
-    drums_by_code = {d.code: d for d in Drum.objects.filter(code__in=set(drum_codes))}
-
-    # Вторая фаза нормализации
-    to_create: list[BatchItem] = []
-    for (idx, drum_code, length, pos) in norm_rows:
-        drum = drums_by_code.get(drum_code)
-        if not drum:
-            invalid_rows += 1
-            errors.append(f"Строка {idx}: барабан '{drum_code}' не найден в каталоге.")
-            continue
-
-        # Длина > первичной длины барабана
-        init_len = getattr(drum, "initial_length_m", None)
-        if init_len is not None and length > init_len:
-            invalid_rows += 1
-            errors.append(
-                f"Строка {idx}: длина {length} м превышает первичную длину барабана {init_len} м."
-            )
-            continue
+        state.errors.close()
+        raise ValueError(REJECTION_MESSAGES["duplicate_file"])
 
-        # Дубли позиций в файле/БД
-        if pos in used_positions_in_file:
-            duplicates_in_file += 1
-            errors.append(f"Строка {idx}: дублирование position {pos} в файле.")
-            continue
-        if pos in existing_positions:
-            duplicates_in_db += 1
-            continue
-
-        used_drums_in_file.add(drum_code)
-        used_positions_in_file.add(pos)
-
-        to_create.append(
-            BatchItem(
+    # Порог 50% ошибок
+    if rejection == "error_ratio":
+        file_quality_errors = state.invalid_rows + state.duplicates_in_file
+        with profile.phase("log"):
+            log = ImportLog.objects.create(
                 batch=batch,
-                drum=drum,
-                storage_location=storage_obj,
-                number_in_batch=pos,
-                length_m=length,
+                file_name=file_name or "",
+                file_sha256=file_sha,
+                total=total,
+                inserted=0,
+                duplicates_in_file=state.duplicates_in_file,
+                duplicates_in_db=state.duplicates_in_db,
+                invalid_rows=state.invalid_rows,
+                errors=state.errors.sample + [
+                    f"Порог >50% ошибок ({file_quality_errors}/{total}) — загрузка отменена."
+                ],
+                error_counts=dict(state.errors.counts),
             )
-        )
-
-    # Порог 50% ошибок
-    file_quality_errors = invalid_rows + duplicates_in_file
-    error_ratio = (file_quality_errors / total) if total > 0 else 1.0
-    duration = Decimal(str(round(time.perf_counter() - t0, 3)))
+            _save_rejected_rows(log, state.errors)
+        _finish_log(log, profile, duration=time.perf_counter() - t0)
+        raise ValueError(REJECTION_MESSAGES["error_ratio"])
 
-    if error_ratio > 0.5:
-        ImportLog.objects.create(
+    with profile.phase("log"):
+        log = ImportLog.objects.create(
             batch=batch,
             file_name=file_name or "",
             file_sha256=file_sha,
             total=total,
-            inserted=0,
-            duplicates_in_file=duplicates_in_file,
-            duplicates_in_db=duplicates_in_db,
-            invalid_rows=invalid_rows,
-            duration_sec=duration,
-            errors=(errors[:100] + [f"Порог >50% ошибок ({file_quality_errors}/{total}) — загрузка отменена."])[:120],
+            inserted=state.inserted,
+            duplicates_in_file=state.duplicates_in_file,
+            duplicates_in_db=state.duplicates_in_db,
+            invalid_rows=state.invalid_rows,
+            errors=state.errors.sample,
+            error_counts=dict(state.errors.counts),
         )
-        raise ValueError("В файле более 50% ошибок. Загрузка отменена.")
-
-    with transaction.atomic():
-        created = BatchItem.objects.bulk_create(to_create, ignore_conflicts=True)
-        inserted = len(created)
-
-    ImportLog.objects.create(
-        batch=batch,
-        file_name=file_name or "",
-        file_sha256=file_sha,
-        total=total,
-        inserted=inserted,
-        duplicates_in_file=duplicates_in_file,
-        duplicates_in_db=duplicates_in_db,
-        invalid_rows=invalid_rows,
-        duration_sec=duration,
-        errors=errors[:100],
-    )
+        _save_rejected_rows(log, state.errors)
+    _finish_log(log, profile, duration=time.perf_counter() - t0)
 
     return ImportResult(
         total=total,
-        inserted=inserted,
-        duplicates_in_file=duplicates_in_file,
-        duplicates_in_db=duplicates_in_db,
-        invalid_rows=invalid_rows,
-        errors=errors,
+        inserted=state.inserted,
+        duplicates_in_file=state.duplicates_in_file,
+        duplicates_in_db=state.duplicates_in_db,
+        invalid_rows=state.invalid_rows,
+        errors=state.errors.sample,
         batch_id=batch.id,
         file_name=file_name,
         file_sha256=file_sha,
+        error_counts=dict(state.errors.counts),
     )
@@ -0,0 +1,228 @@
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.inventory.models import ImportJob
+from apps.inventory.services.import_from_csv import import_batch_from_csv
+from apps.inventory.services.upload_store import MappedFile, store_upload
+
+logger = logging.getLogger(__name__)
+
+# Задача в статусе RUNNING без сигнала дольше этого времени считается брошенной и берётся заново
+STALE_JOB_AFTER = timedelta(minutes=10)
+# Сигнал «жив» отправляется фоновым потоком независимо от прогресса импорта
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+MAX_JOB_ATTEMPTS = 3
+# Не чаще раза в секунду пишем прогресс в БД
+PROGRESS_INTERVAL_SEC = 1.0
+
+
+def enqueue_import(*, file, batch_number: str, storage, dry_run: bool = False) -> ImportJob:
+    """
+    Ставит файл в очередь импорта (dry_run — только проверка без записи).
+    Файл сохраняется в хранилище загрузок (upload_store), чтобы его подобрал обработчик.
+    """
+    stored = store_upload(file)
+    return enqueue_stored(
+        file_sha256=stored.sha256,
+        file_size=stored.size,
+        file_name=getattr(file, "name", "") or "uploaded.csv",
+        batch_number=batch_number,
+        storage=storage,
+        dry_run=dry_run,
+    )
+
+
+def enqueue_stored(
+    *, file_sha256: str, file_size: int, file_name: str, batch_number: str, storage, dry_run: bool = False
+) -> ImportJob:
+    """Ставит в очередь файл, уже лежащий в хранилище загрузок, — например, для повторной обработки."""
+    return ImportJob.objects.create(
+        batch_number=(batch_number or "").strip(),
+        storage=storage,
+        file_name=file_name,
+        file_size=file_size,
+        file_sha256=file_sha256,
+        dry_run=dry_run,
+    )
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(*, worker: str) -> ImportJob | None:
+    """
+    Забирает следующую задачу из очереди через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому несколько обработчиков не возьмут одну и ту же задачу.
+    """
+    stale_before = timezone.now() - STALE_JOB_AFTER
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImportJob.Status.QUEUED)
+                | Q(status=ImportJob.Status.RUNNING, heartbeat_at__lt=stale_before)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        job.status = ImportJob.Status.RUNNING
+        job.worker = worker
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+        job.rows_processed = 0
+        job.bytes_processed = 0
+        job.save(update_fields=[
+            "status", "worker", "attempts", "started_at", "heartbeat_at",
+            "rows_processed", "bytes_processed", "updated_at",
+        ])
+    return job
+
+
+class ProgressReporter:
+    """
+    Пишет прогресс задачи через отдельное соединение в режиме autocommit:
+    сам импорт идёт в транзакции, и обновления через основное соединение
+    не были бы видны странице статуса до её завершения.
+    """
+
+    def __init__(self, job: ImportJob, *, interval: float = PROGRESS_INTERVAL_SEC):
+        self.job = job
+        self.interval = interval
+        self._last = 0.0
+        self._conn = connections.create_connection("default")
+
+    def __call__(self, rows: int, bytes_read: int) -> None:
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        with self._conn.cursor() as cur:
+            cur.execute(
+                f"UPDATE {ImportJob._meta.db_table} "
+                f"SET rows_processed = %s, bytes_processed = %s, heartbeat_at = %s WHERE id = %s",
+                [rows, bytes_read, timezone.now(), self.job.pk],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class Heartbeat:
+    """
+    Фоновый поток, который раз в interval обновляет heartbeat_at задачи, пока идёт импорт.
+    Прогресс сообщается не из всех фаз (SQL-проверки и вставка режима copy, вставка по плану,
+    сводки и журнал), а задача без сигнала дольше STALE_JOB_AFTER была бы взята повторно
+    и тот же файл импортировался бы дважды. Сигнал пишется, только пока задача за этим обработчиком.
+    """
+
+    def __init__(self, job: ImportJob, *, interval: timedelta = HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval.total_seconds()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"import-job-{job.pk}-heartbeat", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        # Соединения Django не разделяются между потоками — у потока своё, в режиме autocommit
+        conn = connections.create_connection("default")
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            f"UPDATE {ImportJob._meta.db_table} SET heartbeat_at = %s "
+                            f"WHERE id = %s AND worker = %s AND status = %s",
+                            [timezone.now(), self.job.pk, self.job.worker, ImportJob.Status.RUNNING],
+                        )
+                except Exception:
+                    logger.warning("Heartbeat of import job %s failed", self.job.pk, exc_info=True)
+                    conn.close()
+        finally:
+            conn.close()
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """Выполняет импорт по задаче и фиксирует итог в её статусе."""
+    reporter = ProgressReporter(job)
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    file = None
+    try:
+        # Файл из хранилища загрузок читается через mmap, и его sha известна до разбора
+        file = MappedFile(job.file_sha256, name=job.file_name)
+        res = import_batch_from_csv(
+            file=file,
+            batch_number=job.batch_number,
+            storage=job.storage,
+            engine=settings.CSV_IMPORT_ENGINE,
+            file_name=job.file_name,
+            progress=reporter,
+            workers=settings.CSV_IMPORT_WORKERS,
+            commit_rows=settings.CSV_IMPORT_COMMIT_ROWS,
+            dry_run=job.dry_run,
+            file_sha=job.file_sha256,
+        )
+    except ValueError as e:
+        job.status = ImportJob.Status.FAILED
+        job.error = str(e)
+    except Exception:
+        logger.exception("Import job %s failed", job.pk)
+        job.status = ImportJob.Status.QUEUED if job.attempts < MAX_JOB_ATTEMPTS else ImportJob.Status.FAILED
+        job.error = "Неожиданная ошибка импорта. Попробуйте еще раз или обратитесь к администратору."
+    else:
+        job.status = ImportJob.Status.DONE
+        job.batch_id = res.batch_id
+        job.rows_processed = res.total
+        job.bytes_processed = job.file_size
+        # Выборка ошибок нужна в итогах только проверки: после импорта она есть в ImportLog
+        job.result = {k: v for k, v in asdict(res).items() if k != "errors" or job.dry_run}
+        job.error = ""
+    finally:
+        heartbeat.stop()
+        if isinstance(file, MappedFile):
+            file.close()
+        reporter.close()
+
+    if job.is_finished:
+        # Файл остаётся в хранилище загрузок для повторной обработки (см. purge_unreferenced)
+        job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def run_worker(*, poll_interval: float = 1.0, once: bool = False, should_stop=lambda: False) -> int:
+    """Цикл обработчика очереди. Возвращает число выполненных задач."""
+    name = worker_name()
+    processed = 0
+    while not should_stop():
+        job = claim_next_job(worker=name)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info("Worker %s picked import job %s", name, job.pk)
+        run_import_job(job)
+        processed += 1
+    return processed
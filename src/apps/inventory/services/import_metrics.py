@@ -0,0 +1,112 @@
+"""
+Метрики импорта CSV для /metrics (см. apps.core.metrics).
+
+Счётчики строк и байт, гистограмма длительности и время по фазам пишутся после каждого импорта
+в процессе, который его выполнил (веб-процесс или обработчик очереди). Очередь ImportJob считается
+запросом в момент опроса: сколько задач ждут и выполняются, возраст самой старой ожидающей задачи
+и давность последнего сигнала выполняющихся — по последнему видно зависший импорт.
+"""
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from apps.core.metrics import SCRAPE_REGISTRY
+from apps.inventory.models import ImportJob
+
+# От файлов в сотни строк до десятков миллионов
+IMPORT_DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+IMPORTS = Counter(
+    "cabletrack_imports",
+    "Импорты CSV по движку, режиму (import, dry_run) и итогу (ok, partial, fail, rejected, error)",
+    ["engine", "mode", "outcome"],
+)
+IMPORT_ROWS_PROCESSED = Counter("cabletrack_import_rows_processed", "Строк данных разобрано", ["engine"])
+IMPORT_ROWS_INSERTED = Counter("cabletrack_import_rows_inserted", "Строк вставлено в партии", ["engine"])
+IMPORT_ROWS_REJECTED = Counter(
+    "cabletrack_import_rows_rejected",
+    "Строк отклонено: invalid, duplicate_in_file, duplicate_in_db",
+    ["engine", "reason"],
+)
+IMPORT_BYTES = Counter("cabletrack_import_bytes", "Байт файлов прочитано импортом", ["engine"])
+IMPORT_DURATION = Histogram(
+    "cabletrack_import_duration_seconds",
+    "Длительность импорта",
+    ["engine", "mode"],
+    buckets=IMPORT_DURATION_BUCKETS,
+)
+IMPORT_PHASE_SECONDS = Counter(
+    "cabletrack_import_phase_seconds", "Время импорта по фазам (ImportLog.profile)", ["engine", "phase"]
+)
+
+
+def _outcome(result) -> str:
+    # Как ImportLog.status; у проверки без записи причина отказа — в rejection
+    if result.rejection:
+        return "rejected"
+    if result.inserted == 0:
+        return "fail"
+    if result.inserted == result.total and not (
+        result.invalid_rows or result.duplicates_in_file or result.duplicates_in_db
+    ):
+        return "ok"
+    return "partial"
+
+
+def observe_import(*, engine: str, profile, duration: float, result=None, outcome: str = "") -> None:
+    """
+    Итог одного вызова import_batch_from_csv: result — ImportResult завершённого импорта,
+    outcome — итог без результата (rejected — отказ с ValueError, error — необработанное исключение).
+    """
+    mode = "dry_run" if result is not None and result.dry_run else "import"
+    outcome = outcome or _outcome(result)
+    IMPORTS.labels(engine=engine, mode=mode, outcome=outcome).inc()
+    IMPORT_DURATION.labels(engine=engine, mode=mode).observe(duration)
+    IMPORT_BYTES.labels(engine=engine).inc(profile.bytes_read)
+    for phase, seconds in profile.seconds.items():
+        if seconds:
+            IMPORT_PHASE_SECONDS.labels(engine=engine, phase=phase).inc(seconds)
+    if result is None or result.dry_run:
+        return
+    IMPORT_ROWS_PROCESSED.labels(engine=engine).inc(result.total)
+    IMPORT_ROWS_INSERTED.labels(engine=engine).inc(result.inserted)
+    for reason, count in (
+        ("invalid", result.invalid_rows),
+        ("duplicate_in_file", result.duplicates_in_file),
+        ("duplicate_in_db", result.duplicates_in_db),
+    ):
+        IMPORT_ROWS_REJECTED.labels(engine=engine, reason=reason).inc(count)
+
+
+class ImportQueueCollector:
+    """Состояние очереди ImportJob на момент опроса: один запрос по индексу (status, created_at)."""
+
+    def collect(self):
+        now = timezone.now()
+        stats = ImportJob.objects.filter(
+            status__in=[ImportJob.Status.QUEUED, ImportJob.Status.RUNNING]
+        ).aggregate(
+            queued=Count("pk", filter=Q(status=ImportJob.Status.QUEUED)),
+            running=Count("pk", filter=Q(status=ImportJob.Status.RUNNING)),
+            oldest_queued=Min("created_at", filter=Q(status=ImportJob.Status.QUEUED)),
+            oldest_heartbeat=Min("heartbeat_at", filter=Q(status=ImportJob.Status.RUNNING)),
+        )
+        depth = GaugeMetricFamily("cabletrack_import_queue_jobs", "Задач импорта в очереди", labels=["status"])
+        depth.add_metric([ImportJob.Status.QUEUED], stats["queued"])
+        depth.add_metric([ImportJob.Status.RUNNING], stats["running"])
+        yield depth
+        yield GaugeMetricFamily(
+            "cabletrack_import_queue_oldest_seconds",
+            "Сколько ждёт самая старая задача в очереди (0 — очередь пуста)",
+            value=(now - stats["oldest_queued"]).total_seconds() if stats["oldest_queued"] else 0,
+        )
+        yield GaugeMetricFamily(
+            "cabletrack_import_heartbeat_age_seconds",
+            "Давность самого старого сигнала выполняющихся задач (0 — нет выполняющихся)",
+            value=(now - stats["oldest_heartbeat"]).total_seconds() if stats["oldest_heartbeat"] else 0,
+        )
+
+
+def register_queue_collector() -> None:
+    SCRAPE_REGISTRY.register(ImportQueueCollector())
@@ -0,0 +1,225 @@
+"""
+Векторизованная проверка строк импорта на NumPy (engine="numpy").
+
+Кусок записей превращается в массивы: номера строк и позиции — int64, длины — целые
+сантиметры (фиксированная точка 0.01 м). Ограничения барабанов и их моделей кабеля
+подтягиваются через индексный массив по уникальным кодам, все правила считаются масками,
+дубли позиций — через np.unique. Тексты ошибок строятся только для строк, не прошедших
+проверку, и совпадают с построчным режимом дословно.
+
+Быстрый путь разбирает обычные значения: длину из цифр ASCII с не более чем двумя знаками после
+точки (запятой) и позицию из цифр ASCII. Остальное (знак, экспонента, больше двух знаков после
+точки) разбирается построчно функциями csv_rows — с тем же округлением и сообщениями.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+
+from apps.catalog.cache import get_catalog_cache
+from apps.inventory.models import Batch
+from apps.inventory.services.csv_rows import (
+    MAX_POSITION,
+    WHITESPACE,
+    RowError,
+    norm_code,
+    normalize_row,
+    parse_length,
+    parse_position,
+)
+from apps.inventory.services.import_plan import insert_items
+from apps.storage.models import Storage
+
+# Длина > 1 000 000 м отклоняется ещё при разборе
+_MAX_LENGTH_CENTS = 100_000_000
+# Столько цифр без потерь проходит через float64 и int64; значение позиции затем ограничено MAX_POSITION
+_MAX_LENGTH_DIGITS = 12
+_MAX_POSITION_DIGITS = 18
+
+
+@dataclass
+class NormalizedChunk:
+    lines: np.ndarray
+    codes: np.ndarray
+    cents: np.ndarray
+    positions: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def _decimal_to_cents(value: Decimal) -> int:
+    return int(value.scaleb(2))
+
+
+def _ascii_digits(txt: np.ndarray) -> np.ndarray:
+    """Маска непустых строк только из цифр ASCII: isdecimal пропускает и цифры других письменностей."""
+    return (np.char.str_len(txt) > 0) & (np.char.str_len(np.char.strip(txt, "0123456789")) == 0)
+
+
+def _parse_lengths(raw: list[str | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Длины в сантиметрах и маска успешно разобранных значений."""
+    txt = np.char.replace(np.char.strip(np.array([v or "" for v in raw], dtype=str), WHITESPACE), ",", ".")
+    digits = np.char.replace(txt, ".", "", count=1)
+    dot = np.char.find(txt, ".")
+    frac = np.where(dot >= 0, np.char.str_len(txt) - dot - 1, 0)
+    plain = _ascii_digits(digits) & (frac <= 2) & (np.char.str_len(digits) <= _MAX_LENGTH_DIGITS)
+
+    cents = np.zeros(len(txt), dtype=np.int64)
+    try:
+        # Не больше двух знаков после точки: x * 100 после округления до целого точен
+        cents[plain] = np.rint(txt[plain].astype(np.float64) * 100)
+    except ValueError:
+        plain[:] = False
+    ok = plain & (cents > 0) & (cents <= _MAX_LENGTH_CENTS)
+
+    for i in np.flatnonzero(~plain).tolist():
+        try:
+            cents[i] = _decimal_to_cents(parse_length(raw[i]))
+        except RowError:
+            continue
+        ok[i] = True
+    return cents, ok
+
+
+def _parse_positions(raw: list[str | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Позиции и маска успешно разобранных значений."""
+    txt = np.char.strip(np.array([v or "" for v in raw], dtype=str), WHITESPACE)
+    plain = _ascii_digits(txt) & (np.char.str_len(txt) <= _MAX_POSITION_DIGITS)
+
+    positions = np.zeros(len(txt), dtype=np.int64)
+    try:
+        positions[plain] = txt[plain].astype(np.int64)
+    except ValueError:
+        plain[:] = False
+    ok = plain & (positions > 0) & (positions <= MAX_POSITION)
+
+    for i in np.flatnonzero(~plain).tolist():
+        try:
+            positions[i] = parse_position(raw[i])
+        except RowError:
+            continue
+        ok[i] = True
+    return positions, ok
+
+
+def normalize_chunk(records: list, *, state) -> NormalizedChunk:
+    """Первая фаза: разбор куска записей (номер строки, drum_code, length, position) в массивы."""
+    state.total += len(records)
+    lines, raw_codes, raw_lengths, raw_positions = (list(col) for col in zip(*records)) if records else ([],) * 4
+
+    codes = np.array([norm_code(v) for v in raw_codes], dtype=object)
+    cents, length_ok = _parse_lengths(raw_lengths)
+    positions, position_ok = _parse_positions(raw_positions)
+    ok = (codes != "") & length_ok & position_ok
+
+    bad = np.flatnonzero(~ok).tolist()
+    if bad:
+        state.invalid_rows += len(bad)
+        for i in bad:
+            # Текст ошибки — от построчной нормализации, чтобы соблюсти порядок проверок drum_code, length, position
+            try:
+                normalize_row(raw_codes[i], raw_lengths[i], raw_positions[i])
+            except RowError as e:
+                state.errors.add(lines[i], e.code, e.field, e.value, str(e))
+
+    return NormalizedChunk(
+        lines=np.array(lines, dtype=np.int64)[ok],
+        codes=codes[ok],
+        cents=cents[ok],
+        positions=positions[ok],
+    )
+
+
+def validate_and_insert(chunk: NormalizedChunk, *, state, batch: Batch, storage_obj: Storage) -> None:
+    """Вторая фаза: проверки по каталогу и дублям масками над массивами, вставка прошедших строк."""
+    if not len(chunk):
+        return
+
+    # Ограничения барабанов — по уникальным кодам, к строкам — через индексный массив
+    uniq, inverse = np.unique(chunk.codes, return_inverse=True)
+    uniq = uniq.tolist()
+    with state.profile.phase("drum_lookup"):
+        limits = get_catalog_cache().drums(uniq)
+    if state.plan is not None:
+        state.plan.note_drums(uniq, limits)
+    drum_limits = [limits.get(code) for code in uniq]
+    found = np.array([d is not None for d in drum_limits], dtype=bool)
+    drum_ids = np.array([d.id if d else 0 for d in drum_limits], dtype=np.int64)
+    initial = np.array(
+        [_decimal_to_cents(d.initial_length_m) if d and d.initial_length_m is not None else _MAX_LENGTH_CENTS
+         for d in drum_limits],
+        dtype=np.int64,
+    )
+    model_min = np.array([_decimal_to_cents(d.min_length_m) if d else 0 for d in drum_limits], dtype=np.int64)
+    model_max = np.array(
+        [_decimal_to_cents(d.max_length_m) if d else _MAX_LENGTH_CENTS for d in drum_limits], dtype=np.int64
+    )
+
+    cents = chunk.cents
+    not_found = ~found[inverse]
+    exceeds = ~not_found & (cents > initial[inverse])
+    out_of_model = ~not_found & ~exceeds & ((cents < model_min[inverse]) | (cents > model_max[inverse]))
+    valid = np.flatnonzero(~(not_found | exceeds | out_of_model))
+
+    # Дубли: сначала позиции, принятые в предыдущих кусках, затем занятые в БД, затем повторы внутри куска
+    pos = chunk.positions[valid]
+    in_file = state.positions.in_file(pos)
+    in_db = ~in_file & state.positions.in_db(pos)
+    candidates = np.flatnonzero(~in_file & ~in_db)
+    _, first = np.unique(pos[candidates], return_index=True)
+    accepted = np.zeros(len(pos), dtype=bool)
+    accepted[candidates[first]] = True
+    dup_in_file = ~accepted & ~in_db
+
+    duplicate = np.zeros(len(chunk), dtype=bool)
+    duplicate[valid[dup_in_file]] = True
+    state.invalid_rows += int(not_found.sum() + exceeds.sum() + out_of_model.sum())
+    state.duplicates_in_file += int(dup_in_file.sum())
+    state.duplicates_in_db += int(in_db.sum())
+
+    # Тексты ошибок — только для строк, не прошедших проверки, в порядке строк файла
+    errors = state.errors
+    lines = chunk.lines
+    for i in np.flatnonzero(not_found | exceeds | out_of_model | duplicate).tolist():
+        code = chunk.codes[i]
+        drum = drum_limits[inverse[i]]
+        length = cents_to_decimal(int(cents[i]))
+        line = int(lines[i])
+        if not_found[i]:
+            errors.add(line, "drum_not_found", "drum_code", code, f"барабан '{code}' не найден в каталоге.")
+        elif exceeds[i]:
+            errors.add(
+                line, "length_exceeds_drum", "length", length,
+                f"длина {length} м превышает первичную длину барабана {drum.initial_length_m} м.",
+            )
+        elif out_of_model[i]:
+            errors.add(
+                line, "length_out_of_model", "length", length,
+                f"длина {length} м вне диапазона модели кабеля барабана '{code}': "
+                f"{drum.min_length_m}–{drum.max_length_m} м.",
+            )
+        else:
+            pos = int(chunk.positions[i])
+            errors.add(line, "duplicate_in_file", "position", pos, f"дублирование position {pos} в файле.")
+
+    rows = valid[accepted]
+    if not len(rows):
+        return
+    positions, drum_ids, cents = chunk.positions[rows], drum_ids[inverse[rows]], cents[rows]
+    if state.plan is not None:
+        state.positions.accept(positions)
+        state.plan.add(positions, drum_ids, cents)
+        state.inserted += len(rows)
+        return
+    with state.profile.phase("insert"):
+        positions, drum_ids, cents = insert_items(positions, drum_ids, cents, batch=batch, storage_id=storage_obj.id)
+    # Как и в построчном режиме: всё — только по вставленным строкам
+    state.positions.accept(positions)
+    state.inserted += len(positions)
+    state.duplicates_in_db += len(rows) - len(positions)
+    state.summary.add(drum_ids, cents)
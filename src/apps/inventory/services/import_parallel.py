@@ -0,0 +1,135 @@
+"""
+Параллельный разбор одного большого CSV по диапазонам байтов.
+
+Файл делится на диапазоны, выровненные по переводу строки; каждый диапазон
+разбирается и нормализуется в отдельном процессе. Номера строк в диапазоне
+локальные — вызывающий код сдвигает их на число записей в предыдущих диапазонах,
+поэтому результаты потребляются строго по порядку.
+
+Диапазоны читает родительский процесс — по порядку, за один проход, попутно считая
+SHA-256 файла, — и передаёт байты в пул. Процессы пула запускаются через forkserver:
+они не наследуют ни соединение с БД и открытую транзакцию импорта, ни поток LISTEN
+кэша справочников, а Django им не нужен (csv_rows и import_errors от него не зависят).
+Как и при spawn, главный модуль запускающего скрипта импортируется в них заново — код скрипта
+должен быть под if __name__ == "__main__" (manage.py, gunicorn так и устроены).
+
+Ограничение: поля CSV не должны содержать переводов строки внутри кавычек
+(формат position,drum_code,length их не использует).
+"""
+import csv
+import io
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from apps.inventory.services.csv_rows import RowError, iter_records, normalize_row
+from apps.inventory.services.import_errors import RowIssue
+
+# Размер диапазона, который разбирает один процесс за раз
+PARALLEL_RANGE_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class RangeResult:
+    records: int = 0
+    # (локальный номер записи, drum_code, length, position)
+    rows: list[tuple[int, str, Decimal, int]] = field(default_factory=list)
+    # Ошибки с локальными номерами записей
+    errors: list[RowIssue] = field(default_factory=list)
+
+
+def local_path(file) -> str | None:
+    """Путь к файлу на диске, если загрузка там лежит (TemporaryUploadedFile, FieldFile, open())."""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    if hasattr(file, "temporary_file_path"):
+        return file.temporary_file_path()
+    try:
+        path = getattr(file, "path", None)
+    except (NotImplementedError, ValueError):
+        path = None
+    if path is None:
+        name = getattr(file, "name", None)
+        path = name if isinstance(name, str) and os.path.isabs(name) else None
+    return path if path and os.path.isfile(path) else None
+
+
+def split_byte_ranges(path: str, *, start: int, range_bytes: int = PARALLEL_RANGE_BYTES) -> list[tuple[int, int]]:
+    """Делит [start, конец файла) на диапазоны примерно по range_bytes, выровненные по b"\\n"."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        lo = start
+        while lo < size:
+            hi = lo + range_bytes
+            if hi >= size:
+                hi = size
+            else:
+                f.seek(hi)
+                hi += len(f.readline())
+            ranges.append((lo, hi))
+            lo = hi
+    return ranges
+
+
+def parse_range(data: bytes, columns: dict[str, int]) -> RangeResult:
+    text = data.decode("utf-8")
+    res = RangeResult()
+    for idx, raw_code, raw_length, raw_pos in iter_records(csv.reader(io.StringIO(text, newline="")), columns, first_line=1):
+        res.records += 1
+        try:
+            drum_code, length, pos = normalize_row(raw_code, raw_length, raw_pos)
+        except RowError as e:
+            res.errors.append(RowIssue(idx, e.code, e.field, e.value, str(e)))
+            continue
+        res.rows.append((idx, drum_code, length, pos))
+    return res
+
+
+def _pool_context():
+    ctx = multiprocessing.get_context("forkserver")
+    # Сервер загружает модуль один раз, процессы пула создаются от него без импорта заново
+    ctx.set_forkserver_preload([__name__])
+    return ctx
+
+
+def iter_parsed_ranges(
+    path: str,
+    *,
+    start: int,
+    columns: dict[str, int],
+    workers: int,
+    range_bytes: int = PARALLEL_RANGE_BYTES,
+    hasher=None,
+) -> Iterator[RangeResult]:
+    """
+    Разбирает диапазоны в пуле из workers процессов и отдаёт результаты по порядку.
+    Одновременно в работе не больше 2 * workers диапазонов, поэтому память ограничена.
+    hasher (hashlib) получает байты файла от start до конца — по мере чтения диапазонов.
+    """
+    ranges = split_byte_ranges(path, start=start, range_bytes=range_bytes)
+    with open(path, "rb") as f, ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+
+        def submit(lo: int, hi: int):
+            f.seek(lo)
+            data = f.read(hi - lo)
+            if hasher is not None:
+                hasher.update(data)
+            pending.append(pool.submit(parse_range, data, columns))
+
+        pending = deque()
+        queue = iter(ranges)
+        for lo, hi in queue:
+            submit(lo, hi)
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for lo, hi in queue:
+                submit(lo, hi)
+                break
+            yield result
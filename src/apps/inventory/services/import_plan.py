@@ -0,0 +1,191 @@
+"""
+План импорта по итогам проверки без записи (dry run).
+
+import_batch_from_csv(dry_run=True) выполняет все проверки, но вместо вставки собирает принятые
+строки в массивы (позиция, барабан, длина в сантиметрах). Вместе с итоговыми счётчиками,
+выборкой ошибок, gzip-CSV отклонённых строк и использованными ограничениями барабанов это план,
+который сохраняется в кэше CSV_IMPORT_PLAN_CACHE под ключом (номер партии, SHA-256 файла)
+на CSV_IMPORT_PLAN_TTL секунд.
+
+Импорт того же файла в ту же партию забирает план и сразу вставляет строки — без разбора и проверок.
+План не используется, если выбран другой склад или с момента проверки изменились барабаны,
+которых касается файл. Позиции, занятые в партии после проверки, отсеиваются ON CONFLICT
+и считаются дублями в БД.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+from apps.catalog.cache import DrumLimits, get_catalog_cache
+from apps.inventory.models import Batch, BatchItem
+from apps.inventory.services.summaries import SummaryDelta
+from apps.storage.models import Storage
+
+# Сколько строк плана вставляется одним запросом
+PLAN_INSERT_ROWS = 50_000
+
+
+@dataclass
+class ImportPlan:
+    storage_id: int
+    positions: np.ndarray
+    drum_ids: np.ndarray
+    cents: np.ndarray
+    total: int
+    duplicates_in_file: int
+    duplicates_in_db: int
+    invalid_rows: int
+    errors: list[str]
+    error_counts: dict[str, int]
+    # Ограничения барабанов на момент проверки по всем кодам файла (None — барабан не найден)
+    drums: dict[str, DrumLimits | None]
+    rejected_rows: bytes | None = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+@dataclass
+class PlanBuilder:
+    """Накапливает принятые строки при проверке без записи; сверх max_rows план не строится."""
+
+    max_rows: int
+    drums: dict[str, DrumLimits | None] = field(default_factory=dict)
+    _parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = field(default_factory=list)
+    _rows: int = 0
+    overflow: bool = False
+
+    def note_drums(self, codes, limits: dict[str, DrumLimits]) -> None:
+        if not self.overflow:
+            self.drums.update((code, limits.get(code)) for code in codes)
+
+    def add(self, positions, drum_ids, cents) -> None:
+        if self.overflow:
+            return
+        self._rows += len(positions)
+        if self._rows > self.max_rows:
+            # Слишком большой план не кэшируется — и не держится в памяти
+            self.overflow = True
+            self._parts.clear()
+            self.drums.clear()
+            return
+        self._parts.append((
+            np.asarray(positions, dtype=np.int64),
+            np.asarray(drum_ids, dtype=np.int64),
+            np.asarray(cents, dtype=np.int64),
+        ))
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not self._parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        positions, drum_ids, cents = zip(*self._parts)
+        return np.concatenate(positions), np.concatenate(drum_ids), np.concatenate(cents)
+
+
+def plans_enabled() -> bool:
+    return settings.CSV_IMPORT_PLAN_TTL > 0
+
+
+def _cache():
+    return caches[settings.CSV_IMPORT_PLAN_CACHE]
+
+
+def _key(batch_number: str, file_sha: str) -> str:
+    # Номер партии — произвольная строка: в ключ идёт её хэш
+    batch_hash = hashlib.sha256(batch_number.encode()).hexdigest()[:16]
+    return f"import-plan:{batch_hash}:{file_sha}"
+
+
+def save_plan(batch_number: str, file_sha: str, plan: ImportPlan) -> None:
+    _cache().set(_key(batch_number, file_sha), plan, timeout=settings.CSV_IMPORT_PLAN_TTL)
+
+
+def take_plan(batch_number: str, file_sha: str, *, storage: Storage) -> ImportPlan | None:
+    """Забирает план из кэша (однократно). None — плана нет или он устарел."""
+    key = _key(batch_number, file_sha)
+    plan = _cache().get(key)
+    if plan is None:
+        return None
+    _cache().delete(key)
+    if plan.storage_id != storage.id:
+        return None
+    current = get_catalog_cache().drums(plan.drums.keys())
+    if any(current.get(code) != limits for code, limits in plan.drums.items()):
+        return None
+    return plan
+
+
+def _insert_sql(returning: str) -> str:
+    """INSERT строк из трёх массивов (позиция, барабан, длина в сантиметрах); занятые позиции пропускаются."""
+    return f"""
+        INSERT INTO {BatchItem._meta.db_table}
+            (created_at, updated_at, batch_id, drum_id, storage_location_id, number_in_batch, length_m)
+        SELECT %(now)s, %(now)s, %(batch_id)s, t.drum_id, %(storage_id)s, t.pos, t.cents / 100.0
+        FROM unnest(%(positions)s::bigint[], %(drum_ids)s::bigint[], %(cents)s::bigint[])
+            AS t(pos, drum_id, cents)
+        ON CONFLICT ON CONSTRAINT uq_batch_number_in_batch DO NOTHING
+        RETURNING {returning}
+    """
+
+
+def insert_items(
+    positions, drum_ids, cents, *, batch: Batch, storage_id: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Вставляет строки одним запросом; возвращает (позиции, барабаны, сантиметры) только вставленных строк.
+    Строки, позиции которых заняты в партии (в том числе параллельным импортом), пропускаются ON CONFLICT.
+    """
+    with connection.cursor() as cur:
+        cur.execute(
+            _insert_sql("number_in_batch, drum_id, (length_m * 100)::bigint"),
+            {
+                "now": timezone.now(),
+                "batch_id": batch.id,
+                "storage_id": storage_id,
+                "positions": np.asarray(positions, dtype=np.int64).tolist(),
+                "drum_ids": np.asarray(drum_ids, dtype=np.int64).tolist(),
+                "cents": np.asarray(cents, dtype=np.int64).tolist(),
+            },
+        )
+        rows = cur.fetchall()
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    inserted = np.array(rows, dtype=np.int64)
+    return inserted[:, 0], inserted[:, 1], inserted[:, 2]
+
+
+def insert_plan(plan: ImportPlan, *, batch: Batch, summary: SummaryDelta) -> int:
+    """
+    Вставляет строки плана; возвращает число вставленных (занятые позиции пропускаются).
+    Вставленные строки добавляются в приращения сводок summary.
+    """
+    now = timezone.now()
+    inserted = 0
+    with connection.cursor() as cur:
+        for i in range(0, len(plan), PLAN_INSERT_ROWS):
+            part = slice(i, i + PLAN_INSERT_ROWS)
+            cur.execute(
+                f"""
+                WITH ins AS ({_insert_sql("drum_id, length_m")})
+                SELECT drum_id, count(*), sum(length_m * 100)::bigint FROM ins GROUP BY drum_id
+                """,
+                {
+                    "now": now,
+                    "batch_id": batch.id,
+                    "storage_id": plan.storage_id,
+                    "positions": plan.positions[part].tolist(),
+                    "drum_ids": plan.drum_ids[part].tolist(),
+                    "cents": plan.cents[part].tolist(),
+                },
+            )
+            rows = cur.fetchall()
+            summary.add_grouped(rows)
+            inserted += sum(count for _, count, _ in rows)
+    return inserted
@@ -0,0 +1,115 @@
+"""
+Профиль импорта для ImportLog.profile: время по фазам, число SQL-запросов и их время, пик памяти.
+
+Фазы вложенные: время внутренней фазы (чтение файла внутри разбора CSV, поиск барабанов и вставка
+внутри проверок) вычитается из внешней, поэтому фазы не пересекаются и в сумме не превышают
+длительность импорта. Остаток — работа вне фаз (партия, склад, проверки повтора файла).
+
+Пик памяти — tracemalloc за время импорта (CSV_IMPORT_TRACE_MEMORY). Трассировка общая на процесс:
+если её уже ведёт другой импорт (соседний поток), пик этого импорта не записывается.
+"""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from apps.core.query_stats import QueryStats
+
+PHASES = {
+    "decode": "Чтение и декодирование",
+    "parse": "Разбор CSV",
+    "normalize": "Нормализация",
+    "drum_lookup": "Поиск барабанов",
+    "validate": "Проверки",
+    "insert": "Вставка",
+    "commit": "Фиксация",
+    "log": "Запись журнала",
+}
+
+_trace_lock = threading.Lock()
+
+
+class _PhaseOnExit:
+    """Обёртка контекстного менеджера: в фазу попадает только его выход (например, COMMIT у atomic)."""
+
+    def __init__(self, profile: "ImportProfile", name: str, cm):
+        self.profile = profile
+        self.name = name
+        self.cm = cm
+
+    def __enter__(self):
+        return self.cm.__enter__()
+
+    def __exit__(self, *exc):
+        with self.profile.phase(self.name):
+            return self.cm.__exit__(*exc)
+
+
+class ImportProfile:
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.queries = QueryStats()
+        self.peak_memory: int | None = None
+        # Прочитано из файла в этом запуске (CsvLineSource) — для метрик импорта
+        self.bytes_read = 0
+        # Итоги прошлых запусков того же импорта (продолжение с контрольной точки)
+        self._sql_before = (0, 0.0)
+        self._peak_before: int | None = None
+        self._stack: list[list[float]] = []
+        self._tracing = False
+
+    def __enter__(self):
+        self.queries.__enter__()
+        if settings.CSV_IMPORT_TRACE_MEMORY:
+            with _trace_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracing = True
+        return self
+
+    def __exit__(self, *exc):
+        if self._tracing:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self._tracing = False
+        self.queries.__exit__(*exc)
+
+    @contextmanager
+    def phase(self, name: str):
+        children = [0.0]
+        self._stack.append(children)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._stack.pop()
+            self.seconds[name] += elapsed - children[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+
+    def on_exit(self, name: str, cm) -> _PhaseOnExit:
+        return _PhaseOnExit(self, name, cm)
+
+    def resume(self, data: dict | None) -> None:
+        """Продолжает профиль прерванного импорта (из ImportLog.profile)."""
+        if not data:
+            return
+        for name, seconds in data.get("phases", {}).items():
+            if name in self.seconds:
+                self.seconds[name] += seconds
+        self._sql_before = (data.get("sql_count", 0), data.get("sql_sec", 0.0))
+        self._peak_before = data.get("peak_memory_bytes")
+
+    def as_dict(self) -> dict:
+        peak = tracemalloc.get_traced_memory()[1] if self._tracing else self.peak_memory
+        if self._peak_before is not None:
+            peak = max(peak or 0, self._peak_before)
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.seconds.items()},
+            "sql_count": self._sql_before[0] + self.queries.count,
+            "sql_sec": round(self._sql_before[1] + self.queries.seconds, 4),
+            "peak_memory_bytes": peak,
+        }
@@ -0,0 +1,166 @@
+"""
+Компактный индекс позиций партии для проверки дублей при импорте.
+
+PositionSet — множество положительных целых, разбитое на блоки по 65 536 значений
+(как в roaring bitmap): разреженный блок хранится отсортированным массивом uint16,
+плотный — битовой картой на 8 КиБ. Это 2 байта на позицию в худшем случае и 1 бит
+на позицию для сплошных номеров вместо ~60 байт на int в set.
+
+BatchPositions объединяет две такие структуры для одной партии: позиции, принятые
+из текущего файла, и позиции, уже занятые в БД. Занятые позиции читаются только
+для тех блоков, которых касается файл, — index-only scan по uq_batch_number_in_batch.
+"""
+import io
+
+import numpy as np
+from django.db import connection
+
+from apps.inventory.models import Batch, BatchItem
+
+BLOCK_BITS = 16
+BLOCK_SIZE = 1 << BLOCK_BITS
+_BLOCK_MASK = BLOCK_SIZE - 1
+# С этого числа значений битовая карта блока компактнее массива uint16
+_ARRAY_MAX = BLOCK_SIZE // 16
+
+
+class PositionSet:
+    """Множество позиций с пакетными (numpy) операциями contains/add."""
+
+    def __init__(self, positions=None):
+        self._blocks: dict[int, np.ndarray] = {}
+        self._size = 0
+        if positions is not None:
+            self.add(positions)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, position: int) -> bool:
+        return bool(self.contains(np.array([position], dtype=np.int64))[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.nbytes for block in self._blocks.values())
+
+    def to_array(self) -> np.ndarray:
+        """Все позиции по возрастанию."""
+        parts = []
+        for key in sorted(self._blocks):
+            block = self._blocks[key]
+            lows = block if block.dtype == np.uint16 else np.flatnonzero(np.unpackbits(block, bitorder="little"))
+            parts.append((key << BLOCK_BITS) + lows.astype(np.int64))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def to_bytes(self) -> bytes:
+        """Сериализация для контрольной точки импорта (npz со сжатием, по массиву на блок)."""
+        buf = io.BytesIO()
+        np.savez_compressed(buf, **{str(key): block for key, block in self._blocks.items()})
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PositionSet":
+        obj = cls()
+        with np.load(io.BytesIO(data)) as npz:
+            for key in npz.files:
+                block = npz[key]
+                obj._blocks[int(key)] = block
+                obj._size += len(block) if block.dtype == np.uint16 else int(np.bitwise_count(block).sum())
+        return obj
+
+    @staticmethod
+    def _groups(positions: np.ndarray):
+        """Разбивает позиции по блокам: (номер блока, индексы во входном массиве, младшие 16 бит)."""
+        keys = positions >> BLOCK_BITS
+        order = np.argsort(keys, kind="stable")
+        uniq, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for n, key in enumerate(uniq.tolist()):
+            idx = order[bounds[n]:bounds[n + 1]]
+            yield key, idx, (positions[idx] & _BLOCK_MASK).astype(np.uint16)
+
+    def contains(self, positions) -> np.ndarray:
+        """Маска: какие из positions есть в множестве."""
+        positions = np.asarray(positions, dtype=np.int64)
+        result = np.zeros(len(positions), dtype=bool)
+        for key, idx, lows in self._groups(positions):
+            block = self._blocks.get(key)
+            if block is None:
+                continue
+            if block.dtype == np.uint16:
+                at = np.minimum(np.searchsorted(block, lows), len(block) - 1)
+                result[idx] = block[at] == lows
+            else:
+                result[idx] = (block[lows >> 3] >> (lows & 7).astype(np.uint8)) & 1
+        return result
+
+    def add(self, positions) -> None:
+        positions = np.asarray(positions, dtype=np.int64)
+        for key, _, lows in self._groups(positions):
+            block = self._blocks.get(key)
+            if block is None or block.dtype == np.uint16:
+                before = 0 if block is None else len(block)
+                merged = np.unique(lows) if block is None else np.union1d(block, lows)
+                if len(merged) <= _ARRAY_MAX:
+                    self._blocks[key] = merged
+                    self._size += len(merged) - before
+                    continue
+                # Блок стал плотным — переводим в битовую карту
+                block = np.zeros(BLOCK_SIZE // 8, dtype=np.uint8)
+                self._blocks[key] = block
+                self._size -= before
+                lows = merged
+            before = int(np.bitwise_count(block).sum())
+            np.bitwise_or.at(block, lows >> 3, np.left_shift(1, lows & 7).astype(np.uint8))
+            self._size += int(np.bitwise_count(block).sum()) - before
+
+
+class BatchPositions:
+    """
+    Позиции партии для проверок дублей: accepted — принятые из текущего файла,
+    existing — занятые в БД (подгружаются по блокам, которых касается файл).
+
+    Позиции, вставленные этим же импортом, проверяются по accepted раньше, чем по БД,
+    поэтому блоки БД достаточно прочитать один раз.
+    """
+
+    def __init__(self, batch: Batch, *, accepted: PositionSet | None = None):
+        self.batch = batch
+        self.accepted = accepted if accepted is not None else PositionSet()
+        self.existing = PositionSet()
+        self._loaded_blocks: set[int] = set()
+
+    def in_file(self, positions) -> np.ndarray:
+        return self.accepted.contains(positions)
+
+    def in_db(self, positions) -> np.ndarray:
+        positions = np.asarray(positions, dtype=np.int64)
+        self._load(np.unique(positions >> BLOCK_BITS).tolist())
+        return self.existing.contains(positions)
+
+    def accept(self, positions) -> None:
+        self.accepted.add(positions)
+
+    def _load(self, blocks: list[int]) -> None:
+        missing = [b for b in blocks if b not in self._loaded_blocks]
+        if not missing or self.batch.pk is None:
+            return
+        with connection.cursor() as cur:
+            # LATERAL даёт по одному range-скану индекса (batch_id, number_in_batch) на блок
+            cur.execute(
+                f"""
+                SELECT bi.number_in_batch
+                FROM unnest(%s::bigint[]) AS b(block)
+                CROSS JOIN LATERAL (
+                    SELECT number_in_batch
+                    FROM {BatchItem._meta.db_table}
+                    WHERE batch_id = %s
+                      AND number_in_batch >= b.block * {BLOCK_SIZE}
+                      AND number_in_batch < (b.block + 1) * {BLOCK_SIZE}
+                ) bi
+                """,
+                [missing, self.batch.pk],
+            )
+            while rows := cur.fetchmany(BLOCK_SIZE):
+                self.existing.add(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+        self._loaded_blocks.update(missing)
@@ -0,0 +1,132 @@
+"""
+Сводные таблицы остатков: StockSummary (склад × модель кабеля) и BatchSummary (партия) —
+число позиций и суммарная длина без агрегации по BatchItem.
+
+Импорт копит приращения по вставленным строкам в SummaryDelta (по барабанам: число строк и сумма
+длин в сантиметрах) и применяет их в своей транзакции — по одному upsert на таблицу, модель кабеля
+барабана подставляется в SQL. Откат импорта откатывает и приращения; удаление строк при отмене
+импорта с фиксацией кусками их вычитает.
+
+Позиции, изменённые в обход импорта (админка, удаление партии), сводки не обновляют — их
+пересчитывает rebuild_summaries (команда rebuild_summaries).
+"""
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.catalog.models import Drum
+from apps.inventory.models import BatchItem, BatchSummary, StockSummary
+
+
+class SummaryDelta:
+    """Приращения сводок одного импорта: барабан → [число строк, сумма длин в сантиметрах]."""
+
+    def __init__(self):
+        self._drums: dict[int, list[int]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._drums)
+
+    def add(self, drum_ids, cents, *, sign: int = 1) -> None:
+        drum_ids = np.asarray(drum_ids, dtype=np.int64)
+        if not len(drum_ids):
+            return
+        ids, inverse = np.unique(drum_ids, return_inverse=True)
+        sums = np.zeros(len(ids), dtype=np.int64)
+        np.add.at(sums, inverse, np.asarray(cents, dtype=np.int64))
+        self.add_grouped(zip(ids.tolist(), np.bincount(inverse).tolist(), sums.tolist()), sign=sign)
+
+    def add_grouped(self, rows, *, sign: int = 1) -> None:
+        """rows — (барабан, число строк, сумма в сантиметрах), например из GROUP BY по RETURNING."""
+        for drum_id, count, cents in rows:
+            entry = self._drums.setdefault(drum_id, [0, 0])
+            entry[0] += sign * count
+            entry[1] += sign * int(cents)
+
+    def clear(self) -> None:
+        self._drums.clear()
+
+    def arrays(self) -> tuple[list[int], list[int], list[int]]:
+        drum_ids = list(self._drums)
+        return drum_ids, [self._drums[d][0] for d in drum_ids], [self._drums[d][1] for d in drum_ids]
+
+
+def apply_delta(delta: SummaryDelta, *, batch_id: int, storage_id: int) -> None:
+    """Применяет и обнуляет приращения. Вызывается внутри транзакции импорта."""
+    if not delta:
+        return
+    drum_ids, counts, cents = delta.arrays()
+    params = {
+        "now": timezone.now(),
+        "batch_id": batch_id,
+        "storage_id": storage_id,
+        "drum_ids": drum_ids,
+        "counts": counts,
+        "cents": cents,
+    }
+    with connection.cursor() as cur:
+        # ORDER BY — строки сводки блокируются в одном порядке, параллельные импорты не взаимоблокируются
+        cur.execute(
+            f"""
+            INSERT INTO {StockSummary._meta.db_table} AS s
+                (storage_id, cable_model_id, items_count, total_length_m, updated_at)
+            SELECT %(storage_id)s, d.cable_model_id, sum(t.cnt), sum(t.cents) / 100.0, %(now)s
+            FROM unnest(%(drum_ids)s::bigint[], %(counts)s::bigint[], %(cents)s::bigint[]) AS t(drum_id, cnt, cents)
+            JOIN {Drum._meta.db_table} d ON d.id = t.drum_id
+            GROUP BY d.cable_model_id
+            ORDER BY d.cable_model_id
+            ON CONFLICT (storage_id, cable_model_id) DO UPDATE
+            SET items_count = s.items_count + EXCLUDED.items_count,
+                total_length_m = s.total_length_m + EXCLUDED.total_length_m,
+                updated_at = EXCLUDED.updated_at
+            """,
+            params,
+        )
+        cur.execute(
+            f"""
+            INSERT INTO {BatchSummary._meta.db_table} AS s (batch_id, items_count, total_length_m, updated_at)
+            SELECT %(batch_id)s, sum(t.cnt), sum(t.cents) / 100.0, %(now)s
+            FROM unnest(%(counts)s::bigint[], %(cents)s::bigint[]) AS t(cnt, cents)
+            ON CONFLICT (batch_id) DO UPDATE
+            SET items_count = s.items_count + EXCLUDED.items_count,
+                total_length_m = s.total_length_m + EXCLUDED.total_length_m,
+                updated_at = EXCLUDED.updated_at
+            """,
+            params,
+        )
+    delta.clear()
+
+
+def rebuild_summaries() -> tuple[int, int]:
+    """Пересчитывает сводки по BatchItem целиком; возвращает число строк (склад × модель, партии)."""
+    item_table = BatchItem._meta.db_table
+    stock_table = StockSummary._meta.db_table
+    batch_table = BatchSummary._meta.db_table
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cur:
+        # SHARE: импорты ждут конца пересчёта, а пересчёт — завершения уже начатых импортов
+        cur.execute(f"LOCK TABLE {item_table} IN SHARE MODE")
+        cur.execute(f"DELETE FROM {stock_table}")
+        cur.execute(
+            f"""
+            INSERT INTO {stock_table} (storage_id, cable_model_id, items_count, total_length_m, updated_at)
+            SELECT bi.storage_location_id, d.cable_model_id, count(*), sum(bi.length_m), %s
+            FROM {item_table} bi
+            JOIN {Drum._meta.db_table} d ON d.id = bi.drum_id
+            GROUP BY bi.storage_location_id, d.cable_model_id
+            """,
+            [now],
+        )
+        stock_rows = cur.rowcount
+        cur.execute(f"DELETE FROM {batch_table}")
+        cur.execute(
+            f"""
+            INSERT INTO {batch_table} (batch_id, items_count, total_length_m, updated_at)
+            SELECT batch_id, count(*), sum(length_m), %s
+            FROM {item_table}
+            GROUP BY batch_id
+            """,
+            [now],
+        )
+        batch_rows = cur.rowcount
+    return stock_rows, batch_rows
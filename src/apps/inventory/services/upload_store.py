@@ -0,0 +1,162 @@
+"""
+Хранилище загрузок с адресацией по содержимому.
+
+Загрузка пишется на диск один раз: SHA-256 считается по ходу записи во временный файл,
+который затем атомарно переименовывается в UPLOAD_STORE_ROOT/<sha[:2]>/<sha[2:4]>/<sha>.csv.
+Повторная загрузка того же содержимого новой копии не создаёт, а контрольная сумма известна
+до разбора — повтор файла для партии отклоняется сразу.
+
+Сохранённые файлы читаются через mmap (MappedFile) и могут быть обработаны повторно
+без новой загрузки. Файлы, на которые не ссылается ни одна задача импорта (ImportJob)
+и ни один журнал импорта (ImportLog), удаляет purge_unreferenced (команда purge_uploads).
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+
+from apps.audit.models import ImportLog
+from apps.inventory.models import ImportJob
+from apps.inventory.services.csv_source import iter_file_chunks
+
+# Файл моложе этого не удаляется: загрузка уже в хранилище, а задача или журнал ещё не записаны
+PURGE_GRACE = timedelta(hours=1)
+# Сколько контрольных сумм проверяется одним запросом
+PURGE_QUERY_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    sha256: str
+    size: int
+
+
+def stored_path(sha256: str) -> Path:
+    return Path(settings.UPLOAD_STORE_ROOT) / sha256[:2] / sha256[2:4] / f"{sha256}.csv"
+
+
+def store_upload(file) -> StoredUpload:
+    """Сохраняет загрузку в хранилище, считая SHA-256 за тот же проход."""
+    root = Path(settings.UPLOAD_STORE_ROOT)
+    tmp_dir = root / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, suffix=".part", delete=False) as out:
+        try:
+            for chunk in iter_file_chunks(file):
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            out.close()
+            os.unlink(out.name)
+            raise
+
+    sha = hasher.hexdigest()
+    path = stored_path(sha)
+    if path.exists():
+        os.unlink(out.name)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Переименование в пределах одной ФС атомарно: файл появляется под своим именем только целиком
+        os.replace(out.name, path)
+    return StoredUpload(sha256=sha, size=size)
+
+
+def is_stored(sha256: str) -> bool:
+    return stored_path(sha256).is_file()
+
+
+def _referenced(shas: list[str]) -> set[str]:
+    return set(ImportJob.objects.filter(file_sha256__in=shas).values_list("file_sha256", flat=True)) | set(
+        ImportLog.objects.filter(file_sha256__in=shas).values_list("file_sha256", flat=True)
+    )
+
+
+def purge_unreferenced(*, older_than: timedelta = PURGE_GRACE, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Удаляет файлы хранилища, на которые не ссылаются ImportJob и ImportLog, и брошенные
+    временные файлы недописанных загрузок — старше older_than. Возвращает (файлов, байт).
+    """
+    root = Path(settings.UPLOAD_STORE_ROOT)
+    if not root.is_dir():
+        return 0, 0
+    cutoff = time.time() - older_than.total_seconds()
+    removed = freed = 0
+
+    def remove(path: Path, size: int) -> None:
+        nonlocal removed, freed
+        if not dry_run:
+            path.unlink(missing_ok=True)
+        removed += 1
+        freed += size
+
+    for path in (root / "tmp").glob("*.part"):
+        st = path.stat()
+        if st.st_mtime < cutoff:
+            remove(path, st.st_size)
+
+    candidates: dict[str, tuple[Path, int]] = {}
+
+    def flush() -> None:
+        referenced = _referenced(list(candidates))
+        for sha, (path, size) in candidates.items():
+            if sha not in referenced:
+                remove(path, size)
+        candidates.clear()
+
+    for path in root.glob("??/??/*.csv"):
+        st = path.stat()
+        if st.st_mtime < cutoff:
+            candidates[path.stem] = (path, st.st_size)
+        if len(candidates) >= PURGE_QUERY_SIZE:
+            flush()
+    if candidates:
+        flush()
+    return removed, freed
+
+
+class MappedFile:
+    """Сохранённая загрузка, отображённая в память только для чтения (файловый интерфейс read/seek)."""
+
+    def __init__(self, sha256: str, *, name: str | None = None):
+        self.path = str(stored_path(sha256))
+        self.name = name or os.path.basename(self.path)
+        with open(self.path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # Пустой файл отобразить нельзя — он читается как пустой
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def read(self, size: int = -1) -> bytes:
+        return self._data.read(size) if self._data is not None else b""
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        if self._data is None:
+            return 0
+        self._data.seek(pos, whence)
+        return self._data.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._data.tell() if self._data is not None else 0
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,3 +1,1155 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, F, Max, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from apps.audit.models import ImportLog
+from apps.catalog.cache import get_catalog_cache
+from apps.catalog.models import CableModel, Drum
+from apps.core.testing import assert_max_queries
+from apps.inventory.models import Batch, BatchItem, BatchSummary, DrumBalance, DrumMovement, ImportJob, StockSummary
+from apps.inventory.services import drum_ledger, import_from_csv
+from apps.inventory.services.csv_rows import MAX_POSITION, RowError, parse_length, parse_position
+from apps.inventory.services.import_errors import ImportErrors
+from apps.inventory.services.import_from_csv import IMPORT_ENGINES, import_batch_from_csv
+from apps.inventory.services.import_jobs import Heartbeat, claim_next_job, enqueue_import, enqueue_stored, run_worker
+from apps.inventory.services.import_parallel import iter_parsed_ranges
+from apps.inventory.services.import_profile import PHASES, ImportProfile
+from apps.inventory.services.positions import BLOCK_SIZE, BatchPositions, PositionSet
+from apps.inventory.services.summaries import rebuild_summaries
+from apps.inventory.services.upload_store import is_stored, purge_unreferenced, store_upload, stored_path
+from apps.storage.models import Storage
+
+
+def csv_file(rows, *, header="position,drum_code,length", name="batch.csv") -> SimpleUploadedFile:
+    lines = [header, *(",".join(str(v) for v in row) for row in rows)]
+    return SimpleUploadedFile(name, ("\n".join(lines) + "\n").encode())
+
+
+def rejected_rows_text(log: ImportLog) -> str:
+    with log.rejected_rows.open("rb") as f:
+        return gzip.decompress(f.read()).decode()
+
+
+class CatalogMixin:
+    """Склад и два барабана: DRUM-1 (модель 10–1200 м, 1000 м) и DRUM-2 (модель 1–100 м, 100 м)."""
+
+    @classmethod
+    def create_catalog(cls):
+        cls.storage = Storage.objects.create(code="S-1")
+        long_model = CableModel.objects.create(
+            code="CM-LONG", min_length_m=Decimal("10.00"), max_length_m=Decimal("1200.00")
+        )
+        short_model = CableModel.objects.create(
+            code="CM-SHORT", min_length_m=Decimal("1.00"), max_length_m=Decimal("100.00")
+        )
+        cls.drum1 = Drum.objects.create(code="DRUM-1", cable_model=long_model, initial_length_m=Decimal("1000.00"))
+        cls.drum2 = Drum.objects.create(code="DRUM-2", cable_model=short_model, initial_length_m=Decimal("100.00"))
+
+    def setUp(self):
+        super().setUp()
+        # Кэш справочников живёт в процессе, а данные теста откатываются
+        get_catalog_cache().clear()
+
+    def run_import(self, rows, *, batch_number="B-1", engine="python", storage=None, **kwargs):
+        return import_batch_from_csv(
+            file=kwargs.pop("file", None) or csv_file(rows),
+            batch_number=batch_number,
+            storage=storage or self.storage,
+            engine=engine,
+            **kwargs,
+        )
+
+
+# Поток LISTEN кэша справочников держит своё соединение с тестовой БД и мешает её удалить;
+# план проверки без записи — только в тестах плана
+@override_settings(CATALOG_CACHE_LISTEN=False, CSV_IMPORT_PLAN_TTL=0)
+class CatalogTestCase(CatalogMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_catalog()
+
+
+# Длины на границах правил: экспонента, запятая, округление, порядок за пределами numeric
+EDGE_ROWS = [
+    (1, "drum-1", "0.125"),
+    (2, "DRUM-1", "1e2"),
+    (3, "DRUM-1", "12,5"),
+    (4, "DRUM-1", "200.005"),
+    (5, "DRUM-1", "200.015"),
+    (6, "DRUM-1", "1e999999"),
+    (7, "DRUM-1", "-1e99999"),
+    (8, "DRUM-1", "5e-99999"),
+    (9, "DRUM-1", "abc"),
+    (10, "DRUM-1", "5000000"),
+    (11, "DRUM-1", "1001"),
+    (12, "DRUM-2", "150"),
+    (13, "DRUM-9", "10"),
+    (0, "DRUM-1", "50"),
+    ("", "DRUM-1", "50"),
+    (2, "DRUM-2", "50"),
+    (14, "DRUM-2", "50"),
+    (15, "DRUM-2", "60"),
+    (16, "DRUM-1", "70"),
+    (17, "DRUM-1", "80"),
+    (18, "DRUM-1", "90"),
+    (19, "DRUM-1", "95"),
+    (20, "DRUM-1", "99"),
+    (21, "DRUM-1", "100"),
+    (22, "DRUM-1", "110"),
+    (23, "DRUM-1", "120"),
+    (3000000000, "DRUM-1", "50"),
+    ("1" * 20, "DRUM-1", "50"),
+    (24, "DRUM-1", "NaN"),
+    (25, "DRUM-1", "inf"),
+    (26, "DRUM-1", "130"),
+    (27, "DRUM-1", "140"),
+    (28, "DRUM-1", "150"),
+    (29, "DRUM-1", "160"),
+    # Грамматика одна для всех движков: только цифры и пробелы ASCII
+    (30, "DRUM-1", "1_000"),
+    (31, "DRUM-1", "\u0661\u0660"),
+    (32, "DRUM-1", "10\xa0"),
+    ("1_0", "DRUM-1", "50"),
+    ("\u0663", "DRUM-1", "50"),
+    (33, "DRUM-1\xa0", "50"),
+    ("0000000000034", "DRUM-1", "\t170 "),
+    (35, "DRUM-1", "180"),
+    (36, "DRUM-1", "190"),
+    (37, "DRUM-1", "200"),
+    (38, "DRUM-1", "210"),
+    (39, "DRUM-1", "220"),
+    (40, "DRUM-1", "230"),
+]
+
+
+class OneShotStream:
+    """Поток только для чтения без seek — как тело HTTP-запроса."""
+
+    def __init__(self, data: bytes, *, read_size: int = 7):
+        self._data = data
+        self._pos = 0
+        self._read_size = read_size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._read_size:
+            # Короткие чтения, как у сокета
+            size = self._read_size
+        chunk = self._data[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+
+class StreamingImportTests(CatalogTestCase):
+    rows = [(n, "DRUM-1" if n % 3 else "DRUM-2", f"{20 + n}") for n in range(1, 60)] + [(5, "DRUM-1", "30")]
+
+    def test_non_seekable_stream_matches_file(self):
+        data = csv_file(self.rows).read()
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                expected = self.run_import(self.rows, batch_number=f"REF-{engine}", engine=engine, chunk_rows=8)
+                res = self.run_import(
+                    None, batch_number=f"B-{engine}", engine=engine, chunk_rows=8,
+                    file=OneShotStream(data), file_name="stream.csv",
+                )
+                self.assertEqual(res.file_sha256, hashlib.sha256(data).hexdigest())
+                self.assertEqual(
+                    (res.total, res.inserted, res.duplicates_in_file, res.errors),
+                    (expected.total, expected.inserted, expected.duplicates_in_file, expected.errors),
+                )
+
+    def test_header_columns_in_any_order_and_bom(self):
+        data = "\ufeff Length,POSITION,drum_code,comment\n100,1,drum-1,первая\n".encode()
+        res = self.run_import(None, file=SimpleUploadedFile("b.csv", data))
+        self.assertEqual((res.total, res.inserted), (1, 1))
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Отсутствуют обязательные колонки"):
+            self.run_import(None, file=SimpleUploadedFile("b.csv", b"position,length\n1,100\n"))
+
+
+class ImportEngineParityTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def test_engines_agree_on_edge_lengths(self):
+        results = {}
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                res = self.run_import(EDGE_ROWS, batch_number=f"B-{engine}", engine=engine, chunk_rows=7)
+                items = list(
+                    BatchItem.objects.filter(batch_id=res.batch_id)
+                    .order_by("number_in_batch")
+                    .values_list("number_in_batch", "drum_id", "length_m")
+                )
+                results[engine] = (
+                    res.total, res.inserted, res.duplicates_in_file, res.duplicates_in_db, res.invalid_rows,
+                    res.error_counts, res.errors, items,
+                )
+        self.assertEqual(results["numpy"], results["python"])
+        self.assertEqual(results["copy"], results["python"])
+
+        total, inserted, _, _, _, error_counts, _, items = results["python"]
+        self.assertEqual(total, len(EDGE_ROWS))
+        self.assertEqual(inserted, len(items))
+        self.assertEqual(error_counts["length_too_big"], 2)
+        # Позиции вне integer, длины NaN/inf и цифры не ASCII — ошибки строк, а не сбой импорта
+        self.assertEqual(error_counts["bad_position"], 5)
+        self.assertEqual(error_counts["bad_length"], 6)
+        self.assertIn((34, self.drum1.id, Decimal("170.00")), items)
+        self.assertIn((4, self.drum1.id, Decimal("200.00")), items)
+        self.assertIn((5, self.drum1.id, Decimal("200.02")), items)
+
+    def test_engines_agree_on_random_file(self):
+        rng = np.random.default_rng(6)
+        # Обычные значения и, с вероятностью 5%, ошибочные: больше 100 ошибок — выборка сообщений неполная
+        positions = [str(n) for n in range(1, 2000)]
+        bad_positions = ["0", "-1", "1.5", "", "abc", "1e3", "1_0", "\u0663", "3000000000"]
+        codes, bad_codes = ["DRUM-1", "drum-2", " Drum-1 "], ["DRUM-9", ""]
+        lengths = ["50", "50.5", "50,25", "1e2", "99.999", " 75 ", "12.345"]
+        bad_lengths = ["0", "-5", "1001", "150", "", "x", "0.004", "1e999999", "5", "NaN", "1_000", "10\xa0"]
+
+        def pick(good, bad):
+            return rng.choice(bad) if rng.random() < 0.05 else rng.choice(good)
+
+        rows = [(pick(positions, bad_positions), pick(codes, bad_codes), pick(lengths, bad_lengths)) for _ in range(1500)]
+        results = {}
+        for engine in IMPORT_ENGINES:
+            batch_number = f"B-{engine}"
+            # Часть позиций уже занята в партии
+            self.run_import([(n, "DRUM-2", "10") for n in range(1, 2000, 50)], batch_number=batch_number)
+            res = self.run_import(rows, batch_number=batch_number, engine=engine, chunk_rows=97)
+            items = list(
+                BatchItem.objects.filter(batch_id=res.batch_id)
+                .order_by("number_in_batch")
+                .values_list("number_in_batch", "drum_id", "length_m")
+            )
+            summary = BatchSummary.objects.get(batch_id=res.batch_id)
+            log = ImportLog.objects.get(batch_id=res.batch_id, file_sha256=res.file_sha256)
+            results[engine] = (
+                res.total, res.inserted, res.duplicates_in_file, res.duplicates_in_db, res.invalid_rows,
+                res.error_counts, res.errors, log.errors, sorted(rejected_rows_text(log).splitlines()), items,
+                (summary.items_count, summary.total_length_m),
+            )
+        self.assertEqual(results["numpy"], results["python"])
+        self.assertEqual(results["copy"], results["python"])
+        total, inserted, dup_file, dup_db, invalid, _, errors, *_ = results["python"]
+        self.assertEqual(total, len(rows))
+        self.assertTrue(inserted and dup_file and dup_db and invalid)
+        self.assertEqual(len(errors), 100)
+
+    def test_huge_exponent_is_a_row_error(self):
+        res = self.run_import([(1, "DRUM-1", "1e999999"), (2, "DRUM-1", "50"), (3, "DRUM-1", "60")], engine="copy")
+        self.assertEqual((res.total, res.inserted, res.invalid_rows), (3, 2, 1))
+        self.assertEqual(res.error_counts, {"length_too_big": 1})
+        self.assertEqual(ImportLog.objects.get(batch_id=res.batch_id).inserted, 2)
+
+
+class RowParsingTests(CatalogTestCase):
+    def assert_row_error(self, parse, value, code):
+        with self.assertRaises(RowError) as cm:
+            parse(value)
+        self.assertEqual(cm.exception.code, code)
+
+    def test_position_fits_integer_column(self):
+        self.assertEqual(parse_position(str(MAX_POSITION)), MAX_POSITION)
+        for value in ("0", str(MAX_POSITION + 1), "3000000000", "1" * 20):
+            with self.subTest(value=value):
+                self.assert_row_error(parse_position, value, "bad_position")
+
+    def test_non_finite_length(self):
+        for value in ("NaN", "nan", "sNaN", "inf", "-Infinity"):
+            with self.subTest(value=value):
+                self.assert_row_error(parse_length, value, "bad_length")
+
+    def test_only_ascii_digits_and_whitespace(self):
+        self.assertEqual(parse_length(" 1e2\t"), Decimal("100.00"))
+        self.assertEqual(parse_position("+007\r"), 7)
+        for value in ("1_000", "\u0661\u0660", "10\xa0", "\xa010"):
+            with self.subTest(value=value):
+                self.assert_row_error(parse_length, value, "bad_length")
+        for value in ("1_0", "\u0663", "5\xa0", "-5"):
+            with self.subTest(value=value):
+                self.assert_row_error(parse_position, value, "bad_position")
+
+    def test_out_of_range_values_do_not_abort_import(self):
+        rows = [(3000000000, "DRUM-1", "50"), ("1" * 20, "DRUM-1", "50"), (1, "DRUM-1", "NaN")]
+        res = self.run_import([*rows, *((n, "DRUM-1", "50") for n in range(2, 6))])
+        self.assertEqual((res.total, res.inserted, res.invalid_rows), (7, 4, 3))
+        self.assertEqual(res.error_counts, {"bad_position": 2, "bad_length": 1})
+
+
+class ImportErrorsTests(SimpleTestCase):
+    def test_sample_keeps_first_lines_in_any_order_of_detection(self):
+        errors = ImportErrors(sample_size=3)
+        for line in (7, 5, 9, 2, 8, 3):
+            errors.add(line, "bad_length", "length", "x", "ошибка")
+        self.assertEqual(errors.sample, ["Строка 2: ошибка", "Строка 3: ошибка", "Строка 5: ошибка"])
+        self.assertEqual(len(errors), 6)
+
+        with errors.rejected_rows_file() as f:
+            rejected = gzip.decompress(f.read()).decode("utf-8-sig").splitlines()
+        self.assertEqual(len(rejected), 7)
+
+    def test_restored_sample_precedes_new_lines(self):
+        errors = ImportErrors(sample_size=2, counts={"bad_length": 1}, sample=["Строка 40: ошибка"])
+        errors.add(50, "bad_length", "length", "x", "ошибка")
+        errors.add(45, "bad_length", "length", "x", "ошибка")
+        self.assertEqual(errors.sample, ["Строка 40: ошибка", "Строка 45: ошибка"])
+        self.assertEqual(errors.counts["bad_length"], 3)
+
+
+class ImportProfileTests(CatalogTestCase):
+    def test_nested_phases_do_not_overlap(self):
+        profile = ImportProfile()
+        with profile, profile.phase("validate"):
+            with profile.phase("insert"):
+                time.sleep(0.02)
+        data = profile.as_dict()
+        self.assertGreaterEqual(data["phases"]["insert"], 0.02)
+        self.assertLess(data["phases"]["validate"], 0.01)
+
+    def test_import_log_has_profile(self):
+        with CaptureQueriesContext(connection) as captured:
+            res = self.run_import([(1, "DRUM-1", "100"), (2, "DRUM-2", "50")])
+        log = ImportLog.objects.get(batch_id=res.batch_id)
+        self.assertEqual(log.profile["phases"].keys(), PHASES.keys())
+        self.assertLessEqual(sum(log.profile["phases"].values()), float(log.duration_sec) + 0.001)
+        # Последняя запись профиля сама в профиль не попадает
+        self.assertEqual(log.profile["sql_count"], len(captured) - 1)
+        self.assertIsNone(log.profile["peak_memory_bytes"])
+
+    @override_settings(CSV_IMPORT_TRACE_MEMORY=True)
+    def test_peak_memory_is_traced_on_request(self):
+        res = self.run_import([(1, "DRUM-1", "100")])
+        self.assertGreater(ImportLog.objects.get(batch_id=res.batch_id).profile["peak_memory_bytes"], 0)
+
+
+class PositionSetTests(SimpleTestCase):
+    def test_matches_python_set_for_sparse_and_dense_blocks(self):
+        rng = np.random.default_rng(8)
+        # Блок 0 — сплошные номера (битовая карта), блок 3 — редкие, блок 2**31 — большие позиции
+        values = np.concatenate([
+            np.arange(1, 20_000),
+            rng.integers(3 * BLOCK_SIZE, 4 * BLOCK_SIZE, 500),
+            np.array([2**47, 2**47 + 1]),
+        ])
+        positions = PositionSet()
+        expected = set()
+        for part in np.array_split(rng.permutation(values), 7):
+            positions.add(part)
+            expected.update(part.tolist())
+        self.assertEqual(len(positions), len(expected))
+        self.assertEqual(positions.to_array().tolist(), sorted(expected))
+
+        probe = np.concatenate([values[::13], rng.integers(1, 5 * BLOCK_SIZE, 1000), np.array([2**47 + 2])])
+        self.assertEqual(positions.contains(probe).tolist(), [int(p) in expected for p in probe])
+        self.assertIn(19_999, positions)
+        self.assertNotIn(20_000, positions)
+
+    def test_serialization_round_trip(self):
+        positions = PositionSet(np.concatenate([np.arange(1, 10_000), np.array([BLOCK_SIZE * 9 + 5])]))
+        restored = PositionSet.from_bytes(positions.to_bytes())
+        self.assertEqual(len(restored), len(positions))
+        self.assertEqual(restored.to_array().tolist(), positions.to_array().tolist())
+        self.assertEqual(len(PositionSet.from_bytes(PositionSet().to_bytes())), 0)
+
+
+class BatchPositionsTests(CatalogTestCase):
+    def test_reads_only_blocks_the_file_touches(self):
+        res = self.run_import([(5, "DRUM-1", "100"), (BLOCK_SIZE + 5, "DRUM-1", "100")])
+        positions = BatchPositions(Batch.objects.get(pk=res.batch_id))
+        self.assertEqual(positions.in_db([5, 6]).tolist(), [True, False])
+        self.assertEqual(len(positions.existing), 1)
+        self.assertEqual(positions.in_db([BLOCK_SIZE + 5]).tolist(), [True])
+        # Прочитанный блок повторно не запрашивается
+        with self.assertNumQueries(0):
+            positions.in_db([7, BLOCK_SIZE + 6])
+
+        positions.accept([6])
+        self.assertEqual(positions.in_file([5, 6]).tolist(), [False, True])
+
+    def test_duplicates_across_chunks_and_with_db(self):
+        rows = [(2, "DRUM-1", "10"), (1, "DRUM-1", "20"), (3, "DRUM-2", "30"), (2, "DRUM-2", "40"), (3, "DRUM-1", "50")]
+        for engine in ("python", "numpy"):
+            with self.subTest(engine=engine):
+                self.run_import([(1, "DRUM-1", "100")], batch_number=f"B-{engine}", engine=engine)
+                res = self.run_import(rows, batch_number=f"B-{engine}", engine=engine, chunk_rows=2)
+                self.assertEqual((res.inserted, res.duplicates_in_db, res.duplicates_in_file), (2, 1, 2))
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(commits: int):
+    """progress, прерывающий импорт после commits зафиксированных кусков — как падение обработчика."""
+    calls = []
+
+    def progress(rows, size):
+        calls.append(rows)
+        if len(calls) >= commits:
+            raise Interrupted
+
+    return progress
+
+
+# 40 строк: ошибки длины и барабана, дубли позиций в файле, в том числе через границу кусков
+CHECKPOINT_ROWS = [
+    (n if n % 9 else n - 1, "DRUM-9" if n % 7 == 0 else ("DRUM-1" if n % 2 else "DRUM-2"), 5 if n % 11 == 0 else 50)
+    for n in range(1, 41)
+]
+
+
+class CheckpointTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def import_outcome(self, res):
+        log = ImportLog.objects.get(batch_id=res.batch_id, checkpoint__isnull=True)
+        items = list(
+            BatchItem.objects.filter(batch_id=res.batch_id)
+            .order_by("number_in_batch")
+            .values_list("number_in_batch", "drum_id", "length_m")
+        )
+        counts = (res.total, res.inserted, res.duplicates_in_file, res.duplicates_in_db, res.invalid_rows)
+        log_counts = (log.total, log.inserted, log.duplicates_in_file, log.duplicates_in_db, log.invalid_rows)
+        summary = BatchSummary.objects.get(batch_id=res.batch_id)
+        return (
+            counts, log_counts, res.error_counts, items, rejected_rows_text(log),
+            (summary.items_count, summary.total_length_m),
+        )
+
+    def test_interrupted_import_resumes_from_checkpoint(self):
+        for engine in ("python", "numpy"):
+            with self.subTest(engine=engine):
+                options = {"engine": engine, "commit_rows": 10, "chunk_rows": 4}
+                expected = self.import_outcome(
+                    self.run_import(CHECKPOINT_ROWS, batch_number=f"REF-{engine}", **options)
+                )
+
+                batch_number = f"B-{engine}"
+                with self.assertRaises(Interrupted):
+                    self.run_import(CHECKPOINT_ROWS, batch_number=batch_number, progress=interrupt_after(2), **options)
+                log = ImportLog.objects.get(batch__number=batch_number)
+                self.assertEqual(log.checkpoint["line"], 21)
+                self.assertEqual(BatchItem.objects.filter(batch__number=batch_number).count(), log.inserted)
+
+                res = self.run_import(CHECKPOINT_ROWS, batch_number=batch_number, **options)
+                self.assertEqual(self.import_outcome(res), expected)
+                self.assertEqual(ImportLog.objects.filter(batch__number=batch_number).count(), 1)
+
+                with self.assertRaisesMessage(ValueError, "уже был обработан"):
+                    self.run_import(CHECKPOINT_ROWS, batch_number=batch_number, **options)
+
+    def test_error_ratio_after_resume_removes_rows_of_all_chunks(self):
+        rows = [(1, "DRUM-1", "100"), (2, "DRUM-1", "200"), *((n, "DRUM-9", "10") for n in range(3, 9))]
+        options = {"commit_rows": 2, "chunk_rows": 2}
+        with self.assertRaises(Interrupted):
+            self.run_import(rows, progress=interrupt_after(1), **options)
+        self.assertEqual(BatchItem.objects.count(), 2)
+        with self.assertRaisesMessage(ValueError, "более 50% ошибок"):
+            self.run_import(rows, **options)
+        self.assertFalse(BatchItem.objects.exists())
+        self.assertEqual(BatchSummary.objects.get(batch__number="B-1").items_count, 0)
+
+
+PLAN_ROWS = [
+    (1, "DRUM-1", "100"), (2, "DRUM-2", "50"), (2, "DRUM-1", "60"), (3, "DRUM-9", "10"), (4, "DRUM-1", "70"),
+    (5, "DRUM-2", "20"), (6, "DRUM-1", "80"),
+]
+
+
+@override_settings(
+    CSV_IMPORT_PLAN_TTL=900,
+    CACHES={**settings.CACHES, "import_plans": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class DryRunPlanTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        caches["import_plans"].clear()
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.from_plan = self.enterContext(
+            patch.object(import_from_csv, "_import_from_plan", wraps=import_from_csv._import_from_plan)
+        )
+
+    def test_dry_run_writes_nothing(self):
+        res = self.run_import(PLAN_ROWS, dry_run=True)
+        self.assertTrue(res.dry_run)
+        self.assertFalse(res.rejection)
+        self.assertEqual((res.total, res.inserted, res.duplicates_in_file, res.invalid_rows), (7, 5, 1, 1))
+        self.assertFalse(Batch.objects.exists())
+        self.assertFalse(ImportLog.objects.exists())
+        self.assertFalse(BatchItem.objects.exists())
+
+    def test_import_after_dry_run_reuses_plan(self):
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                batch_number = f"B-{engine}"
+                checked = self.run_import(PLAN_ROWS, batch_number=batch_number, engine=engine, dry_run=True)
+                self.from_plan.reset_mock()
+                res = self.run_import(PLAN_ROWS, batch_number=batch_number, engine=engine)
+                self.from_plan.assert_called_once()
+                self.assertEqual(
+                    (res.total, res.inserted, res.duplicates_in_file, res.invalid_rows, res.error_counts),
+                    (checked.total, checked.inserted, checked.duplicates_in_file, checked.invalid_rows,
+                     checked.error_counts),
+                )
+                log = ImportLog.objects.get(batch_id=res.batch_id)
+                self.assertEqual(log.inserted, 5)
+                self.assertEqual(len(rejected_rows_text(log).splitlines()), 3)
+                self.assertEqual(BatchSummary.objects.get(batch_id=res.batch_id).total_length_m, Decimal("320.00"))
+
+    def test_plan_is_used_once(self):
+        self.run_import(PLAN_ROWS, dry_run=True)
+        self.run_import(PLAN_ROWS)
+        self.run_import(PLAN_ROWS, batch_number="B-2")
+        self.assertEqual(self.from_plan.call_count, 1)
+
+    def test_plan_is_dropped_when_drum_changes(self):
+        self.run_import(PLAN_ROWS, dry_run=True)
+        self.drum1.initial_length_m = Decimal("95.00")
+        self.drum1.save()
+        res = self.run_import(PLAN_ROWS)
+        self.from_plan.assert_not_called()
+        self.assertEqual((res.inserted, res.error_counts.get("length_exceeds_drum")), (4, 1))
+
+    def test_plan_is_dropped_for_another_storage(self):
+        self.run_import(PLAN_ROWS, dry_run=True)
+        res = self.run_import(PLAN_ROWS, storage=Storage.objects.create(code="S-2"))
+        self.from_plan.assert_not_called()
+        self.assertEqual(res.inserted, 5)
+
+    def test_positions_taken_after_dry_run_are_duplicates_in_db(self):
+        self.run_import(PLAN_ROWS, dry_run=True)
+        self.run_import([(4, "DRUM-2", "40")], file=csv_file([(4, "DRUM-2", "40")], name="other.csv"))
+        res = self.run_import(PLAN_ROWS)
+        self.from_plan.assert_called_once()
+        self.assertEqual((res.inserted, res.duplicates_in_db), (4, 1))
+        self.assertEqual(BatchItem.objects.get(batch_id=res.batch_id, number_in_batch=4).drum_id, self.drum2.id)
+
+
+def summary_rows():
+    stock = StockSummary.objects.order_by("storage_id", "cable_model_id")
+    batches = BatchSummary.objects.order_by("batch_id")
+    return (
+        list(stock.values_list("storage_id", "cable_model_id", "items_count", "total_length_m")),
+        list(batches.values_list("batch_id", "items_count", "total_length_m")),
+    )
+
+
+def stale_positions_index(positions):
+    """Индекс позиций партии, прочитанный до вставки параллельного импорта: в БД ничего не занято."""
+    return np.zeros(len(positions), dtype=bool)
+
+
+# Запросов на кусок строк сверх постоянной части импорта: поиск барабанов (промах кэша справочников),
+# блоки индекса позиций партии, вставка
+IMPORT_CHUNK_QUERIES = 3
+
+
+class ImportQueryTests(CatalogTestCase):
+    def test_queries_per_chunk_are_bounded(self):
+        rows = [(n, "DRUM-1" if n % 2 else "DRUM-2", 50) for n in range(1, 101)]
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                with CaptureQueriesContext(connection) as one:
+                    self.run_import(rows, batch_number=f"B-{engine}-1", engine=engine, chunk_rows=100)
+                with assert_max_queries(len(one) + 9 * IMPORT_CHUNK_QUERIES, label=f"{engine}, 10 кусков"):
+                    res = self.run_import(rows, batch_number=f"B-{engine}-10", engine=engine, chunk_rows=10)
+                self.assertEqual(res.inserted, len(rows))
+
+
+class SummaryTests(CatalogTestCase):
+    def test_incremental_summaries_match_rebuild(self):
+        for engine in IMPORT_ENGINES:
+            self.run_import([(1, "DRUM-1", "100"), (2, "DRUM-2", "50.5")], batch_number=f"B-{engine}", engine=engine)
+            self.run_import(
+                [(2, "DRUM-1", "30"), (3, "DRUM-1", "40.25"), (4, "DRUM-2", "0")],
+                batch_number=f"B-{engine}", engine=engine,
+            )
+        incremental = summary_rows()
+        self.assertEqual(incremental[0][0][2:], (len(IMPORT_ENGINES) * 2, Decimal("140.25") * len(IMPORT_ENGINES)))
+        rebuild_summaries()
+        self.assertEqual(summary_rows(), incremental)
+
+    def test_positions_taken_after_index_read_are_not_counted(self):
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                batch_number = f"B-{engine}"
+                self.run_import([(2, "DRUM-1", "100")], batch_number=batch_number, engine=engine)
+                # Позиция 2 занята «параллельным» импортом уже после чтения индекса позиций
+                with patch.object(BatchPositions, "in_db", side_effect=stale_positions_index):
+                    res = self.run_import(
+                        [(1, "DRUM-1", "10"), (2, "DRUM-2", "20"), (3, "DRUM-2", "30")],
+                        batch_number=batch_number, engine=engine,
+                    )
+                self.assertEqual((res.inserted, res.duplicates_in_db), (2, 1))
+                self.assertEqual(ImportLog.objects.get(batch_id=res.batch_id, inserted=2).duplicates_in_db, 1)
+                self.assertEqual(
+                    BatchSummary.objects.get(batch_id=res.batch_id).total_length_m, Decimal("140.00")
+                )
+        incremental = summary_rows()
+        rebuild_summaries()
+        self.assertEqual(summary_rows(), incremental)
+
+
+class DrumLedgerTests(CatalogTestCase):
+    def assert_receipts_match_items(self):
+        items = dict(BatchItem.objects.values("drum_id").annotate(s=Sum("length_m")).values_list("drum_id", "s"))
+        receipts = dict(
+            DrumMovement.objects.filter(kind=DrumMovement.Kind.RECEIPT)
+            .values("drum_id").annotate(s=Sum("delta_m")).values_list("drum_id", "s")
+        )
+        self.assertEqual(receipts, items)
+        self.assertEqual(dict(DrumBalance.objects.values_list("drum_id", "balance_m")), items)
+
+    def test_receipts_only_for_inserted_rows(self):
+        for engine in IMPORT_ENGINES:
+            with self.subTest(engine=engine):
+                batch_number = f"B-{engine}"
+                self.run_import([(1, "DRUM-1", "100"), (2, "DRUM-2", "50")], batch_number=batch_number, engine=engine)
+                with patch.object(BatchPositions, "in_db", side_effect=stale_positions_index):
+                    self.run_import(
+                        [(2, "DRUM-1", "300"), (3, "DRUM-2", "25.5")], batch_number=batch_number, engine=engine,
+                    )
+                self.assert_receipts_match_items()
+
+    def test_error_ratio_rollback_cancels_receipts(self):
+        rows = [(1, "DRUM-1", "100"), (2, "DRUM-1", "200"), *((n, "DRUM-9", "10") for n in range(3, 8))]
+        with self.assertRaises(ValueError):
+            self.run_import(rows, commit_rows=2, chunk_rows=2)
+        self.assertFalse(BatchItem.objects.exists())
+        self.assertEqual(DrumBalance.objects.get(drum=self.drum1).balance_m, Decimal("0.00"))
+        self.assertEqual(
+            DrumMovement.objects.filter(drum=self.drum1).aggregate(s=Sum("delta_m"))["s"], Decimal("0.00")
+        )
+
+    def test_movements_and_balance_as_of(self):
+        self.run_import([(1, "DRUM-1", "500"), (2, "DRUM-2", "40")])
+        drum_ledger.cut(self.drum1, Decimal("120.50"))
+        first = timezone.now()
+        self.assertEqual(drum_ledger.take_snapshots(at=first), 2)
+        drum_ledger.transfer(self.drum1, self.drum2, Decimal("30"))
+        drum_ledger.write_off(self.drum2, Decimal("5"))
+        with self.assertRaises(ValueError):
+            drum_ledger.cut(self.drum2, Decimal("1000"))
+
+        self.assertEqual(drum_ledger.balance(self.drum1), Decimal("349.50"))
+        self.assertEqual(drum_ledger.balance(self.drum2), Decimal("65.00"))
+        self.assertEqual(drum_ledger.balance_as_of(self.drum1, first), Decimal("379.50"))
+        self.assertEqual(drum_ledger.balance_as_of(self.drum2, first), Decimal("40.00"))
+        now = timezone.now()
+        self.assertEqual(drum_ledger.balance_as_of(self.drum1, now), drum_ledger.balance(self.drum1))
+        self.assertEqual(drum_ledger.balance_as_of(self.drum2, now), drum_ledger.balance(self.drum2))
+        # Снимок не повторяется для барабанов без новых движений
+        self.assertEqual(drum_ledger.take_snapshots(at=first), 0)
+
+
+class ApiPermissionTests(CatalogTestCase):
+    # URL → право на просмотр, без которого он отвечает 403
+    urls = {
+        "/api/batches/": "view_batch",
+        "/api/batch-items/": "view_batchitem",
+        "/api/drums/": "view_drum",
+        "/api/storages/": "view_storage",
+        "/api/exports/batch-items/?output=csv": "view_batchitem",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.run_import([(1, "DRUM-1", "100")])
+        self.user = User.objects.create_user("reader")
+        self.client.force_login(self.user)
+
+    def test_authenticated_user_without_view_permission_is_forbidden(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_view_permission_grants_read(self):
+        self.user.user_permissions.set(Permission.objects.filter(codename__in=self.urls.values()))
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_view_permission_does_not_grant_import(self):
+        self.user.user_permissions.set(Permission.objects.filter(codename__in=self.urls.values()))
+        response = self.client.post(
+            "/api/imports/?batch=B-2&storage=S-1", data=b"position,drum_code,length\n1,DRUM-1,100\n",
+            content_type="text/csv",
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class KeysetApiTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser("admin")
+
+    def setUp(self):
+        super().setUp()
+        # Импорт вставляет все строки с одним created_at — порядок страниц держится на id
+        self.run_import([(n, "DRUM-1", 100 + n) for n in range(1, 24)])
+        self.run_import([(n, "DRUM-2", n) for n in range(1, 4)], batch_number="B-2")
+        self.client.force_login(self.admin)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.json()["results"]]
+            url = response.json()["next"]
+        return ids
+
+    def test_pages_cover_all_rows_once_in_order(self):
+        newest_first = list(BatchItem.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(self.walk("/api/batch-items/?limit=7"), newest_first)
+        self.assertEqual(self.walk("/api/batch-items/?limit=7&ordering=created_at"), newest_first[::-1])
+        self.assertEqual(len(self.walk("/api/batches/?limit=1")), 2)
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.client.get("/api/batch-items/?limit=0").json()["results"]), 1)
+        with patch("apps.core.pagination.KeysetPagination.max_page_size", 5):
+            self.assertEqual(len(self.client.get("/api/batch-items/?limit=100").json()["results"]), 5)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/api/batch-items/?cursor=not-a-cursor").status_code, 404)
+
+    def test_sparse_fields(self):
+        row = self.client.get("/api/batch-items/?limit=1&fields=id,number_in_batch,length_m").json()["results"][0]
+        self.assertEqual(set(row), {"id", "number_in_batch", "length_m"})
+        row = self.client.get("/api/batch-items/?limit=1&fields=id,drum").json()["results"][0]
+        self.assertEqual(row["drum"], {"id": self.drum2.id, "code": "DRUM-2"})
+        self.assertEqual(self.client.get("/api/batch-items/?fields=id,nope").status_code, 400)
+
+    def test_no_query_per_row(self):
+        self.client.get("/api/batch-items/?limit=1")
+        with CaptureQueriesContext(connection) as one:
+            self.client.get("/api/batch-items/?limit=1")
+        with assert_max_queries(len(one), label="/api/batch-items/?limit=26"):
+            self.client.get("/api/batch-items/?limit=26")
+
+
+class UploadApiTests(CatalogTestCase):
+    body = b"position,drum_code,length\n1,DRUM-1,100\n2,DRUM-2,50\n3,DRUM-9,10\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser("admin")
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(UPLOAD_STORE_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.client.force_login(self.admin)
+
+    def post(self, query, body=None, **headers):
+        return self.client.post(
+            f"/api/imports/?batch=B-1&storage=s-1&{query}", data=self.body if body is None else body,
+            content_type="text/csv", headers=headers,
+        )
+
+    def test_small_body_is_imported_in_request(self):
+        response = self.post("")
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual((result["total"], result["inserted"], result["invalid_rows"]), (3, 2, 1))
+        self.assertEqual(result["file_sha256"], hashlib.sha256(self.body).hexdigest())
+        self.assertEqual(BatchItem.objects.filter(batch__number="B-1").count(), 2)
+
+        response = self.post("")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("уже был обработан", response.json()["detail"])
+
+    def test_gzip_body(self):
+        response = self.post("file_name=batch.csv.gz", gzip.compress(self.body), content_encoding="gzip")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["inserted"], 2)
+        self.assertEqual(self.post("", b"not gzip", content_encoding="gzip").status_code, 400)
+
+    def test_dry_run(self):
+        response = self.post("dry_run=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["dry_run"], response.json()["inserted"]), (True, 2))
+        self.assertFalse(Batch.objects.exists())
+
+    def test_large_body_is_queued(self):
+        for query, max_bytes in (("mode=async", 8 << 20), ("", 10)):
+            with self.subTest(query=query), override_settings(CSV_IMPORT_API_SYNC_MAX_BYTES=max_bytes):
+                ImportJob.objects.all().delete()
+                response = self.post(query)
+                self.assertEqual(response.status_code, 202)
+                job = ImportJob.objects.get(pk=response.json()["job_id"])
+                self.assertEqual((job.batch_number, job.storage_id), ("B-1", self.storage.id))
+                self.assertEqual(stored_path(job.file_sha256).read_bytes(), self.body)
+                self.assertFalse(Batch.objects.exists())
+
+                status = self.client.get(response.json()["status_url"])
+                self.assertEqual(status.status_code, 200)
+                self.assertEqual(status.json()["status"], ImportJob.Status.QUEUED)
+
+    def test_invalid_params(self):
+        self.assertEqual(self.post("mode=later").status_code, 400)
+        response = self.client.post("/api/imports/?storage=S-1", data=self.body, content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CSV_EXPORT_CHUNK_SIZE=2)
+class ExportApiTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser("admin")
+
+    def setUp(self):
+        super().setUp()
+        self.rows = [(n, "DRUM-1" if n % 2 else "DRUM-2", f"{10 + n}.5") for n in range(1, 8)]
+        self.run_import(self.rows)
+        self.run_import([(1, "DRUM-1", "300")], batch_number="B-2", storage=Storage.objects.create(code="S-2"))
+        self.client.force_login(self.admin)
+
+    def export(self, query):
+        response = self.client.get(f"/api/exports/batch-items/?{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_export_of_batch_can_be_imported_back(self):
+        response, body = self.export("batch=B-1&output=csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="batch-B-1.csv"')
+        res = self.run_import(None, batch_number="B-3", file=SimpleUploadedFile("batch-B-1.csv", body.encode()))
+        self.assertEqual((res.total, res.inserted, res.invalid_rows), (7, 7, 0))
+        self.assertEqual(
+            list(BatchItem.objects.filter(batch_id=res.batch_id).order_by("number_in_batch")
+                 .values_list("number_in_batch", "drum__code", "length_m")),
+            [(pos, code, Decimal(length)) for pos, code, length in self.rows],
+        )
+
+    def test_ndjson_export_filtered_by_storage(self):
+        _, body = self.export("storage=s-2&output=ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            {k: rows[0][k] for k in ("batch", "position", "drum_code", "storage_code", "length")},
+            {"batch": "B-2", "position": 1, "drum_code": "DRUM-1", "storage_code": "S-2", "length": "300.00"},
+        )
+        _, body = self.export("output=ndjson")
+        self.assertEqual(len(body.splitlines()), 8)
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get("/api/exports/batch-items/?output=xml").status_code, 400)
+        self.assertEqual(self.client.get("/api/exports/batch-items/?storage=S-404").status_code, 400)
+
+
+@override_settings(CATALOG_CACHE_LISTEN=False)
+class ImportJobTests(CatalogMixin, TransactionTestCase):
+    """Прогресс и сигнал задачи пишутся отдельными соединениями — нужен настоящий коммит."""
+
+    def setUp(self):
+        self.create_catalog()
+        super().setUp()
+        self.enterContext(override_settings(UPLOAD_STORE_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def test_worker_runs_queued_job(self):
+        job = enqueue_import(file=csv_file([(1, "DRUM-1", "50"), (2, "DRUM-2", "60")]), batch_number="B-1",
+                             storage=self.storage)
+        self.assertEqual(run_worker(once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.DONE)
+        self.assertEqual((job.result["total"], job.result["inserted"]), (2, 2))
+        self.assertEqual(BatchItem.objects.filter(batch_id=job.batch_id).count(), 2)
+        # Повтор того же файла отклоняется до разбора
+        enqueue_import(file=csv_file([(1, "DRUM-1", "50"), (2, "DRUM-2", "60")]), batch_number="B-1",
+                       storage=self.storage)
+        run_worker(once=True)
+        self.assertEqual(ImportJob.objects.latest("created_at").status, ImportJob.Status.FAILED)
+
+    def _running_job(self, *, worker: str, heartbeat_age: timedelta) -> ImportJob:
+        return ImportJob.objects.create(
+            batch_number="B-1", storage=self.storage, status=ImportJob.Status.RUNNING, worker=worker,
+            heartbeat_at=timezone.now() - heartbeat_age,
+        )
+
+    @patch("apps.inventory.services.import_jobs.STALE_JOB_AFTER", timedelta(milliseconds=200))
+    def test_heartbeat_keeps_long_running_job_from_being_reclaimed(self):
+        job = self._running_job(worker="w-1", heartbeat_age=timedelta(0))
+        heartbeat = Heartbeat(job, interval=timedelta(milliseconds=20))
+        heartbeat.start()
+        try:
+            # Фаза без вызовов progress дольше STALE_JOB_AFTER
+            time.sleep(0.5)
+            self.assertIsNone(claim_next_job(worker="w-2"))
+        finally:
+            heartbeat.stop()
+        time.sleep(0.3)
+        # Без сигнала задача считается брошенной
+        self.assertEqual(claim_next_job(worker="w-2").pk, job.pk)
+
+    def test_heartbeat_ignores_job_taken_by_another_worker(self):
+        job = self._running_job(worker="w-1", heartbeat_age=timedelta(hours=1))
+        stale_at = job.heartbeat_at
+        ImportJob.objects.filter(pk=job.pk).update(worker="w-2")
+        heartbeat = Heartbeat(job, interval=timedelta(milliseconds=10))
+        heartbeat.start()
+        time.sleep(0.1)
+        heartbeat.stop()
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).heartbeat_at, stale_at)
+
+
+@override_settings(CATALOG_CACHE_LISTEN=False)
+class ImportBatchesCommandTests(CatalogMixin, TransactionTestCase):
+    """Команда импортирует в дочерних процессах с их собственными соединениями — нужен настоящий коммит."""
+
+    def setUp(self):
+        self.create_catalog()
+        super().setUp()
+        self.dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def write(self, name, rows) -> Path:
+        path = self.dir / name
+        path.write_bytes(csv_file(rows).read())
+        return path
+
+    def call(self, *args, **options) -> str:
+        out = StringIO()
+        call_command("import_batches", *args, stdout=out, engine="python", commit_rows=0, **options)
+        return out.getvalue()
+
+    def test_directory_files_become_batches_in_parallel(self):
+        self.write("B-1.csv", [(1, "DRUM-1", "50"), (2, "DRUM-2", "60")])
+        self.write("B-2.csv", [(1, "DRUM-1", "70")])
+        (self.dir / "notes.txt").write_text("не CSV")
+        out = self.call(str(self.dir), storage="S-1", workers=2)
+        self.assertIn("Файлов: 2, партий: 2, процессов: 2", out)
+        counts = dict(BatchItem.objects.values_list("batch__number").annotate(n=Count("id")))
+        self.assertEqual(counts, {"B-1": 2, "B-2": 1})
+
+    def test_mapping_sets_batch_per_file(self):
+        self.write("first.csv", [(1, "DRUM-1", "50")])
+        self.write("second.csv", [(2, "DRUM-1", "60")])
+        mapping = self.dir / "map.csv"
+        mapping.write_text("file,batch,storage\nfirst.csv,B-9, s-1 \nsecond.csv,B-9,\n")
+        # Код склада — как при импорте: без учёта регистра и пробелов по краям
+        self.call(mapping=str(mapping), storage="s-1")
+        self.assertEqual(sorted(BatchItem.objects.filter(batch__number="B-9").values_list("number_in_batch", flat=True)), [1, 2])
+
+    def test_batch_template(self):
+        path = self.write("day.csv", [(1, "DRUM-1", "50")])
+        self.call(str(path), storage="S-1", batch="{parent}-{stem}")
+        self.assertTrue(Batch.objects.filter(number=f"{self.dir.name}-day").exists())
+
+    def test_errors(self):
+        path = self.write("B-1.csv", [(1, "DRUM-1", "50")])
+        with self.assertRaisesMessage(CommandError, "Неизвестные склады: S-404"):
+            self.call(str(path), storage="S-404")
+        with self.assertRaisesMessage(CommandError, "Не найдено ни одного CSV-файла"):
+            self.call(str(self.enterContext(tempfile.TemporaryDirectory())), storage="S-1")
+        self.assertFalse(BatchItem.objects.exists())
+
+    def test_failed_file_is_reported(self):
+        self.write("B-1.csv", [(1, "DRUM-404", "50")])
+        self.write("B-2.csv", [(1, "DRUM-1", "50")])
+        with self.assertRaisesMessage(CommandError, "Не импортировано файлов: 1"):
+            self.call(str(self.dir), storage="S-1")
+        # Остальные файлы импортированы
+        self.assertEqual(list(BatchItem.objects.values_list("batch__number", flat=True)), ["B-2"])
+
+
+class MetricsTests(CatalogTestCase):
+    @staticmethod
+    def sample(name, **labels) -> float:
+        # Реестр процесса общий для всех тестов — сравниваются приращения
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_import_is_counted(self):
+        before = {
+            "imports": self.sample("cabletrack_imports_total", engine="python", mode="import", outcome="partial"),
+            "inserted": self.sample("cabletrack_import_rows_inserted_total", engine="python"),
+            "invalid": self.sample("cabletrack_import_rows_rejected_total", engine="python", reason="invalid"),
+        }
+        self.run_import([(1, "DRUM-1", "50"), (2, "DRUM-2", "60"), (3, "DRUM-404", "10")])
+        self.assertEqual(
+            self.sample("cabletrack_imports_total", engine="python", mode="import", outcome="partial"),
+            before["imports"] + 1,
+        )
+        self.assertEqual(self.sample("cabletrack_import_rows_inserted_total", engine="python"), before["inserted"] + 2)
+        self.assertEqual(
+            self.sample("cabletrack_import_rows_rejected_total", engine="python", reason="invalid"),
+            before["invalid"] + 1,
+        )
+
+    def test_endpoint_exposes_queue_and_latency(self):
+        ImportJob.objects.create(batch_number="B-1", storage=self.storage)
+        ImportJob.objects.create(
+            batch_number="B-2", storage=self.storage, status=ImportJob.Status.RUNNING, heartbeat_at=timezone.now()
+        )
+        latency = {"name": "cabletrack_http_request_duration_seconds_count", "view": "metrics", "method": "GET",
+                   "status": "200"}
+        before = self.sample(**latency)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('cabletrack_import_queue_jobs{status="queued"} 1.0', body)
+        self.assertIn('cabletrack_import_queue_jobs{status="running"} 1.0', body)
+        # Время ответа пишется после ответа; метка — имя представления, а не путь
+        self.assertEqual(self.sample(**latency), before + 1)
+        self.assertEqual(self.client.post("/metrics").status_code, 405)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"], METRICS_TOKEN="secret")
+    def test_access_is_restricted(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.1.2.3").status_code, 200)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code, 200)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        user = User.objects.create_user("reader")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+@override_settings(CATALOG_CACHE_LISTEN=False)
+class SeedScaleTests(TestCase):
+    def seed(self, prefix: str) -> None:
+        call_command(
+            "seed_scale", storages="3", cable_models="4", drums="50", batches="6", batch_items="20", prefix=prefix,
+            seed=7, stdout=StringIO(),
+        )
+
+    def test_seeded_data_is_consistent(self):
+        self.seed("T")
+        items = BatchItem.objects.filter(batch__number__startswith="T-")
+        self.assertEqual(Batch.objects.filter(number__startswith="T-").count(), 6)
+        # Длины в правилах модели и не больше барабана, номера в партии — 1..N
+        self.assertFalse(items.filter(length_m__lt=F("drum__cable_model__min_length_m")).exists())
+        self.assertFalse(items.filter(length_m__gt=F("drum__cable_model__max_length_m")).exists())
+        self.assertFalse(items.filter(length_m__gt=F("drum__initial_length_m")).exists())
+        per_batch = items.values("batch").annotate(last=Max("number_in_batch"), n=Count("id"))
+        self.assertTrue(all(row["last"] == row["n"] for row in per_batch))
+        # Приходы, остатки и сводки — как после импорта тех же позиций
+        by_drum = dict(items.values("drum_id").annotate(s=Sum("length_m")).values_list("drum_id", "s"))
+        receipts = DrumMovement.objects.filter(kind=DrumMovement.Kind.RECEIPT).values("drum_id")
+        self.assertEqual(dict(receipts.annotate(s=Sum("delta_m")).values_list("drum_id", "s")), by_drum)
+        self.assertEqual(dict(DrumBalance.objects.values_list("drum_id", "balance_m")), by_drum)
+        seeded = summary_rows()
+        rebuild_summaries()
+        self.assertEqual(summary_rows(), seeded)
+
+    def test_same_seed_same_data_and_prefix_is_checked(self):
+        self.seed("A")
+        self.seed("B")
+        lengths = {
+            prefix: list(
+                BatchItem.objects.filter(batch__number__startswith=f"{prefix}-")
+                .order_by("batch__number", "number_in_batch").values_list("length_m", flat=True)
+            )
+            for prefix in ("A", "B")
+        }
+        self.assertEqual(lengths["A"], lengths["B"])
+        with self.assertRaisesMessage(CommandError, "префиксом A"):
+            self.seed("A")
+
+
+class ParallelParseTests(CatalogTestCase):
+    def _write_csv(self, rows) -> str:
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "batch.csv")
+        with open(path, "wb") as f:
+            f.write(csv_file(rows).read())
+        return path
+
+    def test_ranges_cover_file_in_order_and_hash_it_once(self):
+        rows = [(i, "DRUM-1" if i % 3 else "", "50") for i in range(1, 2001)]
+        path = self._write_csv(rows)
+        with open(path, "rb") as f:
+            data = f.read()
+        header = data.index(b"\n") + 1
+        hasher = hashlib.sha256(data[:header])
+
+        parts = list(iter_parsed_ranges(
+            path, start=header, columns={"position": 0, "drum_code": 1, "length": 2}, workers=2,
+            range_bytes=1024, hasher=hasher,
+        ))
+        self.assertGreater(len(parts), 10)
+        self.assertEqual(hasher.hexdigest(), hashlib.sha256(data).hexdigest())
+        self.assertEqual(sum(p.records for p in parts), len(rows))
+        positions = []
+        for part in parts:
+            positions.extend(pos for _, _, _, pos in part.rows)
+        self.assertEqual(positions, [i for i in range(1, 2001) if i % 3])
+
+    def test_parallel_import_matches_sequential(self):
+        rows = [*EDGE_ROWS, *((i, "DRUM-1", "20") for i in range(100, 400))]
+        path = self._write_csv(rows)
+        results = []
+        for workers, batch_number in ((1, "B-SEQ"), (2, "B-PAR")):
+            res = self.run_import(None, file=path, batch_number=batch_number, workers=workers, chunk_rows=50)
+            items = list(
+                BatchItem.objects.filter(batch_id=res.batch_id).order_by("number_in_batch")
+                .values_list("number_in_batch", "drum_id", "length_m")
+            )
+            results.append((res.total, res.inserted, res.invalid_rows, res.duplicates_in_file, res.file_sha256,
+                            res.error_counts, items))
+        self.assertEqual(results[0], results[1])
+
+
+class UploadStoreTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(UPLOAD_STORE_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def _age(self, path, hours: float) -> None:
+        at = time.time() - hours * 3600
+        os.utime(path, (at, at))
+
+    def test_same_content_is_stored_once(self):
+        first = store_upload(csv_file([(1, "DRUM-1", "50")]))
+        second = store_upload(csv_file([(1, "DRUM-1", "50")]))
+        self.assertEqual(first, second)
+        self.assertEqual(first.sha256, hashlib.sha256(csv_file([(1, "DRUM-1", "50")]).read()).hexdigest())
+
+    def test_purge_removes_only_old_unreferenced_files(self):
+        by_job = store_upload(csv_file([(1, "DRUM-1", "50")]))
+        by_log = store_upload(csv_file([(2, "DRUM-1", "50")]))
+        orphan = store_upload(csv_file([(3, "DRUM-1", "50")]))
+        fresh = store_upload(csv_file([(4, "DRUM-1", "50")]))
+        enqueue_stored(file_sha256=by_job.sha256, file_size=by_job.size, file_name="a.csv", batch_number="B-1",
+                       storage=self.storage)
+        ImportLog.objects.create(batch=Batch.objects.create(number="B-2"), file_name="b.csv", file_sha256=by_log.sha256)
+        part = stored_path(orphan.sha256).parents[2] / "tmp" / "abandoned.part"
+        part.write_bytes(b"position")
+        for path in (*(stored_path(u.sha256) for u in (by_job, by_log, orphan)), part):
+            self._age(path, hours=2)
+
+        self.assertEqual(purge_unreferenced(dry_run=True), (2, orphan.size + len(b"position")))
+        self.assertTrue(is_stored(orphan.sha256))
+        purge_unreferenced()
+        self.assertEqual(
+            [is_stored(u.sha256) for u in (by_job, by_log, orphan, fresh)], [True, True, False, True]
+        )
+        self.assertFalse(part.exists())
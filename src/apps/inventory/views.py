@@ -1,14 +1,37 @@
+import gzip
+from dataclasses import asdict
+
+from django.conf import settings
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from django.shortcuts import redirect
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
+from django.views.generic import TemplateView
 from django.views.generic.edit import FormView
 
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.views import KeysetReadOnlyViewSet
 from apps.inventory.forms import BatchImportForm
-from apps.inventory.models import Batch
+from apps.inventory.models import Batch, BatchItem, ImportJob
+from apps.inventory.serializers import (
+    BatchImportParamsSerializer,
+    BatchItemExportParamsSerializer,
+    BatchItemSerializer,
+    BatchSerializer,
+)
+from apps.inventory.services.export import EXPORT_FORMATS, export_filename, iter_export
 from apps.inventory.services.import_from_csv import import_batch_from_csv
+from apps.inventory.services.import_jobs import enqueue_import, enqueue_stored
+from apps.inventory.services.upload_store import store_upload
 
 
 @method_decorator(csrf_protect, name="dispatch")
@@ -36,28 +59,236 @@ class BatchImportAdminView(FormView):
         batch_number = form.cleaned_data["batch_number"]
         storage = form.cleaned_data["storage"]
         file = form.cleaned_data["file"]
+        dry_run = form.cleaned_data["dry_run"]
 
         try:
-            res = import_batch_from_csv(file=file, batch_number=batch_number, storage=storage)
-        except ValueError as e:
-            messages.error(self.request, str(e))
-            return redirect(reverse("admin:inventory_batch_import"))
+            job = enqueue_import(file=file, batch_number=batch_number, storage=storage, dry_run=dry_run)
         except Exception:
-            messages.error(self.request, "Неожиданная ошибка импорта. Попробуйте еще раз или обратитесь к администратору.")
+            messages.error(self.request, "Не удалось поставить файл в очередь импорта. Попробуйте еще раз.")
             return redirect(reverse("admin:inventory_batch_import"))
 
-        msg = (
-            f"Импорт '{res.file_name}' в партию '{batch_number}' завершён: "
-            f"всего={res.total}, вставлено={res.inserted}, "
-            f"дубли_в_файле={res.duplicates_in_file}, дубли_в_БД={res.duplicates_in_db}, "
-            f"некорректных={res.invalid_rows}"
+        action = "проверки" if job.dry_run else "импорта"
+        messages.info(self.request, f"Файл '{job.file_name}' поставлен в очередь {action} в партию '{job.batch_number}'.")
+        return redirect(reverse("admin:inventory_batch_import_status", args=[job.pk]))
+
+
+def _job_payload(job: ImportJob) -> dict:
+    payload = {
+        "id": job.pk,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "dry_run": job.dry_run,
+        "finished": job.is_finished,
+        "rows_processed": job.rows_processed,
+        "bytes_processed": job.bytes_processed,
+        "file_size": job.file_size,
+        "percent": job.progress_percent,
+        "result": job.result,
+        "error": job.error,
+        "batch_url": None,
+    }
+    if job.batch_id:
+        payload["batch_url"] = reverse("admin:inventory_batch_change", args=[job.batch_id])
+    return payload
+
+
+class ImportJobStatusAdminView(TemplateView):
+    template_name = "admin/inventory/batch/import_status.html"
+
+    admin_site = None
+    permission_codename = "inventory.add_batchitem"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.has_perm(self.permission_codename):
+            return HttpResponseForbidden("Недостаточно прав для просмотра импорта.")
+        self.job = get_object_or_404(ImportJob.objects.select_related("storage"), pk=kwargs["job_id"])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("format") == "json":
+            return JsonResponse(_job_payload(self.job))
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        if self.admin_site:
+            ctx.update(self.admin_site.each_context(self.request))
+        ctx["opts"] = Batch._meta
+        ctx["title"] = "Импорт CSV в партию"
+        ctx["job"] = self.job
+        ctx["payload"] = _job_payload(self.job)
+        return ctx
+
+
+class BatchViewSet(KeysetReadOnlyViewSet):
+    """Партии."""
+
+    queryset = Batch.objects.all()
+    serializer_class = BatchSerializer
+
+
+class BatchItemViewSet(KeysetReadOnlyViewSet):
+    """Позиции партий с барабаном и складом."""
+
+    queryset = BatchItem.objects.all()
+    serializer_class = BatchItemSerializer
+    related_fields = {"batch": "batch", "drum": "drum", "storage_location": "storage_location"}
+
+
+class CanViewItems(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm("inventory.view_batchitem")
+
+
+def export_response(queryset, export_format: str, *, filename: str) -> StreamingHttpResponse:
+    """Выгрузка позиций потоком: байты уходят клиенту по мере чтения курсора."""
+    response = StreamingHttpResponse(iter_export(queryset, export_format), content_type=EXPORT_FORMATS[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class BatchItemExportView(APIView):
+    """Выгрузка позиций партий (всех или по партии и складу) в CSV или NDJSON потоком."""
+
+    permission_classes = [IsAuthenticated, CanViewItems]
+
+    @extend_schema(
+        parameters=[BatchItemExportParamsSerializer],
+        responses={
+            (200, "text/csv"): OpenApiTypes.BINARY,
+            (200, "application/x-ndjson"): OpenApiTypes.BINARY,
+        },
+    )
+    def get(self, request):
+        params = BatchItemExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        queryset = BatchItem.objects.all()
+        if "batch" in p:
+            queryset = queryset.filter(batch__number=p["batch"])
+        if "storage" in p:
+            queryset = queryset.filter(storage_location=p["storage"])
+        return export_response(queryset, p["output"], filename=export_filename(p["output"], batch_number=p.get("batch")))
+
+
+class CanImport(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm("inventory.add_batchitem")
+
+
+class _BodyStream:
+    """Тело запроса только для чтения (без seek): импорт читает его ровно один раз."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+
+def _is_gzip(request) -> bool:
+    encoding = request.META.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+    return encoding == "gzip" or request.content_type in ("application/gzip", "application/x-gzip")
+
+
+def _body_length(request) -> int | None:
+    """Размер тела по Content-Length; None — неизвестен (chunked)."""
+    if request.META.get("HTTP_TRANSFER_ENCODING", "").strip().lower() == "chunked":
+        return None
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return None
+
+
+def _body_stream(request, *, length: int | None):
+    """
+    Поток тела запроса без чтения в память. Для chunked Django видит пустое тело (нет Content-Length),
+    поэтому читается wsgi.input — его декодирует сервер (gunicorn). gzip распаковывается по ходу чтения.
+    """
+    raw = request._request
+    if length is None:
+        raw = request.META.get("wsgi.input")
+        if raw is None:
+            raise ParseError("Сервер не поддерживает тело запроса без Content-Length.")
+    stream = _BodyStream(raw)
+    if _is_gzip(request):
+        stream = _BodyStream(gzip.GzipFile(fileobj=stream, mode="rb"))
+    return stream
+
+
+class BatchImportUploadView(APIView):
+    """
+    Импорт CSV в партию из тела запроса (text/csv, можно gzip и chunked).
+
+    Небольшое тело импортируется прямо в запросе, с потоковым разбором, — ответ содержит итог импорта.
+    Большое тело или тело без Content-Length сохраняется в хранилище загрузок и ставится в очередь —
+    ответ 202 с номером задачи.
+    """
+
+    permission_classes = [IsAuthenticated, CanImport]
+
+    @extend_schema(
+        parameters=[BatchImportParamsSerializer],
+        request={"text/csv": OpenApiTypes.BINARY, "application/gzip": OpenApiTypes.BINARY},
+        responses={
+            200: OpenApiResponse(OpenApiTypes.OBJECT, description="Итог проверки без записи."),
+            201: OpenApiResponse(OpenApiTypes.OBJECT, description="Итог импорта."),
+            202: OpenApiResponse(OpenApiTypes.OBJECT, description="Задача поставлена в очередь."),
+            400: OpenApiResponse(OpenApiTypes.OBJECT, description="Ошибка параметров или файл отклонён."),
+        },
+    )
+    def post(self, request):
+        params = BatchImportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        length = _body_length(request)
+        run_async = p["mode"] == "async" or (
+            p["mode"] == "auto" and (length is None or length > settings.CSV_IMPORT_API_SYNC_MAX_BYTES)
         )
-        level = messages.SUCCESS if res.inserted and not res.invalid_rows else messages.WARNING
-        messages.add_message(self.request, level, msg)
+        stream = _body_stream(request, length=length)
 
         try:
-            batch = Batch.objects.get(id=res.batch_id)
-            url = reverse("admin:inventory_batch_change", args=[batch.id])
-            return redirect(url)
-        except Batch.DoesNotExist:
-            return redirect("admin:inventory_batch_changelist")
+            if run_async:
+                return self._enqueue(stream, p)
+            result = import_batch_from_csv(
+                file=stream,
+                file_name=p["file_name"],
+                batch_number=p["batch"],
+                storage=p["storage"],
+                engine=settings.CSV_IMPORT_ENGINE,
+                dry_run=p["dry_run"],
+            )
+        except (OSError, EOFError) as e:
+            # gzip.BadGzipFile — подкласс OSError
+            raise ParseError(f"Не удалось прочитать тело запроса: {e}")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(asdict(result), status=status.HTTP_200_OK if result.dry_run else status.HTTP_201_CREATED)
+
+    def _enqueue(self, stream, p) -> Response:
+        stored = store_upload(stream)
+        job = enqueue_stored(
+            file_sha256=stored.sha256,
+            file_size=stored.size,
+            file_name=p["file_name"],
+            batch_number=p["batch"],
+            storage=p["storage"],
+            dry_run=p["dry_run"],
+        )
+        return Response(
+            {"job_id": job.pk, "status_url": reverse("api-import-job", args=[job.pk])},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ImportJobAPIView(APIView):
+    """Состояние задачи импорта."""
+
+    permission_classes = [IsAuthenticated, CanImport]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request, job_id: int):
+        return Response(_job_payload(get_object_or_404(ImportJob, pk=job_id)))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='storage',
+            index=models.Index(fields=['created_at', 'id'], name='storage_sto_created_6a5e38_idx'),
+        ),
+    ]
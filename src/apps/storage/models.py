@@ -8,6 +8,10 @@ class Storage(TimeStampedModel):
     name = models.CharField("Название", max_length=128, blank=True, default="")
 
     class Meta:
+        indexes = [
+            # Keyset-пагинация API
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name = "Склад"
         verbose_name_plural = "Склады"
 
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+
+from apps.core.serializers import SparseFieldsMixin
+from apps.storage.models import Storage
+
+
+class StorageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Storage
+        fields = ("id", "code", "name", "created_at", "updated_at")
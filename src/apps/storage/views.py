@@ -1,3 +1,10 @@
-from django.shortcuts import render
+from apps.core.views import KeysetReadOnlyViewSet
+from apps.storage.models import Storage
+from apps.storage.serializers import StorageSerializer
 
-# Create your views here.
+
+class StorageViewSet(KeysetReadOnlyViewSet):
+    """Склады."""
+
+    queryset = Storage.objects.all()
+    serializer_class = StorageSerializer
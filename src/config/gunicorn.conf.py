@@ -0,0 +1,29 @@
+"""
+Настройки gunicorn: gunicorn -c config/gunicorn.conf.py config.wsgi
+
+Метрики /metrics складываются по всем процессам через общий каталог PROMETHEUS_MULTIPROC_DIR
+(см. apps.core.metrics). Каталог очищается при старте мастера: значения прошлого запуска
+в сумму не попадают. Если в тот же каталог пишут обработчики очереди (import_worker), перезапуск
+веб-сервера сбрасывает и их счётчики — для Prometheus это обычный сброс счётчика.
+"""
+import os
+import shutil
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+# Синхронный импорт больших файлов через API и потоковая выгрузка идут дольше стандартных 30 с
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "300"))
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -22,6 +22,24 @@ env = environ.Env(
     DJANGO_DEBUG=(bool, False),
     DJANGO_ALLOWED_HOSTS=(list, []),
     DJANGO_TIME_ZONE=(str, "UTC"),
+    CSV_IMPORT_ENGINE=(str, "python"),
+    CSV_IMPORT_WORKERS=(int, 1),
+    CSV_IMPORT_COMMIT_ROWS=(int, 0),
+    CSV_IMPORT_PLAN_TTL=(int, 900),
+    CSV_IMPORT_PLAN_MAX_ROWS=(int, 2_000_000),
+    CSV_IMPORT_API_SYNC_MAX_BYTES=(int, 8 * 1024 * 1024),
+    CSV_IMPORT_TRACE_MEMORY=(bool, False),
+    CSV_EXPORT_CHUNK_SIZE=(int, 2000),
+    ADMIN_EXACT_COUNT_MAX=(int, 10_000),
+    CACHE_URL=(str, "locmemcache://"),
+    REFERENCE_CACHE_TTL=(int, 300),
+    CATALOG_CACHE_MAX_SIZE=(int, 100_000),
+    CATALOG_CACHE_TTL=(int, 60),
+    CATALOG_CACHE_LISTEN=(bool, True),
+    SQL_BUDGET_REQUEST_QUERIES=(int, 30),
+    SQL_BUDGET_REQUEST_SEC=(float, 1.0),
+    METRICS_ALLOWED_IPS=(list, ["127.0.0.1/32", "::1/128"]),
+    METRICS_TOKEN=(str, ""),
 )
 
 # Quick-start development settings - unsuitable for production
@@ -55,6 +73,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым — чтобы во время ответа вошли все остальные middleware
+    'apps.core.middleware.RequestMetricsMiddleware',
+    'apps.core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -134,6 +155,10 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Загруженные файлы (очередь импорта)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(env("DJANGO_MEDIA_ROOT", default=str(BASE_DIR / "media")))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -142,6 +167,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -153,3 +179,68 @@ SPECTACULAR_SETTINGS = {
         {"name": "SessionAuth", "type": "apiKey", "in": "cookie", "keyName": "sessionid"},
     ],
 }
+
+# CSV import
+# python — построчные проверки в Python, numpy — векторизованные проверки кусками (NumPy),
+# copy — COPY в staging-таблицу и проверки в SQL (PostgreSQL)
+CSV_IMPORT_ENGINE = env("CSV_IMPORT_ENGINE")
+# >1 — параллельный разбор большого файла в пуле процессов (только для engine=python)
+CSV_IMPORT_WORKERS = env("CSV_IMPORT_WORKERS")
+# >0 — фиксация каждые N строк с контрольной точкой и продолжением после сбоя (engine=python/numpy)
+CSV_IMPORT_COMMIT_ROWS = env("CSV_IMPORT_COMMIT_ROWS")
+# План импорта после проверки без записи (см. apps.inventory.services.import_plan):
+# сколько секунд хранится (0 — не кэшировать), сколько принятых строк допускается и в каком кэше лежит.
+# Проверка и загрузка идут в разных процессах обработчика, поэтому кэш — общий, файловый
+CSV_IMPORT_PLAN_TTL = env("CSV_IMPORT_PLAN_TTL")
+CSV_IMPORT_PLAN_MAX_ROWS = env("CSV_IMPORT_PLAN_MAX_ROWS")
+CSV_IMPORT_PLAN_CACHE = "import_plans"
+# POST /api/imports/: тело до этого размера импортируется в запросе, больше (или chunked) — через очередь
+CSV_IMPORT_API_SYNC_MAX_BYTES = env("CSV_IMPORT_API_SYNC_MAX_BYTES")
+# Пик памяти импорта в ImportLog.profile (tracemalloc): импорт идёт в несколько раз медленнее,
+# включать для разбора отдельных загрузок
+CSV_IMPORT_TRACE_MEMORY = env("CSV_IMPORT_TRACE_MEMORY")
+# Выгрузка позиций (apps.inventory.services.export): строк за одну выборку серверного курсора
+CSV_EXPORT_CHUNK_SIZE = env("CSV_EXPORT_CHUNK_SIZE")
+# Хранилище загрузок с адресацией по SHA-256 (локальный диск, общий для веб-процессов и обработчиков)
+UPLOAD_STORE_ROOT = Path(env("UPLOAD_STORE_ROOT", default=str(MEDIA_ROOT / "uploads")))
+
+# Общий кэш: по умолчанию в памяти процесса, для нескольких процессов и узлов — Redis
+# (CACHE_URL=redis://host:6379/1, нужен пакет redis)
+CACHES = {
+    "default": env.cache_url("CACHE_URL"),
+    "import_plans": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": env("CSV_IMPORT_PLAN_DIR", default=str(BASE_DIR / "var" / "import_plans")),
+        "TIMEOUT": CSV_IMPORT_PLAN_TTL,
+    },
+}
+
+# Сессии читаются из кэша, в БД только записываются — запрос сессии на каждый запрос админки не нужен
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+# Сколько секунд живут в кэше выборки справочников для списков выбора (apps.core.reference_cache);
+# в процессах, где объект не сохраняли, изменения видны не позже этого срока
+REFERENCE_CACHE_TTL = env("REFERENCE_CACHE_TTL")
+
+# Списки админки (apps.core.admin.EstimatedCountPaginator): при оценке планировщика от этого числа строк
+# показывается оценка, а не точный COUNT(*)
+ADMIN_EXACT_COUNT_MAX = env("ADMIN_EXACT_COUNT_MAX")
+
+# Кэш справочников (барабаны, склады) для импорта, см. apps.catalog.cache
+CATALOG_CACHE_MAX_SIZE = env("CATALOG_CACHE_MAX_SIZE")
+# Время жизни записей, пока не подключён слушатель LISTEN/NOTIFY, с
+CATALOG_CACHE_TTL = env("CATALOG_CACHE_TTL")
+CATALOG_CACHE_LISTEN = env("CATALOG_CACHE_LISTEN")
+
+# Бюджеты SQL (apps.core.query_budget): превышение пишется предупреждением в лог apps.core.query_budget.
+# "request" — на HTTP-запрос (QueryBudgetMiddleware, check_admin_queries), остальные — по имени сервиса
+# (@query_budget); импорт делает запросы на каждый кусок строк, поэтому его бюджет по умолчанию не задан —
+# число запросов на кусок ограничивает тест apps.inventory.tests.ImportQueryTests
+SQL_BUDGETS = {
+    "request": {"queries": env("SQL_BUDGET_REQUEST_QUERIES"), "seconds": env("SQL_BUDGET_REQUEST_SEC")},
+}
+
+# GET /metrics (apps.core.views.metrics_view): адреса и подсети, с которых метрики отдаются без авторизации
+# (REMOTE_ADDR — за прокси это адрес прокси), и токен для заголовка «Authorization: Bearer <токен>»
+# (пустой — вход по токену выключен). Остальным — только сотрудникам (is_staff), вошедшим в админку
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS")
+METRICS_TOKEN = env("METRICS_TOKEN")
@@ -15,13 +15,40 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from rest_framework.routers import DefaultRouter
+
+from apps.catalog.views import DrumViewSet
+from apps.core.views import metrics_view
+from apps.inventory.views import (
+    BatchImportUploadView,
+    BatchItemExportView,
+    BatchItemViewSet,
+    BatchViewSet,
+    ImportJobAPIView,
+)
+from apps.storage.views import StorageViewSet
+
+router = DefaultRouter()
+router.register("batches", BatchViewSet)
+router.register("batch-items", BatchItemViewSet)
+router.register("drums", DrumViewSet)
+router.register("storages", StorageViewSet)
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
+    # REST API: чтение, потоковая загрузка CSV и выгрузка позиций
+    path("api/imports/", BatchImportUploadView.as_view(), name="api-import"),
+    path("api/import-jobs/<int:job_id>/", ImportJobAPIView.as_view(), name="api-import-job"),
+    path("api/exports/batch-items/", BatchItemExportView.as_view(), name="api-export-batch-items"),
+    path("api/", include(router.urls)),
+
+    # Метрики Prometheus
+    path("metrics", metrics_view, name="metrics"),
+
     # drf_spectacular
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),